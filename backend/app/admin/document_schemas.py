@@ -1,13 +1,11 @@
 from pydantic import BaseModel 
 from datetime import datetime
-from typing import Literal
 
 class DocumentUploadResponse(BaseModel):
-    id: str
+    doc_id: str
     name: str
-    size: int
+    size: str
     upload_date: datetime
-    status: Literal["processing", "indexed", "failed"]
     message: str
     success: bool
-    
\ No newline at end of file
+    duplicate: bool = False
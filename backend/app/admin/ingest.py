@@ -1,11 +1,21 @@
 print("Starting ingestion script...")
 
 from pathlib import Path
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from langchain_core.documents import Document
 from langchain_chroma import Chroma
-from app.core.llm import get_embedding_model
+from app.core.config import settings
+from app.core.llm import get_embedding_model, get_chat_model, embedding_model_name
+from app.chatbot.rag.vectorstore import invalidate_vector_store, retrieval_executor
+from app.chatbot.rag.answer_cache import answer_cache
+from app.admin.ingest_worker import count_pages, parse_and_split
 from app.db.mongodb import db
+import multiprocessing
+import asyncio
+import hashlib
+import time
 
 
 BASE_CHROMA_PATH = Path("app/storage/chroma")
@@ -15,80 +25,390 @@ BASE_CHROMA_PATH.mkdir(parents=True, exist_ok=True)
 UPLOAD_PATH.mkdir(parents=True, exist_ok=True)
 
 
-async def ingest_documents(file_path: str, client_id: str, doc_id: str):
+# ---------------------------
+# PROCESS POOL
+# ---------------------------
+# PDF parsing and splitting are CPU-bound and hold the GIL, so they run in
+# worker processes; the event loop only awaits the result.
+_ingest_pool: ProcessPoolExecutor | None = None
+
+
+def _get_ingest_pool() -> ProcessPoolExecutor:
+    global _ingest_pool
+    if _ingest_pool is None:
+        _ingest_pool = ProcessPoolExecutor(
+            max_workers=settings.INGEST_PROCESS_WORKERS,
+            # spawn: forking a process that runs threads (aiosqlite, Chroma) is unsafe
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _ingest_pool
+
+
+def shutdown_ingest_pool() -> None:
+    global _ingest_pool
+    if _ingest_pool is not None:
+        _ingest_pool.shutdown(wait=False, cancel_futures=True)
+        _ingest_pool = None
+
+
+async def _run_parser(fn, *args):
+    if settings.INGEST_PROCESS_WORKERS <= 0:
+        return await asyncio.to_thread(fn, *args)
+    global _ingest_pool
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_ingest_pool(), fn, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM on a huge PDF); start a fresh pool next time
+        _ingest_pool = None
+        raise
+
+
+async def _parse_pdf(file_path: str, progress) -> dict:
     """
-    Ingest PDF into CLIENT-SPECIFIC vector store
+    Parse and split the PDF in ranges of INGEST_PAGES_PER_TASK pages, in
+    parallel across the pool, reporting pages as ranges finish.
     """
+    page_total = await asyncio.to_thread(count_pages, file_path)
+    await progress(stage="parsing", pages_total=page_total, pages_parsed=0)
 
-    try:
-        pdf_path = Path(file_path)
-        if not pdf_path.exists():
-            raise FileNotFoundError(f"PDF not found at {pdf_path}")
-
-        # ---------------------------
-        # CLIENT-SPECIFIC PATH
-        # ---------------------------
-        client_chroma_path = (BASE_CHROMA_PATH / f"client_{client_id}").resolve()
-        client_chroma_path.mkdir(parents=True, exist_ok=True)
-
-        # ---------------------------
-        # LOAD PDF
-        # ---------------------------
-        loader = PyPDFLoader(str(pdf_path))
-        docs = loader.load()
-
-        # ---------------------------
-        # SPLIT DOCUMENT
-        # ---------------------------
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=800,
-            chunk_overlap=120
-        )
-        chunks = splitter.split_documents(docs)
+    step = max(1, settings.INGEST_PAGES_PER_TASK)
+    if page_total <= step:
+        parsed = await _run_parser(parse_and_split, file_path, settings.INGEST_CHUNK_SIZE, settings.INGEST_CHUNK_OVERLAP)
+        await progress(pages_parsed=parsed["page_count"])
+        return parsed
 
-        # ---------------------------
-        # ADD METADATA
-        # ---------------------------
-        for chunk in chunks:
-            chunk.metadata.update({
-                "client_id": client_id,
-                "doc_id": doc_id,
-                "source": pdf_path.name,
-            })
-
-        # ---------------------------
-        # CREATE / LOAD VECTORSTORE
-        # ---------------------------
-        vectorstore = Chroma(
-            persist_directory=str(client_chroma_path),
-            embedding_function=get_embedding_model(),
-            collection_name="company_kb"
-        )
+    pages_parsed = 0
 
-        vectorstore.add_documents(chunks)
-
-        # ---------------------------
-        # UPDATE DB STATUS
-        # ---------------------------
-        await db.documents.update_one(
-            {"$or": [{"doc_id": doc_id}, {"id": doc_id}]},
-            {
-                "$set": {
-                    "client_id": client_id,
-                    "doc_id": doc_id,
-                    "id": doc_id,
-                    "status": "indexed",
-                    "chunk_count": len(chunks)
-                }
-            }
+    async def _parse_range(first: int):
+        nonlocal pages_parsed
+        result = await _run_parser(
+            parse_and_split, file_path, settings.INGEST_CHUNK_SIZE, settings.INGEST_CHUNK_OVERLAP,
+            first, min(first + step, page_total),
         )
+        pages_parsed += result["page_count"]
+        await progress(pages_parsed=pages_parsed)
+        return result
+
+    async with asyncio.TaskGroup() as group:
+        tasks = [group.create_task(_parse_range(first)) for first in range(0, page_total, step)]
+    # Chunk order (and so chunk ids) follows page order, whatever finished first
+    return {
+        "page_count": page_total,
+        "chunks": [chunk for task in tasks for chunk in task.result()["chunks"]],
+    }
+
+
+async def _no_progress(**fields) -> None:
+    pass
+
+
+# ---------------------------
+# CONCURRENCY LIMITS
+# ---------------------------
+class IngestSlots:
+    """Global and per-tenant caps on concurrently running ingestions."""
+
+    def __init__(self, global_limit: int, per_client_limit: int):
+        self.per_client_limit = max(1, per_client_limit)
+        self._global = asyncio.Semaphore(max(1, global_limit))
+        self._clients: dict[str, asyncio.Semaphore] = {}
+        self.running = 0
+        self.waiting = 0
+
+    @asynccontextmanager
+    async def acquire(self, client_id: str):
+        client_slot = self._clients.setdefault(client_id, asyncio.Semaphore(self.per_client_limit))
+        self.waiting += 1
+        try:
+            # Tenant slot first, so a tenant's backlog never holds global slots
+            await client_slot.acquire()
+            try:
+                await self._global.acquire()
+            except BaseException:
+                client_slot.release()
+                raise
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._global.release()
+            client_slot.release()
+
+    def stats(self) -> dict:
+        return {"running": self.running, "waiting": self.waiting}
+
+
+ingest_slots = IngestSlots(
+    global_limit=settings.INGEST_MAX_CONCURRENT,
+    per_client_limit=settings.INGEST_MAX_CONCURRENT_PER_CLIENT,
+)
+
+# Content-hash deduplication counters (since process start)
+dedup_stats = {
+    "duplicate_uploads": 0,
+    "chunks_embedded": 0,
+    "embeddings_saved": 0,
+}
+
+
+def record_duplicate_upload(chunk_count: int) -> None:
+    """A byte-identical re-upload was skipped; none of its chunks are re-embedded."""
+    dedup_stats["duplicate_uploads"] += 1
+    dedup_stats["embeddings_saved"] += chunk_count or 0
+
+
+def ingest_stats() -> dict:
+    return {**ingest_slots.stats(), **dedup_stats, **throttle_stats}
+
+
+# ---------------------------
+# YIELDING TO CHAT TRAFFIC
+# ---------------------------
+throttle_stats = {"throttle_pauses": 0, "throttled_seconds": 0.0}
+
+
+def chat_pressure() -> str | None:
+    """Why indexing should hold back right now, or None."""
+    if get_chat_model().client.limiter.waiting:
+        return "chat model queue"
+    if get_embedding_model().client.limiter.waiting:
+        return "embedding queue"
+    if retrieval_executor.saturation() >= settings.INGEST_THROTTLE_SATURATION:
+        return "retrieval pool"
+    return None
+
+
+async def yield_to_chat() -> None:
+    """
+    Wait while chat requests are queueing for the models or the retrieval
+    pool, for at most INGEST_THROTTLE_MAX_PAUSE_SECONDS so indexing still
+    makes progress under sustained load.
+    """
+    if chat_pressure() is None:
+        return
+    started = time.monotonic()
+    throttle_stats["throttle_pauses"] += 1
+    while chat_pressure() and time.monotonic() - started < settings.INGEST_THROTTLE_MAX_PAUSE_SECONDS:
+        await asyncio.sleep(0.25)
+    throttle_stats["throttled_seconds"] = round(throttle_stats["throttled_seconds"] + time.monotonic() - started, 3)
 
-        print(f"[SUCCESS] Document {doc_id} indexed for client {client_id}")
 
-    except Exception as e:
-        await db.documents.update_one(
-            {"$or": [{"doc_id": doc_id}, {"id": doc_id}]},
-            {"$set": {"status": "failed", "client_id": client_id, "doc_id": doc_id, "id": doc_id}}
+# ---------------------------
+# BATCHED EMBEDDING
+# ---------------------------
+def _open_vectorstore(client_chroma_path: Path) -> Chroma:
+    return Chroma(
+        persist_directory=str(client_chroma_path),
+        embedding_function=get_embedding_model(),
+        collection_name="company_kb"
+    )
+
+
+async def _embed_batch(texts: list[str], doc_id: str, batch_no: int, report: dict) -> list[list[float]]:
+    """
+    Embed one batch, retrying just this batch on failure. Transient HTTP
+    errors are already retried by the model client; this also covers
+    anything that escapes it (e.g. an endpoint that is still loading).
+    """
+    attempt = 0
+    while True:
+        try:
+            return await get_embedding_model().aembed_documents(texts)
+        except Exception as e:
+            if attempt >= settings.INGEST_EMBED_BATCH_RETRIES:
+                raise
+            attempt += 1
+            report["retries"] += 1
+            delay = settings.INGEST_EMBED_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1)
+            print(f"[RETRY] Document {doc_id} | batch {batch_no} | attempt {attempt} in {delay:.1f}s | {e}")
+            await asyncio.sleep(delay)
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _existing_embeddings(vectorstore: Chroma, hashes: list[str], model: str) -> dict[str, list[float]]:
+    """
+    Embeddings already stored for these chunk hashes (any document of this
+    client) by the same embedding model; vectors from another model (or
+    untagged ones from before the tag existed) are never reused.
+    """
+    known: dict[str, list[float]] = {}
+    for start in range(0, len(hashes), 500):
+        found = vectorstore._collection.get(
+            where={"$and": [{"chunk_hash": {"$in": hashes[start:start + 500]}}, {"embedding_model": model}]},
+            include=["embeddings", "metadatas"],
         )
-        print(f"[FAILED] Document {doc_id} | {e}")
-        raise
\ No newline at end of file
+        for metadata, vector in zip(found["metadatas"], found["embeddings"]):
+            known.setdefault(metadata["chunk_hash"], vector)
+    return known
+
+
+async def _embed_and_store(vectorstore: Chroma, chunks: list[Document], doc_id: str, progress=_no_progress) -> dict:
+    """
+    Embed chunks in batches of INGEST_EMBED_BATCH_SIZE with at most
+    INGEST_EMBED_MAX_IN_FLIGHT batches in flight, writing each batch to
+    Chroma as soon as it is embedded. Chunk ids are deterministic
+    ("<doc_id>:<n>"), so re-running a document overwrites instead of
+    duplicating.
+
+    Only chunks whose content hash is new to the client's collection (for
+    the current embedding model) are sent to the embedding endpoint;
+    unchanged chunks of a revised upload (and repeated chunks within the
+    document) reuse stored vectors, written in batches of the same size.
+    """
+    batch_size = max(1, settings.INGEST_EMBED_BATCH_SIZE)
+    in_flight = asyncio.Semaphore(max(1, settings.INGEST_EMBED_MAX_IN_FLIGHT))
+    report = {"batches": 0, "retries": 0}
+
+    by_hash: dict[str, list[int]] = {}
+    for i, chunk in enumerate(chunks):
+        by_hash.setdefault(chunk.metadata["chunk_hash"], []).append(i)
+    known = await asyncio.to_thread(_existing_embeddings, vectorstore, list(by_hash), embedding_model_name())
+    new_hashes = [h for h in by_hash if h not in known]
+
+    indexed = 0
+
+    async def _store(hashes: list[str], vectors: list) -> None:
+        nonlocal indexed
+        indexes = [i for h in hashes for i in by_hash[h]]
+        vector_of = dict(zip(hashes, vectors))
+        write = asyncio.ensure_future(asyncio.to_thread(
+            vectorstore._collection.upsert,
+            ids=[f"{doc_id}:{i}" for i in indexes],
+            embeddings=[vector_of[chunks[i].metadata["chunk_hash"]] for i in indexes],
+            documents=[chunks[i].page_content for i in indexes],
+            metadatas=[chunks[i].metadata for i in indexes],
+        ))
+        try:
+            await asyncio.shield(write)
+        except asyncio.CancelledError:
+            # The thread can't be interrupted: let its write land before the
+            # job stops, so a discarded job's cleanup sees every chunk
+            await asyncio.gather(write, return_exceptions=True)
+            raise
+        indexed += len(indexes)
+        await progress(chunks_indexed=indexed)
+
+    async def _run_batch(start: int):
+        hashes = new_hashes[start:start + batch_size]
+        texts = [chunks[by_hash[h][0]].page_content for h in hashes]
+        async with in_flight:
+            await yield_to_chat()
+            vectors = await _embed_batch(texts, doc_id, start // batch_size, report)
+        await _store(hashes, vectors)
+        report["batches"] += 1
+
+    started = time.perf_counter()
+    await progress(stage="embedding", chunks_total=len(chunks), chunks_indexed=0)
+    reused = [h for h in by_hash if h in known]
+    for start in range(0, len(reused), batch_size):
+        hashes = reused[start:start + batch_size]
+        await _store(hashes, [known[h] for h in hashes])
+    # TaskGroup: a batch that exhausts its retries cancels the rest
+    async with asyncio.TaskGroup() as group:
+        for start in range(0, len(new_hashes), batch_size):
+            group.create_task(_run_batch(start))
+    elapsed = time.perf_counter() - started
+
+    report["embedded"] = len(new_hashes)
+    report["embeddings_saved"] = len(chunks) - len(new_hashes)
+    report["embed_seconds"] = round(elapsed, 3)
+    report["chunks_per_second"] = round(len(chunks) / elapsed, 2) if elapsed else None
+    dedup_stats["chunks_embedded"] += report["embedded"]
+    dedup_stats["embeddings_saved"] += report["embeddings_saved"]
+    return report
+
+
+def delete_document_chunks(client_id: str, doc_id: str) -> None:
+    """Remove a document's chunks from the client's collection (blocking)."""
+    client_chroma_path = (BASE_CHROMA_PATH / f"client_{client_id}").resolve()
+    if not client_chroma_path.exists():
+        return
+    _open_vectorstore(client_chroma_path)._collection.delete(where={"doc_id": doc_id})
+    invalidate_vector_store(client_id)
+    answer_cache.on_document_deleted(client_id, doc_id)
+
+
+async def ingest_documents(file_path: str, client_id: str, doc_id: str, progress=None):
+    """
+    Ingest PDF into CLIENT-SPECIFIC vector store.
+    Normally run by the ingestion queue (ingest_queue.py), which owns
+    retries and the "failed" status; `progress(**fields)` receives page and
+    chunk counts as they advance.
+    """
+    async with ingest_slots.acquire(client_id):
+        await _ingest(file_path, client_id, doc_id, progress or _no_progress)
+
+
+async def _ingest(file_path: str, client_id: str, doc_id: str, progress):
+    pdf_path = Path(file_path)
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"PDF not found at {pdf_path}")
+
+    # ---------------------------
+    # CLIENT-SPECIFIC PATH
+    # ---------------------------
+    client_chroma_path = (BASE_CHROMA_PATH / f"client_{client_id}").resolve()
+    client_chroma_path.mkdir(parents=True, exist_ok=True)
+
+    # ---------------------------
+    # LOAD + SPLIT PDF (process pool)
+    # ---------------------------
+    parsed = await _parse_pdf(str(pdf_path), progress)
+
+    # ---------------------------
+    # ADD METADATA
+    # ---------------------------
+    chunks = []
+    for content, metadata in parsed["chunks"]:
+        metadata.update({
+            "client_id": client_id,
+            "doc_id": doc_id,
+            "source": pdf_path.name,
+            "chunk_hash": chunk_hash(content),
+            # Vectors are only reused across documents from the same model
+            "embedding_model": embedding_model_name(),
+        })
+        chunks.append(Document(page_content=content, metadata=metadata))
+
+    # ---------------------------
+    # EMBED (batched) + STORE
+    # ---------------------------
+    vectorstore = await asyncio.to_thread(_open_vectorstore, client_chroma_path)
+    embed_report = await _embed_and_store(vectorstore, chunks, doc_id, progress)
+
+    # Cached query-side handles / answers must see the new chunks
+    invalidate_vector_store(client_id)
+    answer_cache.on_document_indexed(client_id, doc_id)
+
+    # ---------------------------
+    # UPDATE DB STATUS
+    # ---------------------------
+    await db.documents.update_one(
+        {"$or": [{"doc_id": doc_id}, {"id": doc_id}]},
+        {
+            "$set": {
+                "client_id": client_id,
+                "doc_id": doc_id,
+                "id": doc_id,
+                "status": "indexed",
+                "page_count": parsed["page_count"],
+                "chunk_count": len(chunks),
+                "chunks_per_second": embed_report["chunks_per_second"],
+                "embeddings_saved": embed_report["embeddings_saved"]
+            }
+        }
+    )
+
+    print(
+        f"[SUCCESS] Document {doc_id} indexed for client {client_id} | "
+        f"{len(chunks)} chunks in {embed_report['batches']} batches, "
+        f"{embed_report['embed_seconds']}s ({embed_report['chunks_per_second']} chunks/s), "
+        f"{embed_report['retries']} retries, "
+        f"{embed_report['embeddings_saved']} embeddings reused"
+    )
@@ -0,0 +1,367 @@
+"""
+Durable ingestion job queue.
+
+/admin/upload enqueues a job in a local SQLite table (INGEST_QUEUE_PATH)
+instead of firing a background task. Worker tasks started in the app
+lifespan claim jobs under a lease and run ingest_documents():
+
+- the lease is renewed while the job runs; a job whose lease expired
+  (the process died mid-index) is claimed again by the next worker, here
+  or in another process sharing the file. Chunk ids are deterministic and
+  stored chunks are found by content hash, so a resumed job does not
+  re-embed what was already indexed,
+- a job whose lease can't be renewed before it expires (queue DB errors,
+  or another worker took it over) is stopped, so it never runs twice;
+  rows are only updated or deleted by the worker holding the lease,
+- discard() (the document was deleted) stops a job running in this
+  process at once; one running elsewhere stops at its next lease renewal.
+  Either way the chunks it already wrote are removed,
+- enqueue() works before start() (the job waits in the file for a worker),
+- a failed job is retried with exponential backoff up to
+  INGEST_MAX_ATTEMPTS, then the document is marked "failed",
+- on shutdown, running jobs are handed back to the queue at once,
+- page and chunk progress is written to db.documents (`progress`),
+- at most INGEST_MAX_CONCURRENT jobs run, and a tenant's jobs are only
+  claimed while it has fewer than INGEST_MAX_CONCURRENT_PER_CLIENT running,
+- workers wait for chat traffic to drain before claiming (yield_to_chat).
+"""
+
+import os
+import time
+import uuid
+import socket
+import asyncio
+import logging
+from collections import Counter
+import aiosqlite
+from app.core.config import settings
+from app.admin.ingest import delete_document_chunks, ingest_documents, yield_to_chat
+from app.db.mongodb import db
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+    doc_id        TEXT PRIMARY KEY,
+    client_id     TEXT NOT NULL,
+    file_path     TEXT NOT NULL,
+    status        TEXT NOT NULL,     -- queued | running | failed
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    available_at  REAL NOT NULL,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    last_error    TEXT,
+    created_at    REAL NOT NULL,
+    updated_at    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ingest_jobs_claim ON ingest_jobs (status, available_at);
+"""
+
+# Atomically lease the oldest runnable job: queued and due, or running under
+# an expired lease (its worker died)
+_CLAIM_SQL = """
+UPDATE ingest_jobs
+SET status = 'running', lease_owner = ?, lease_expires = ?,
+    attempts = attempts + 1, updated_at = ?
+WHERE doc_id = (
+    SELECT doc_id FROM ingest_jobs
+    WHERE ((status = 'queued' AND available_at <= ?)
+           OR (status = 'running' AND lease_expires < ?))
+    {exclude}
+    ORDER BY available_at
+    LIMIT 1
+)
+RETURNING doc_id, client_id, file_path, attempts, lease_expires
+"""
+
+
+class IngestQueue:
+    def __init__(self, path: str, workers: int, per_client: int):
+        self.path = path
+        self.workers = max(1, workers)
+        self.per_client = max(1, per_client)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._conn: aiosqlite.Connection | None = None
+        self._connect_lock = asyncio.Lock()
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+        self._db_lock = asyncio.Lock()  # one statement + commit at a time on the shared connection
+        self._running = Counter()  # client_id -> jobs running in this process
+        self._jobs: dict[str, tuple[str, asyncio.Task]] = {}  # doc_id -> (client_id, ingest task) running here
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+        self.leases_lost = 0
+        self.discarded = 0
+
+    # ---------------------------
+    # Lifecycle
+    # ---------------------------
+    async def _connect(self) -> aiosqlite.Connection:
+        async with self._connect_lock:
+            if self._conn is None:
+                conn = await aiosqlite.connect(self.path)
+                conn.row_factory = aiosqlite.Row
+                await conn.execute("PRAGMA journal_mode=WAL")
+                await conn.executescript(_SCHEMA)
+                await conn.commit()
+                self._conn = conn
+        return self._conn
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        await self._connect()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Ingestion queue started | workers={self.workers} | owner={self.owner}")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def _write(self, sql: str, params: tuple = ()) -> int:
+        """Run one statement and commit; returns the number of rows changed."""
+        conn = await self._connect()
+        async with self._db_lock:
+            cursor = await conn.execute(sql, params)
+            await conn.commit()
+            rowcount = cursor.rowcount
+            await cursor.close()
+        return rowcount
+
+    # ---------------------------
+    # Producer side
+    # ---------------------------
+    async def enqueue(self, doc_id: str, client_id: str, file_path: str) -> None:
+        now = time.time()
+        await self._write(
+            "INSERT OR REPLACE INTO ingest_jobs "
+            "(doc_id, client_id, file_path, status, attempts, available_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, 'queued', 0, ?, ?, ?)",
+            (doc_id, client_id, file_path, now, now, now),
+        )
+        if not self._tasks:
+            logger.warning(f"Ingestion job queued with no workers in this process | doc_id={doc_id}")
+        self._wakeup.set()
+
+    async def discard(self, doc_id: str) -> None:
+        """Drop a document's job (e.g. the document was deleted), stopping it if it runs here."""
+        await self._write("DELETE FROM ingest_jobs WHERE doc_id = ?", (doc_id,))
+        running = self._jobs.get(doc_id)
+        if running is None:
+            return
+        client_id, work = running
+        work.cancel()
+        await asyncio.gather(work, return_exceptions=True)
+        await asyncio.to_thread(delete_document_chunks, client_id, doc_id)
+
+    # ---------------------------
+    # Worker side
+    # ---------------------------
+    async def _claim(self) -> aiosqlite.Row | None:
+        now = time.time()
+        busy = [client_id for client_id, n in self._running.items() if n >= self.per_client]
+        exclude = f"AND client_id NOT IN ({','.join('?' * len(busy))})" if busy else ""
+        async with self._db_lock:
+            cursor = await self._conn.execute(
+                _CLAIM_SQL.format(exclude=exclude),
+                (self.owner, now + settings.INGEST_LEASE_SECONDS, now, now, now, *busy),
+            )
+            job = await cursor.fetchone()
+            await cursor.close()
+            await self._conn.commit()
+        return job
+
+    async def _renew_lease(self, doc_id: str, expires: float) -> None:
+        """Keep a running job's lease alive; returns once it can't be (the job must stop)."""
+        interval = settings.INGEST_LEASE_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            now = time.time()
+            try:
+                renewed = await self._write(
+                    "UPDATE ingest_jobs SET lease_expires = ?, updated_at = ? WHERE doc_id = ? AND lease_owner = ?",
+                    (now + settings.INGEST_LEASE_SECONDS, now, doc_id, self.owner),
+                )
+            except Exception as e:
+                logger.warning(f"Ingestion lease renewal failed | doc_id={doc_id} | {e}")
+                if time.time() + interval >= expires:
+                    logger.error(f"Ingestion lease about to expire, stopping job | doc_id={doc_id}")
+                    return
+                continue
+            if not renewed:
+                logger.error(f"Ingestion lease lost (job taken over or discarded), stopping job | doc_id={doc_id}")
+                return
+            expires = now + settings.INGEST_LEASE_SECONDS
+
+    async def _worker(self) -> None:
+        while True:
+            try:
+                await yield_to_chat()
+                job = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ingestion queue claim failed")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=settings.INGEST_QUEUE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(dict(job))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Bookkeeping failed (queue DB / Mongo); the lease will expire
+                logger.exception(f"Ingestion job bookkeeping failed | doc_id={job['doc_id']}")
+
+    async def _ingest(self, job: dict) -> None:
+        doc_id = job["doc_id"]
+        await _report_progress(doc_id, stage="started", attempt=job["attempts"], error=None)
+        await ingest_documents(job["file_path"], job["client_id"], doc_id, progress=lambda **f: _report_progress(doc_id, **f))
+
+    async def _run(self, job: dict) -> None:
+        doc_id, client_id = job["doc_id"], job["client_id"]
+        self._running[client_id] += 1
+        work = asyncio.create_task(self._ingest(job))
+        self._jobs[doc_id] = (client_id, work)
+        lease = asyncio.create_task(self._renew_lease(doc_id, job["lease_expires"]))
+        try:
+            await asyncio.wait({work, lease}, return_when=asyncio.FIRST_COMPLETED)
+            if work.cancelled():
+                # discard() stopped it and cleans up after it
+                self.discarded += 1
+                print(f"[DISCARDED] Document {doc_id} | attempt {job['attempts']} stopped")
+                return
+            if not work.done():
+                # Lease gone: another worker may claim the job, so stop it
+                # here and leave its row to the new owner
+                work.cancel()
+                await asyncio.gather(work, return_exceptions=True)
+                self.leases_lost += 1
+                print(f"[LEASE LOST] Document {doc_id} | attempt {job['attempts']} stopped")
+                if not await self._exists(doc_id):
+                    # Discarded from another process: drop what this attempt wrote
+                    self.discarded += 1
+                    await asyncio.to_thread(delete_document_chunks, client_id, doc_id)
+                return
+            work.result()
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back without counting the attempt
+            work.cancel()
+            await asyncio.gather(work, return_exceptions=True)
+            await asyncio.shield(self._release(doc_id))
+            raise
+        except Exception as e:
+            await self._failed(job, e)
+        else:
+            # No row left for this owner: discarded or taken over meanwhile
+            if await self._write("DELETE FROM ingest_jobs WHERE doc_id = ? AND lease_owner = ?", (doc_id, self.owner)):
+                await _report_progress(doc_id, stage="indexed")
+                self.completed += 1
+        finally:
+            self._jobs.pop(doc_id, None)
+            lease.cancel()
+            self._running[client_id] -= 1
+            if not self._running[client_id]:
+                del self._running[client_id]
+
+    async def _release(self, doc_id: str) -> None:
+        await self._write(
+            "UPDATE ingest_jobs SET status = 'queued', attempts = attempts - 1, lease_owner = NULL, "
+            "lease_expires = NULL, available_at = ?, updated_at = ? WHERE doc_id = ? AND lease_owner = ?",
+            (time.time(), time.time(), doc_id, self.owner),
+        )
+
+    async def _failed(self, job: dict, error: Exception) -> None:
+        doc_id = job["doc_id"]
+        message = f"{type(error).__name__}: {error}"
+        final = job["attempts"] >= settings.INGEST_MAX_ATTEMPTS or isinstance(error, FileNotFoundError)
+        now = time.time()
+        if final:
+            updated = await self._write(
+                "UPDATE ingest_jobs SET status = 'failed', last_error = ?, lease_owner = NULL, "
+                "updated_at = ? WHERE doc_id = ? AND lease_owner = ?",
+                (message, now, doc_id, self.owner),
+            )
+            if not updated:
+                return  # discarded or taken over; not ours to mark failed
+            self.failed += 1
+            await db.documents.update_one(
+                {"$or": [{"doc_id": doc_id}, {"id": doc_id}]},
+                {"$set": {
+                    "status": "failed", "client_id": job["client_id"], "doc_id": doc_id, "id": doc_id,
+                    "progress.stage": "failed", "progress.error": message,
+                }}
+            )
+            print(f"[FAILED] Document {doc_id} | attempt {job['attempts']} | {message}")
+        else:
+            delay = settings.INGEST_RETRY_BACKOFF_SECONDS * 2 ** (job["attempts"] - 1)
+            updated = await self._write(
+                "UPDATE ingest_jobs SET status = 'queued', last_error = ?, lease_owner = NULL, "
+                "lease_expires = NULL, available_at = ?, updated_at = ? WHERE doc_id = ? AND lease_owner = ?",
+                (message, now + delay, now, doc_id, self.owner),
+            )
+            if not updated:
+                return
+            self.retried += 1
+            await _report_progress(doc_id, stage="retrying", error=message)
+            print(f"[RETRY] Document {doc_id} | attempt {job['attempts']} failed, retrying in {delay:.1f}s | {message}")
+
+    # ---------------------------
+    # Introspection
+    # ---------------------------
+    async def _exists(self, doc_id: str) -> bool:
+        conn = await self._connect()
+        async with self._db_lock:
+            cursor = await conn.execute("SELECT 1 FROM ingest_jobs WHERE doc_id = ?", (doc_id,))
+            row = await cursor.fetchone()
+            await cursor.close()
+        return row is not None
+
+    async def counts(self) -> dict:
+        if self._conn is None:
+            return {}
+        async with self._db_lock:
+            cursor = await self._conn.execute("SELECT status, COUNT(*) FROM ingest_jobs GROUP BY status")
+            rows = await cursor.fetchall()
+            await cursor.close()
+        return {status: count for status, count in rows}
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._tasks),
+            "running": sum(self._running.values()),
+            "completed": self.completed,
+            "retried": self.retried,
+            "failed": self.failed,
+            "leases_lost": self.leases_lost,
+            "discarded": self.discarded,
+        }
+
+
+async def _report_progress(doc_id: str, **fields) -> None:
+    try:
+        await db.documents.update_one(
+            {"$or": [{"doc_id": doc_id}, {"id": doc_id}]},
+            {"$set": {f"progress.{key}": value for key, value in fields.items()}},
+        )
+    except Exception as e:
+        # Progress is best effort; never fail an ingestion over it
+        logger.warning(f"Progress update failed | doc_id={doc_id} | {e}")
+
+
+ingest_queue = IngestQueue(
+    path=settings.INGEST_QUEUE_PATH,
+    workers=settings.INGEST_MAX_CONCURRENT,
+    per_client=settings.INGEST_MAX_CONCURRENT_PER_CLIENT,
+)
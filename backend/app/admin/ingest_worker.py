@@ -0,0 +1,70 @@
+"""
+CPU-bound ingestion steps, executed in the ingestion process pool (see
+ingest.py). Kept free of app imports so spawned workers start quickly and
+never touch settings, DB clients or models.
+"""
+
+from io import BytesIO
+from pypdf import PdfReader, PdfWriter
+from langchain_core.documents.base import Blob
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.document_loaders.parsers.pdf import PyPDFParser
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+def count_pages(file_path: str) -> int:
+    return len(PdfReader(file_path).pages)
+
+
+def _load_page_range(file_path: str, first_page: int, last_page: int) -> list:
+    """
+    Same Documents PyPDFLoader would produce for pages [first_page, last_page),
+    without extracting text from the other pages.
+    """
+    reader = PdfReader(file_path)
+    writer = PdfWriter()
+    for page in reader.pages[first_page:last_page]:
+        writer.add_page(page)
+    if reader.metadata:
+        writer.add_metadata(dict(reader.metadata))
+    buffer = BytesIO()
+    writer.write(buffer)
+
+    pages = list(PyPDFParser().lazy_parse(Blob.from_data(buffer.getvalue(), path=file_path)))
+    labels = reader.page_labels
+    for offset, page in enumerate(pages):
+        number = first_page + offset
+        page.metadata.update({
+            "total_pages": len(reader.pages),
+            "page": number,
+            "page_label": labels[number],
+        })
+    return pages
+
+
+def parse_and_split(
+    file_path: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    first_page: int = 0,
+    last_page: int | None = None,
+) -> dict:
+    """
+    Load a PDF (or a page range of it) and split it into chunks.
+    Pages are split independently, so splitting by range gives the same
+    chunks as splitting the whole file.
+    Returns plain data so it pickles cheaply back to the server process.
+    """
+    if first_page == 0 and last_page is None:
+        pages = PyPDFLoader(file_path).load()
+    else:
+        pages = _load_page_range(file_path, first_page, last_page)
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+    chunks = splitter.split_documents(pages)
+    return {
+        "page_count": len(pages),
+        "chunks": [(chunk.page_content, chunk.metadata) for chunk in chunks],
+    }
@@ -1,14 +1,20 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Response
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Response, Request
 from app.db.mongodb import db
 from app.auth.security import get_current_user, require_admin
-from app.admin.ingest import ingest_documents
+from app.admin.ingest import record_duplicate_upload
+from app.admin.ingest_queue import ingest_queue
 from app.auth.user_services import hash_password, verify_password, create_access_token
 from app.auth.user_schemas import UserCreate, UserResponse, LoginRequest
 from app.admin.document_schemas import DocumentUploadResponse
 from langchain_chroma import Chroma
 from app.core.llm import get_embedding_model
+from app.chatbot.rag.vectorstore import invalidate_vector_store
+from app.chatbot.rag.answer_cache import answer_cache
+from app.core.config import settings
+from app.clients.client_service import tenant_registry
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timezone
-import os, uuid, asyncio, logging
+import os, uuid, asyncio, logging, hashlib, tempfile
 from pathlib import Path
 
 router = APIRouter()
@@ -130,6 +136,7 @@ async def register(user_data: UserCreate):
                     "is_active": True,
                     "created_at": datetime.now(timezone.utc),
                 })
+                tenant_registry.invalidate(DEFAULT_CLIENT_ID)
                 logger.info(f"Created default client: {DEFAULT_CLIENT_ID}")
 
         # Create user document
@@ -212,11 +219,85 @@ UPLOAD_DIR = Path("app/storage/uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def _too_large() -> HTTPException:
+    limit_mb = round(settings.UPLOAD_MAX_BYTES / 1024 / 1024, 2)
+    return HTTPException(status_code=413, detail=f"File too large (max {limit_mb} MB)")
+
+
+def _write_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+async def _stream_upload(file: UploadFile) -> tuple[Path, int, str]:
+    """
+    Copy the upload to a temp file in UPLOAD_DIR (same filesystem, so the
+    final rename is atomic), UPLOAD_CHUNK_BYTES at a time, hashing as it goes.
+    Returns (temp path, size, sha256). Raises 413 as soon as the size limit
+    is crossed.
+    """
+    fd, tmp_name = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".upload-", suffix=".part")
+    tmp_path = Path(tmp_name)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(settings.UPLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > settings.UPLOAD_MAX_BYTES:
+                    raise _too_large()
+                await asyncio.to_thread(_write_chunk, out, digest, chunk)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return tmp_path, size, digest.hexdigest()
+
+
+# A client's documents that still count for duplicate detection
+_ACTIVE_STATUSES = ["processing", "indexed"]
+
+
+async def ensure_document_indexes() -> None:
+    """
+    At most one active document per (client_id, content_hash): concurrent
+    uploads of the same file can't both pass the duplicate check. Failed
+    documents (and ones from before content hashing) are outside the index.
+    $in in a partial filter needs MongoDB 6.0+.
+    """
+    await db.documents.create_index(
+        [("client_id", 1), ("content_hash", 1)],
+        name="client_content_hash_active",
+        unique=True,
+        partialFilterExpression={"content_hash": {"$exists": True}, "status": {"$in": _ACTIVE_STATUSES}},
+    )
+
+
+def _duplicate_response(existing: dict, file: UploadFile, size: int, content_hash: str) -> dict:
+    existing_id = existing.get("doc_id") or existing.get("id")
+    record_duplicate_upload(existing.get("chunk_count"))
+    logger.info(
+        f"Duplicate upload skipped | client={existing.get('client_id')} | "
+        f"doc_id={existing_id} | sha256={content_hash}"
+    )
+    upload_dt = existing.get("upload_date")
+    return {
+        "doc_id": existing_id,
+        "name": existing.get("name") or file.filename,
+        "size": f"{round((existing.get('size') or size) / 1024 / 1024, 2)} MB",
+        "upload_date": upload_dt.isoformat() if hasattr(upload_dt, "isoformat") else upload_dt,
+        "message": "Identical document already uploaded",
+        "success": True,
+        "duplicate": True,
+    }
+
+
 @router.post("/upload",dependencies=[Depends(require_admin)],response_model=DocumentUploadResponse)
 async def ingest_data(
+    request: Request,
     file: UploadFile = File(...),
     current_admin=Depends(require_admin),
 ):
+    tmp_path = None
     try:
         client_id = current_admin["client_id"]
 
@@ -230,16 +311,32 @@ async def ingest_data(
         if file.content_type not in allowed_types:
             raise HTTPException(status_code=400, detail="Only PDF files allowed")
 
-        # ---- FILE SAVE ----
+        # Reject obviously oversized requests before touching the file
+        # (multipart overhead allowance of 64 KB)
+        declared = request.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > settings.UPLOAD_MAX_BYTES + 64 * 1024:
+            raise _too_large()
+
+        # ---- FILE SAVE (streamed to a temp file) ----
         doc_id = str(uuid.uuid4())
         safe_name = file.filename.replace(" ", "_")
         file_path = UPLOAD_DIR / f"{client_id}_{doc_id}_{safe_name}"
 
-        contents = await file.read()
-        size = len(contents)
+        tmp_path, size, content_hash = await _stream_upload(file)
+
+        # ---- DUPLICATE CHECK ----
+        # A byte-identical file this client already has (or is indexing)
+        # is not stored or embedded again
+        duplicate_query = {
+            "client_id": client_id,
+            "content_hash": content_hash,
+            "status": {"$in": _ACTIVE_STATUSES},
+        }
+        existing = await db.documents.find_one(duplicate_query)
+        if existing:
+            return _duplicate_response(existing, file, size, content_hash)
 
-        with open(file_path, "wb") as f:
-            f.write(contents)
+        os.replace(tmp_path, file_path)
 
         # ---- DB RECORD ----
         document = {
@@ -250,23 +347,30 @@ async def ingest_data(
             "name": file.filename,
             "filename": file.filename,
             "size": size,
+            "content_hash": content_hash,
             "status": "processing",
             "upload_date": datetime.now(timezone.utc),
         }
 
-        await db.documents.insert_one(document)
-
-        # ---- BACKGROUND INGESTION ----
-        asyncio.create_task(
-            ingest_documents(
-                file_path=str(file_path),
-                client_id=client_id,
-                doc_id=doc_id,
-            )
+        try:
+            await db.documents.insert_one(document)
+        except DuplicateKeyError:
+            # Lost a race with a concurrent upload of the same file (unique index)
+            file_path.unlink(missing_ok=True)
+            existing = await db.documents.find_one(duplicate_query)
+            if not existing:
+                raise
+            return _duplicate_response(existing, file, size, content_hash)
+
+        # ---- BACKGROUND INGESTION (durable queue) ----
+        await ingest_queue.enqueue(
+            doc_id=doc_id,
+            client_id=client_id,
+            file_path=str(file_path),
         )
 
         logger.info(
-            f"Ingestion started | client={client_id} | doc_id={doc_id}"
+            f"Ingestion queued | client={client_id} | doc_id={doc_id}"
         )
 
         return {
@@ -274,7 +378,7 @@ async def ingest_data(
             "name": file.filename,
             "size": f"{round(size / 1024 / 1024, 2)} MB",
             "upload_date": document["upload_date"].isoformat(),
-            "message": "Document uploaded and indexing started",
+            "message": "Document uploaded and queued for indexing",
             "success": True,
         }
 
@@ -286,6 +390,10 @@ async def ingest_data(
             status_code=500,
             detail="Document upload failed. Please try again."
         )
+    finally:
+        # No-op once the file has been renamed into place
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
 
 
 @router.get('/documents', dependencies=[Depends(require_admin)])
@@ -330,6 +438,22 @@ async def list_documents(admin=Depends(require_admin)):
 
 
 
+@router.get('/documents/{doc_id}/status', dependencies=[Depends(require_admin)])
+async def document_status(doc_id: str, admin=Depends(require_admin)):
+    """Indexing status and page/chunk progress, for polling while a document is processed."""
+    doc = await db.documents.find_one(
+        {"$or": [{"doc_id": doc_id}, {"id": doc_id}], "client_id": admin["client_id"]}
+    )
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {
+        "doc_id": doc.get("doc_id") or doc.get("id"),
+        "status": doc.get("status"),
+        "progress": doc.get("progress", {}),
+        "chunk_count": doc.get("chunk_count"),
+    }
+
+
 @router.delete("/delete/{doc_id}", dependencies=[Depends(require_admin)])
 async def delete_document(doc_id: str, admin=Depends(require_admin)):
     """
@@ -366,6 +490,7 @@ async def delete_document(doc_id: str, admin=Depends(require_admin)):
         raise HTTPException(status_code=404, detail="Document not found")
 
     actual_doc_id = res.get("doc_id") or res.get("id") or doc_id
+    await ingest_queue.discard(actual_doc_id)
 
     # -------------------------
     # 2. Delete embeddings
@@ -384,6 +509,8 @@ async def delete_document(doc_id: str, admin=Depends(require_admin)):
             )
 
             chroma.delete(where={"doc_id": actual_doc_id})
+            invalidate_vector_store(client_id)
+            answer_cache.on_document_deleted(client_id, actual_doc_id)
             logger.info(
                 f"Deleted embeddings | client={client_id} | doc_id={actual_doc_id}"
             )
@@ -1,14 +1,66 @@
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 import uuid
+import json
+import time
+import asyncio
 import logging
 from app.chatbot.chat_schema import ChatRequest, ChatResponse
 from app.chatbot.support_agent import get_support_agent
+from app.chatbot.rag.pipeline import ANSWER_STREAM_TAG
 from app.tickets.ticket_service import create_ticket
 from app.clients.client_service import validate_client
+from app.core.telemetry import span
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+FALLBACK_ANSWER = "Sorry, I couldn’t process your request."
+
+
+async def _create_ticket_if_escalated(result: dict, thread_id: str) -> str | None:
+    ticket_id = None
+
+    # ✅ Ticket creation ONLY here
+    # CRITICAL:
+    # - Only create a ticket if escalation is confirmed
+    # - Identity (name + email) has been collected
+    # - We have a meaningful user issue (ticket summary or fallback query)
+    # This prevents duplicate or low-quality tickets.
+    if result.get("escalated") and result.get("ticket_user_query"):
+        user_email = result.get("user_email")
+        user_name = result.get("user_name")
+
+        if user_email:
+            # Prefer an LLM-generated summary of the user's issue if available
+            ticket_user_query = (
+                result.get("ticket_summary") or result.get("ticket_user_query")
+            )
+
+            # Use the RAG context (summary, or the raw answer if not summarized yet), otherwise use answer
+            bot_answer = (
+                result.get("context_summary")
+                or result.get("context_source")
+                or result.get("answer")
+            )
+
+            with span("ticket", "create", thread_id=thread_id, client_id=result.get("client_id")):
+                ticket_id = await create_ticket(
+                    thread_id=thread_id,
+                    user_query=ticket_user_query,
+                    bot_answer=bot_answer,
+                    user_name=user_name,
+                    user_email=user_email,
+                )
+
+        logger.info(
+            "Ticket created",
+            extra={"thread_id": thread_id, "ticket_id": ticket_id}
+        )
+
+    return ticket_id
+
+
 @router.post("/", response_model=ChatResponse)
 async def chat_request(req: ChatRequest, request: Request):
     origin = request.headers.get("origin")
@@ -26,42 +78,10 @@ async def chat_request(req: ChatRequest, request: Request):
             config=CONFIG
         )
 
-        ticket_id = None
-
-        # ✅ Ticket creation ONLY here
-        # CRITICAL:
-        # - Only create a ticket if escalation is confirmed
-        # - Identity (name + email) has been collected
-        # - We have a meaningful user issue (ticket summary or fallback query)
-        # This prevents duplicate or low-quality tickets.
-        if result.get("escalated") and result.get("ticket_user_query"):
-            user_email = result.get("user_email")
-            user_name = result.get("user_name")
-
-            if user_email:
-                # Prefer an LLM-generated summary of the user's issue if available
-                ticket_user_query = (
-                    result.get("ticket_summary") or result.get("ticket_user_query")
-                )
-
-                # Use context_summary if available (from RAG node), otherwise use answer
-                bot_answer = result.get("context_summary") or result.get("answer")
-
-                ticket_id = await create_ticket(
-                    thread_id=thread_id,
-                    user_query=ticket_user_query,
-                    bot_answer=bot_answer,
-                    user_name=user_name,
-                    user_email=user_email,
-                )
-
-            logger.info(
-                "Ticket created",
-                extra={"thread_id": thread_id, "ticket_id": ticket_id}
-            )
+        ticket_id = await _create_ticket_if_escalated(result, thread_id)
 
         return {
-            "answer": result.get("answer", "Sorry, I couldn’t process your request."),
+            "answer": result.get("answer", FALLBACK_ANSWER),
             "ticket_id": ticket_id,
             "escalated": result.get("escalated", False),
             "thread_id": thread_id,
@@ -72,4 +92,101 @@ async def chat_request(req: ChatRequest, request: Request):
         raise HTTPException(
             status_code=500,
             detail="Internal server error while processing the chat"
-        )
\ No newline at end of file
+        )
+
+
+# =========================
+# STREAMING (SSE)
+# =========================
+# Turns keep running if the client disconnects, so the checkpoint and any
+# ticket are still written exactly once.
+_stream_tasks: set[asyncio.Task] = set()
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def _run_streamed_turn(agent, req: ChatRequest, thread_id: str, queue: asyncio.Queue):
+    started = time.perf_counter()
+    ttft = None
+    result: dict = {}
+    config = {"configurable": {"thread_id": thread_id}}
+
+    try:
+        async for mode, payload in agent.astream(
+            {"query": req.query, "client_id": req.client_id},
+            config=config,
+            stream_mode=["updates", "messages", "values"],
+        ):
+            if mode == "messages":
+                chunk, metadata = payload
+                # Only answer-producing model calls; skip classifier / summaries
+                if ANSWER_STREAM_TAG not in metadata.get("tags", []) or not chunk.content:
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                await queue.put(("token", {"node": metadata.get("langgraph_node"), "text": chunk.content}))
+            elif mode == "updates":
+                for node in payload:
+                    await queue.put(("node", {"node": node}))
+            elif mode == "values":
+                result = payload
+
+        ticket_id = await _create_ticket_if_escalated(result, thread_id)
+        total = time.perf_counter() - started
+
+        logger.info(
+            f"Chat stream finished | thread={thread_id} | "
+            f"ttft_ms={round(ttft * 1000, 1) if ttft is not None else None} | total_ms={round(total * 1000, 1)}"
+        )
+        await queue.put((
+            "final",
+            {
+                "answer": result.get("answer", FALLBACK_ANSWER),
+                "thread_id": thread_id,
+                "escalated": result.get("escalated", False),
+                "ticket_id": ticket_id,
+                "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+                "total_ms": round(total * 1000, 1),
+            },
+        ))
+
+    except Exception:
+        logger.exception("Chat stream processing failed")
+        await queue.put((
+            "error",
+            {"detail": "Internal server error while processing the chat", "thread_id": thread_id},
+        ))
+
+
+@router.post("/stream")
+async def chat_stream(req: ChatRequest, request: Request):
+    """
+    Same turn as POST /chat/, streamed as Server-Sent Events:
+    - `node`:  a graph node finished
+    - `token`: answer text as the model produces it
+    - `final`: answer, thread_id, escalated, ticket_id (+ ttft_ms / total_ms)
+    - `error`: the turn failed
+    """
+    await validate_client(req.client_id, request.headers.get("origin"))
+    thread_id = req.thread_id or str(uuid.uuid4())
+    agent = await get_support_agent()
+
+    queue: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(_run_streamed_turn(agent, req, thread_id, queue))
+    _stream_tasks.add(task)
+    task.add_done_callback(_stream_tasks.discard)
+
+    async def events():
+        while True:
+            event, data = await queue.get()
+            yield _sse(event, data)
+            if event in ("final", "error"):
+                break
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,117 @@
+"""
+Embedding-prototype intent classifier (middle tier between rules and the LLM).
+
+Each intent is represented by the normalized mean embedding of its labelled
+examples. A message is scored against all centroids with one matmul; the
+top intent is accepted only when it beats the runner-up by `margin`.
+Intents listed in `defer` are never returned on their own (the next tier
+decides); eval_intent.py --centroids measures the tier on both example sets.
+"""
+
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.chatbot.intent_examples import INTENT_EXAMPLES
+
+logger = logging.getLogger(__name__)
+
+
+def _examples_fingerprint(model_name: str) -> str:
+    raw = model_name + "\n" + "\n".join(f"{label}\t{text}" for text, label in INTENT_EXAMPLES)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CentroidIntentClassifier:
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        margin: float,
+        min_score: float,
+        cache_path: str | None = None,
+        defer: tuple[str, ...] = (),
+    ):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.margin = margin
+        self.min_score = min_score
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.defer = frozenset(defer)
+        self.labels: list[str] = list(dict.fromkeys(label for _, label in INTENT_EXAMPLES))
+        self.centroids: np.ndarray | None = None  # (n_intents, dim), rows L2-normalized
+        self._lock = asyncio.Lock()
+
+    async def ensure_ready(self) -> None:
+        if self.centroids is not None:
+            return
+        async with self._lock:
+            if self.centroids is not None:
+                return
+            fingerprint = _examples_fingerprint(self.model_name)
+            centroids = self._load(fingerprint)
+            if centroids is None:
+                centroids = await self._compute()
+                self._save(fingerprint, centroids)
+            self.centroids = centroids
+            logger.info(
+                f"Intent centroids ready | intents={len(self.labels)} | dim={centroids.shape[1]}"
+            )
+
+    async def _compute(self) -> np.ndarray:
+        texts = [text for text, _ in INTENT_EXAMPLES]
+        vectors = np.asarray(await self.embeddings.aembed_documents(texts), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        labels = np.array([label for _, label in INTENT_EXAMPLES])
+        centroids = np.vstack([vectors[labels == label].mean(axis=0) for label in self.labels])
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+        return centroids
+
+    def _load(self, fingerprint: str) -> np.ndarray | None:
+        if not self.cache_path or not self.cache_path.exists():
+            return None
+        try:
+            with np.load(self.cache_path) as data:
+                if str(data["fingerprint"]) != fingerprint or list(data["labels"]) != self.labels:
+                    return None
+                return data["centroids"].astype(np.float32)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable intent centroid cache: {e}")
+            return None
+
+    def _save(self, fingerprint: str, centroids: np.ndarray) -> None:
+        if not self.cache_path:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            np.savez(
+                self.cache_path,
+                fingerprint=fingerprint,
+                labels=np.array(self.labels),
+                centroids=centroids,
+            )
+        except Exception as e:
+            logger.warning(f"Could not save intent centroid cache: {e}")
+
+    def scores(self, query_vector) -> np.ndarray:
+        """Cosine similarity of the query against every centroid (one matmul)."""
+        q = np.asarray(query_vector, dtype=np.float32)
+        return self.centroids @ (q / (np.linalg.norm(q) or 1.0))
+
+    async def classify(self, query: str) -> tuple[str | None, float]:
+        """
+        Return (intent, margin), or (None, margin) when the top two intents are
+        too close, the best match is too weak, or the intent is deferred.
+        """
+        await self.ensure_ready()
+        scores = self.scores(await self.embeddings.aembed_query(query))
+        second, best = np.argsort(scores)[-2:]
+        margin = float(scores[best] - scores[second])
+        if scores[best] < self.min_score or margin < self.margin:
+            return None, margin
+        if self.labels[int(best)] in self.defer:
+            logger.info(f"Centroid intent deferred to the next tier | intent={self.labels[int(best)]}")
+            return None, margin
+        return self.labels[int(best)], margin
@@ -0,0 +1,124 @@
+"""
+Labelled example messages for the six support intents.
+
+INTENT_EXAMPLES is the reference set: the deterministic intent rules were
+written against it and the embedding centroids are built from it.
+HELD_OUT_EXAMPLES is never used to tune either; eval_intent.py reports it
+separately, so rule changes can't just fit the reference set.
+"""
+
+INTENT_EXAMPLES: list[tuple[str, str]] = [
+    # greeting (hello, hi, thanks, ok, bye)
+    ("hi", "greeting"),
+    ("Hello!", "greeting"),
+    ("hey there", "greeting"),
+    ("good morning", "greeting"),
+    ("Hi team, good evening", "greeting"),
+    ("thanks", "greeting"),
+    ("Thank you so much!", "greeting"),
+    ("thx", "greeting"),
+    ("ok thanks", "greeting"),
+    ("ok", "greeting"),
+    ("bye", "greeting"),
+    ("Goodbye, have a nice day", "greeting"),
+    ("see you", "greeting"),
+    ("thanks a lot, bye", "greeting"),
+    ("hello, anyone there?", "greeting"),
+
+    # small_talk (hmm, okay, got it)
+    ("hmm", "small_talk"),
+    ("okay", "small_talk"),
+    ("got it", "small_talk"),
+    ("alright", "small_talk"),
+    ("cool", "small_talk"),
+    ("I see", "small_talk"),
+    ("makes sense", "small_talk"),
+    ("sure", "small_talk"),
+    ("nice", "small_talk"),
+    ("okay got it", "small_talk"),
+    ("lol", "small_talk"),
+    ("how are you?", "small_talk"),
+    ("great, that helps", "small_talk"),
+
+    # faq (company policy / product / service)
+    ("What is your refund policy?", "faq"),
+    ("How long does shipping take?", "faq"),
+    ("Do you ship internationally?", "faq"),
+    ("How can I reset my password?", "faq"),
+    ("What payment methods do you accept?", "faq"),
+    ("Can I cancel my subscription anytime?", "faq"),
+    ("What are your support hours?", "faq"),
+    ("How do I return a damaged item?", "faq"),
+    ("Is there a warranty on your products?", "faq"),
+    ("hi, what is your refund policy?", "faq"),
+    ("How many days do I have to return an order?", "faq"),
+    ("Do you offer discounts for students?", "faq"),
+
+    # followup (related to previous answer)
+    ("what about international orders?", "followup"),
+    ("and how long does that take?", "followup"),
+    ("does that apply to sale items too?", "followup"),
+    ("can you explain that in more detail?", "followup"),
+    ("what if it's been 20 days?", "followup"),
+    ("is that the same for digital products?", "followup"),
+    ("and after that?", "followup"),
+    ("what happens if I miss that deadline?", "followup"),
+
+    # escalation_request (contact human, raise ticket)
+    ("I want to talk to a human", "escalation_request"),
+    ("Can I speak to a real person?", "escalation_request"),
+    ("connect me to an agent please", "escalation_request"),
+    ("please raise a ticket", "escalation_request"),
+    ("I need human support", "escalation_request"),
+    ("Let me talk to customer care", "escalation_request"),
+    ("create a support ticket for me", "escalation_request"),
+    ("This is useless, get me a representative", "escalation_request"),
+    ("I want to file a complaint with your support team", "escalation_request"),
+    ("escalate this", "escalation_request"),
+
+    # faq that mentions a human / agent (must not escalate)
+    ("How do I connect my account to your support team?", "faq"),
+    ("Is there a fee to talk to a representative?", "faq"),
+    ("What are the hours to speak with an agent?", "faq"),
+    ("How do I open a support ticket?", "faq"),
+    ("Human support hours?", "faq"),
+    ("Can I speak with an agent in Spanish?", "faq"),
+    ("Your human support team was great, thanks", "greeting"),
+
+    # out_of_scope (weather, celebrities, unrelated)
+    ("What's the weather in Paris today?", "out_of_scope"),
+    ("Who won the football match yesterday?", "out_of_scope"),
+    ("Tell me a joke about cats", "out_of_scope"),
+    ("Who is Taylor Swift dating?", "out_of_scope"),
+    ("Write me a poem about the ocean", "out_of_scope"),
+    ("What's the capital of Australia?", "out_of_scope"),
+    ("Can you help me with my math homework?", "out_of_scope"),
+    ("What is the price of bitcoin?", "out_of_scope"),
+]
+
+
+HELD_OUT_EXAMPLES: list[tuple[str, str]] = [
+    ("good afternoon", "greeting"),
+    ("thank you again, take care", "greeting"),
+    ("cheers", "greeting"),
+    ("noted", "small_talk"),
+    ("awesome, understood", "small_talk"),
+    ("Where is my order confirmation email?", "faq"),
+    ("Can I change my delivery address after ordering?", "faq"),
+    ("How long until a refund reaches my card?", "faq"),
+    ("Can I chat with an agent on weekends or only weekdays?", "faq"),
+    ("Do your support agents speak Spanish?", "faq"),
+    ("Why does it take so long to speak to a human on the phone?", "faq"),
+    ("How can I transfer my subscription to another person?", "faq"),
+    ("Does the premium plan include a dedicated account representative?", "faq"),
+    ("What do I need before I talk to customer service about a return?", "faq"),
+    ("is that also true for gift cards?", "followup"),
+    ("and what if I lost the receipt?", "followup"),
+    ("I'd like to speak with someone from customer service", "escalation_request"),
+    ("Could I talk to a person about my order, please?", "escalation_request"),
+    ("Please transfer me to a live agent", "escalation_request"),
+    ("hello, can you put me through to a representative", "escalation_request"),
+    ("I need to open a ticket for a missing package", "escalation_request"),
+    ("Recommend a good movie for tonight", "out_of_scope"),
+    ("How tall is Mount Everest?", "out_of_scope"),
+]
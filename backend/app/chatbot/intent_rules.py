@@ -0,0 +1,115 @@
+"""
+Deterministic first tier of intent classification.
+
+Resolves short social messages (greetings, thanks, acknowledgements) and
+explicit requests for a human without calling the LLM. Anything that is not
+an unambiguous match returns None and falls through to the next tier.
+"""
+
+import re
+
+# Social messages longer than this are never resolved by rules
+MAX_SOCIAL_WORDS = 6
+
+_GREETING_PHRASES = [
+    r"hi+", r"hello+", r"hey+", r"hiya", r"howdy", r"greetings",
+    r"good (?:morning|afternoon|evening|day|night)",
+    r"thanks?(?: (?:a lot|so much|very much|again))?", r"thank you(?: (?:so much|very much|again))?",
+    r"thx", r"ty", r"cheers", r"much appreciated",
+    r"ok", r"bye+", r"goodbye", r"see (?:you|ya)(?: later)?", r"take care",
+    r"have a (?:nice|good|great) day",
+    r"there", r"team", r"all", r"everyone", r"anyone there",
+]
+
+_SMALL_TALK_PHRASES = [
+    r"hm+", r"okay", r"okk+", r"kk?", r"got it", r"alright", r"all right", r"cool",
+    r"i see", r"makes sense", r"sure", r"nice", r"great", r"awesome", r"perfect",
+    r"lol", r"haha+", r"fine", r"understood", r"noted", r"that helps",
+    r"how are you(?: doing)?", r"how's it going",
+]
+
+
+def _phrase_sequence(phrases: list[str]) -> re.Pattern:
+    alternation = "|".join(phrases)
+    return re.compile(rf"^(?:(?:{alternation})(?:\s+|$))+$")
+
+
+_GREETING_RE = _phrase_sequence(_GREETING_PHRASES)
+_SMALL_TALK_RE = _phrase_sequence(_SMALL_TALK_PHRASES)
+_SOCIAL_RE = _phrase_sequence(_GREETING_PHRASES + _SMALL_TALK_PHRASES)
+
+# Requests for a human only count as the start of a clause, optionally after a
+# greeting or "I want to / can I / let me / please": "connect me to an agent",
+# not "how do I connect my account to your support team"
+_REQUEST_LEAD = (
+    r"(?:(?:hi|hello|hey|ok|okay|please|pls|just|"
+    r"(?:i|we) (?:want|wanna|need|would like)(?: to)?|(?:i|we)'?d like(?: to)?|"
+    r"(?:can|could|may) (?:i|we|you|someone)|let me|let us)\s+)*"
+)
+# ...and end it, give or take "please" / "now" / "about <topic>": "speak with
+# an agent in Spanish" or "human support hours" are questions, not requests
+_REQUEST_TAIL = r"(?:\s+(?:please|pls|now|right now|asap|immediately|instead|about\b.*))?$"
+_HUMAN_RE = re.compile(
+    rf"^{_REQUEST_LEAD}"
+    r"(?:(?:talk|speak|chat) (?:to|with)|(?:connect|transfer|put) (?:me|us)(?: through| over)?(?: to| with)?)"
+    r"(?:\s+\w+){0,3}?\s+"
+    r"(?:human|person|agent|representative|rep|someone|somebody|staff|"
+    r"customer (?:care|service|support)|support (?:team|staff|agent))"
+    rf"{_REQUEST_TAIL}"
+)
+_TICKET_RE = re.compile(
+    rf"^{_REQUEST_LEAD}(?:raise|create|open|file|log|submit)\b(?:\s+\w+){0,3}?\s+(?:support\s+)?ticket\b"
+)
+_EXPLICIT_ESCALATION_RE = re.compile(
+    rf"^{_REQUEST_LEAD}"
+    r"(?:human (?:support|agent|help)|get me (?:a|an) (?:human|agent|representative)|"
+    r"escalate(?: this| it| my issue)?)"
+    rf"{_REQUEST_TAIL}"
+)
+_NEGATION_RE = re.compile(r"\b(?:don'?t|do not|no need|never|not)\b")
+# Questions about the service ("how do I open a ticket", "is there a fee to
+# talk to an agent") are FAQs, whatever they mention
+_SERVICE_QUESTION_RE = re.compile(
+    r"^(?:how|what|when|where|why|which|who|is there|are there|is it|do you|does|do i|will)\b"
+)
+_CLAUSE_SPLIT_RE = re.compile(r"[.!?;,\n]+")
+
+
+def normalize_message(message: str) -> str:
+    text = message.casefold().replace("’", "'")
+    text = re.sub(r"[^\w\s']", " ", text)
+    return " ".join(text.split())
+
+
+def _is_escalation(message: str) -> bool:
+    for clause in _CLAUSE_SPLIT_RE.split(message):
+        clause = normalize_message(clause)
+        if not clause or _SERVICE_QUESTION_RE.match(clause):
+            continue
+        if _HUMAN_RE.match(clause) or _TICKET_RE.match(clause) or _EXPLICIT_ESCALATION_RE.match(clause):
+            return True
+    return False
+
+
+def classify_by_rules(message: str) -> str | None:
+    """
+    Return an intent for unambiguous messages, otherwise None.
+    """
+    text = normalize_message(message)
+    if not text:
+        return "small_talk"
+
+    if not _NEGATION_RE.search(text) and _is_escalation(message):
+        return "escalation_request"
+
+    if len(text.split()) > MAX_SOCIAL_WORDS:
+        return None
+
+    if _GREETING_RE.match(text):
+        return "greeting"
+    if _SMALL_TALK_RE.match(text):
+        return "small_talk"
+    if _SOCIAL_RE.match(text):
+        # Mixed ("ok got it, thanks"); both intents route to small talk
+        return "greeting"
+    return None
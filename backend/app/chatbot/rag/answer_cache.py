@@ -0,0 +1,181 @@
+from dataclasses import dataclass, field
+import re
+import time
+import logging
+import numpy as np
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+def query_numbers(query: str) -> tuple[str, ...]:
+    """Numbers in a question; embeddings barely tell "30 days" from "40 days"."""
+    return tuple(_NUMBER_RE.findall(query))
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    doc_ids: frozenset[str]
+    created_at: float
+    # How long the original retrieval + generation took
+    latency: float
+    # Answer was the "not in the documents" reply; new uploads may change it
+    refusal: bool = False
+    # Numbers in the question; only a query with the same ones can match
+    numbers: tuple[str, ...] = ()
+
+
+@dataclass
+class _ClientCache:
+    entries: list[CachedAnswer] = field(default_factory=list)
+    vectors: list[np.ndarray] = field(default_factory=list)
+    matrix: np.ndarray | None = None
+
+    def rebuild(self) -> None:
+        self.matrix = np.vstack(self.vectors) if self.vectors else None
+
+    def remove(self, keep: list[bool]) -> int:
+        removed = keep.count(False)
+        if removed:
+            self.entries = [e for e, k in zip(self.entries, keep) if k]
+            self.vectors = [v for v, k in zip(self.vectors, keep) if k]
+            self.rebuild()
+        return removed
+
+
+class SemanticAnswerCache:
+    """
+    Per-client cache of RAG answers keyed by query embedding.
+
+    A lookup returns the stored answer of the most similar cached query if
+    its cosine similarity is >= `threshold` and both questions contain the
+    same numbers ("refund within 30 days" never answers "within 40 days").
+    Every entry is tagged with the
+    doc_ids of the chunks that produced it, so indexing or deleting a
+    document only drops the answers that depended on it (plus "not found"
+    answers on indexing, since the new document may answer them).
+    """
+
+    def __init__(self, threshold: float, max_entries_per_client: int, ttl_seconds: float):
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries_per_client)
+        self.ttl = ttl_seconds
+        self._clients: dict[str, _ClientCache] = {}
+        self.lookups = 0
+        self.hits = 0
+        self.latency_saved = 0.0
+        self.invalidated = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray | None:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(v))
+        if not norm:
+            return None
+        return v / norm
+
+    def lookup(self, client_id: str, query_vector, query: str = "") -> CachedAnswer | None:
+        self.lookups += 1
+        cache = self._clients.get(client_id)
+        q = self._normalize(query_vector)
+        if cache is None or cache.matrix is None or q is None:
+            return None
+        if cache.matrix.shape[1] != q.shape[0]:
+            # Embedding model changed underneath us
+            self.invalidate_client(client_id)
+            return None
+
+        scores = cache.matrix @ q
+        numbers = query_numbers(query)
+        scores[[e.numbers != numbers for e in cache.entries]] = -1.0
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        entry = cache.entries[best]
+        if self.ttl > 0 and time.time() - entry.created_at > self.ttl:
+            self.invalidated += cache.remove([i != best for i in range(len(cache.entries))])
+            return None
+
+        self.hits += 1
+        self.latency_saved += entry.latency
+        logger.info(
+            f"Answer cache hit | client={client_id} | similarity={scores[best]:.4f}"
+        )
+        return entry
+
+    def store(
+        self,
+        client_id: str,
+        query_vector,
+        answer: str,
+        doc_ids,
+        latency: float,
+        refusal: bool = False,
+        query: str = "",
+    ) -> None:
+        q = self._normalize(query_vector)
+        if q is None:
+            return
+        cache = self._clients.setdefault(client_id, _ClientCache())
+        cache.entries.append(
+            CachedAnswer(
+                answer=answer,
+                doc_ids=frozenset(d for d in doc_ids if d),
+                created_at=time.time(),
+                latency=latency,
+                refusal=refusal,
+                numbers=query_numbers(query),
+            )
+        )
+        cache.vectors.append(q)
+        if len(cache.entries) > self.max_entries:
+            # Oldest first
+            overflow = len(cache.entries) - self.max_entries
+            del cache.entries[:overflow]
+            del cache.vectors[:overflow]
+        cache.rebuild()
+
+    def on_document_indexed(self, client_id: str, doc_id: str) -> int:
+        cache = self._clients.get(client_id)
+        if cache is None:
+            return 0
+        removed = cache.remove(
+            [not (e.refusal or doc_id in e.doc_ids) for e in cache.entries]
+        )
+        self.invalidated += removed
+        return removed
+
+    def on_document_deleted(self, client_id: str, doc_id: str) -> int:
+        cache = self._clients.get(client_id)
+        if cache is None:
+            return 0
+        removed = cache.remove([doc_id not in e.doc_ids for e in cache.entries])
+        self.invalidated += removed
+        return removed
+
+    def invalidate_client(self, client_id: str) -> None:
+        cache = self._clients.pop(client_id, None)
+        if cache is not None:
+            self.invalidated += len(cache.entries)
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._clients),
+            "entries": sum(len(c.entries) for c in self._clients.values()),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_ratio": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "latency_saved_seconds": round(self.latency_saved, 3),
+            "invalidated": self.invalidated,
+        }
+
+
+answer_cache = SemanticAnswerCache(
+    threshold=settings.ANSWER_CACHE_SIMILARITY,
+    max_entries_per_client=settings.ANSWER_CACHE_MAX_ENTRIES_PER_CLIENT,
+    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+)
@@ -1,26 +1,56 @@
 from app.chatbot.rag.vectorstore import retrieve_documents
-from app.chatbot.rag.rag_prompts import RAG_PROMPT
-from app.core.llm import get_chat_model
+from app.chatbot.rag.rag_prompts import RAG_PROMPT, NO_INFO_ANSWER
+from app.chatbot.rag.answer_cache import answer_cache
+from app.chatbot.rag.speculation import speculative_retrieval
+from app.core.llm import get_chat_model, get_query_embedding_model
+from app.core.config import settings
 import traceback
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Model calls tagged with this produce user-visible answer text (/chat/stream)
+ANSWER_STREAM_TAG = "answer_stream"
+
 chat_model = get_chat_model()
+query_embedding_model = get_query_embedding_model()
 
 
-async def rag_answer(query: str,client_id: str):
+async def rag_answer(query: str,client_id: str, thread_id: str | None = None):
     """
     RAG answer generator.
     Fetches documents ONLY from the given client's vector store.
+    Near-duplicate questions are served from the per-client answer cache.
+    A speculative retrieval started for `thread_id` is used if it searched
+    this same query, and discarded on a cache hit.
     """
 
     try:
-        docs = await retrieve_documents(
-            query=query,
-            client_id=client_id,
-            k=3,
-        )
+        started = time.perf_counter()
+
+        query_vector = None
+        if settings.ANSWER_CACHE_ENABLED:
+            try:
+                query_vector = await query_embedding_model.aembed_query(query)
+                cached = answer_cache.lookup(client_id, query_vector, query)
+                if cached is not None:
+                    speculative_retrieval.discard(thread_id)
+                    return cached.answer
+            except Exception as e:
+                logger.warning(f"RAG | client={client_id} | answer cache skipped: {e}")
+
+        # Documents prefetched during classification, if they match this query
+        prefetched = speculative_retrieval.take(thread_id, client_id, query)
+        if prefetched is not None:
+            docs = await prefetched
+        else:
+            docs = await retrieve_documents(
+                query=query,
+                client_id=client_id,
+                k=settings.RAG_TOP_K,
+                embedding=query_vector,
+            )
 
         logger.info(
             f"RAG | client={client_id} | retrieved_docs={len(docs)}"
@@ -43,8 +73,21 @@ async def rag_answer(query: str,client_id: str):
             context=context,
         )
 
-        response = await chat_model.ainvoke(prompt)
-        return response.content
+        response = await chat_model.ainvoke(prompt, config={"tags": [ANSWER_STREAM_TAG]})
+        answer = response.content
+
+        if query_vector is not None:
+            answer_cache.store(
+                client_id,
+                query_vector,
+                answer,
+                doc_ids=[doc.metadata.get("doc_id") for doc in docs],
+                latency=time.perf_counter() - started,
+                refusal=NO_INFO_ANSWER in answer,
+                query=query,
+            )
+
+        return answer
 
     except Exception as e:
         logger.error(
@@ -56,4 +99,4 @@ async def rag_answer(query: str,client_id: str):
         return (
             "I'm having trouble accessing the knowledge base right now. "
             "Please try again later or contact support."
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,119 @@
+"""
+Speculative retrieval: start embedding + vector search for a message while
+the intent classifier is still running, and hand the documents to rag_node
+if the turn ends up there.
+
+Speculations are keyed by thread_id. Each one is either taken by rag_node
+(a hit, when the retrieval query matches what was speculated) or discarded
+(the turn routed elsewhere, or rag_node searched a different query). Work
+that finished before being discarded is counted as wasted.
+"""
+
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from app.core.config import settings
+from app.core.llm import get_query_embedding_model
+from app.chatbot.rag.vectorstore import retrieve_documents
+
+logger = logging.getLogger(__name__)
+
+# Speculations nobody claimed (e.g. the turn failed) are dropped after this
+_ORPHAN_SECONDS = 60.0
+
+
+@dataclass
+class _Speculation:
+    client_id: str
+    query: str
+    task: asyncio.Task
+    started: float = field(default_factory=time.perf_counter)
+
+
+def _new_client_stats() -> dict:
+    return {"started": 0, "hits": 0, "discarded": 0, "cancelled": 0, "wasted_seconds": 0.0}
+
+
+class SpeculativeRetrieval:
+    def __init__(self, clients: str, k: int):
+        self.k = k
+        self._clients = {c.strip() for c in clients.split(",") if c.strip()}
+        self._pending: dict[str, _Speculation] = {}
+        self._stats: dict[str, dict] = defaultdict(_new_client_stats)
+
+    def enabled_for(self, client_id: str) -> bool:
+        return "*" in self._clients or client_id in self._clients
+
+    async def _prefetch(self, query: str, client_id: str):
+        try:
+            vector = await get_query_embedding_model().aembed_query(query)
+        except Exception as e:
+            logger.warning(f"Speculative embedding failed, searching by text: {e}")
+            vector = None
+        return await retrieve_documents(query, client_id, k=self.k, embedding=vector)
+
+    def start(self, thread_id: str | None, client_id: str, query: str) -> bool:
+        if not thread_id or not self.enabled_for(client_id):
+            return False
+        self._drop_orphans()
+        self.discard(thread_id)
+        task = asyncio.create_task(self._prefetch(query, client_id))
+        self._pending[thread_id] = _Speculation(client_id=client_id, query=query, task=task)
+        self._stats[client_id]["started"] += 1
+        return True
+
+    def take(self, thread_id: str | None, client_id: str, query: str) -> asyncio.Task | None:
+        """Return the prefetch task if it searched exactly `query`, else discard it."""
+        spec = self._pending.get(thread_id) if thread_id else None
+        if spec is None:
+            return None
+        if spec.client_id != client_id or spec.query != query:
+            self.discard(thread_id)
+            return None
+        del self._pending[thread_id]
+        self._stats[client_id]["hits"] += 1
+        return spec.task
+
+    def discard(self, thread_id: str | None) -> None:
+        spec = self._pending.pop(thread_id, None) if thread_id else None
+        if spec is None:
+            return
+        stats = self._stats[spec.client_id]
+        stats["discarded"] += 1
+        stats["wasted_seconds"] += time.perf_counter() - spec.started
+        if not spec.task.done():
+            # A search already running in the retrieval pool still finishes there
+            spec.task.cancel()
+            stats["cancelled"] += 1
+
+    def _drop_orphans(self) -> None:
+        now = time.perf_counter()
+        for thread_id, spec in list(self._pending.items()):
+            if now - spec.started > _ORPHAN_SECONDS:
+                self.discard(thread_id)
+
+    def stats(self) -> dict:
+        def _summary(s: dict) -> dict:
+            return {
+                **s,
+                "wasted_seconds": round(s["wasted_seconds"], 3),
+                "hit_rate": round(s["hits"] / s["started"], 4) if s["started"] else 0.0,
+            }
+
+        totals = _new_client_stats()
+        for s in self._stats.values():
+            for key in totals:
+                totals[key] += s[key]
+        return {
+            **_summary(totals),
+            "pending": len(self._pending),
+            "clients": {client_id: _summary(s) for client_id, s in self._stats.items()},
+        }
+
+
+speculative_retrieval = SpeculativeRetrieval(
+    clients=settings.SPECULATIVE_RETRIEVAL_CLIENTS,
+    k=settings.RAG_TOP_K,
+)
@@ -1,11 +1,20 @@
+from collections import OrderedDict
 from pathlib import Path
 from langchain_chroma import Chroma
-from app.core.llm import get_embedding_model
+from app.core.llm import get_query_embedding_model
+from app.core.config import settings
+from app.core.executor import BoundedExecutor, ExecutorOverloaded
+from app.core.telemetry import span
+import asyncio
+import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
-embedding_model = get_embedding_model()
+embedding_model = get_query_embedding_model()
+
+COLLECTION_NAME = "company_kb"
 
 
 def _get_client_chroma_path(client_id: str) -> Path:
@@ -21,6 +30,10 @@ def _get_client_chroma_path(client_id: str) -> Path:
 
 
 def load_vector_store(client_id: str) -> Chroma:
+    """
+    Opens a fresh Chroma handle for the client.
+    Prefer get_vector_store(), which reuses open handles.
+    """
     chroma_path = _get_client_chroma_path(client_id)
 
     if not chroma_path.exists():
@@ -35,30 +48,151 @@ def load_vector_store(client_id: str) -> Chroma:
     return Chroma(
         persist_directory=str(chroma_path),
         embedding_function=embedding_model,
-        collection_name="company_kb",
+        collection_name=COLLECTION_NAME,
     )
 
 
+# =========================
+# HANDLE REGISTRY
+# =========================
+class VectorStoreRegistry:
+    """
+    Bounded LRU of open per-client Chroma handles.
+
+    - Handles idle for longer than `idle_ttl` seconds are dropped on access.
+    - invalidate() must be called whenever a client's collection changes
+      (ingestion / document deletion) so the next query reopens it.
+    """
+
+    def __init__(self, max_size: int, idle_ttl: float):
+        self.max_size = max(1, max_size)
+        self.idle_ttl = idle_ttl
+        self._stores: "OrderedDict[str, tuple[Chroma, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_cached(self, client_id: str) -> Chroma | None:
+        """Return an open handle without opening one (cheap, safe on the event loop)."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._stores.get(client_id)
+            if entry is None:
+                return None
+            self._stores[client_id] = (entry[0], now)
+            self._stores.move_to_end(client_id)
+            self.hits += 1
+            return entry[0]
+
+    def get(self, client_id: str) -> Chroma:
+        """Return an open handle, opening it on a miss (blocking, run off the loop)."""
+        vs = self.get_cached(client_id)
+        if vs is not None:
+            return vs
+
+        vs = load_vector_store(client_id)
+        try:
+            count = vs._collection.count()
+            logger.info(f"Client '{client_id}' collection has {count} documents")
+        except Exception:
+            pass
+
+        with self._lock:
+            self.misses += 1
+            # Another thread may have opened it meanwhile; keep the first one
+            existing = self._stores.get(client_id)
+            if existing is not None:
+                vs = existing[0]
+            self._stores[client_id] = (vs, time.monotonic())
+            self._stores.move_to_end(client_id)
+            while len(self._stores) > self.max_size:
+                evicted, _ = self._stores.popitem(last=False)
+                self.evictions += 1
+                logger.info(f"Evicted vector store handle for client: {evicted}")
+        return vs
+
+    def invalidate(self, client_id: str) -> None:
+        with self._lock:
+            if self._stores.pop(client_id, None) is not None:
+                self.invalidations += 1
+                logger.info(f"Invalidated vector store handle for client: {client_id}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stores.clear()
+
+    def _evict_idle(self, now: float) -> None:
+        if self.idle_ttl <= 0:
+            return
+        expired = [
+            cid for cid, (_, last_used) in self._stores.items()
+            if now - last_used > self.idle_ttl
+        ]
+        for cid in expired:
+            del self._stores[cid]
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._stores),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+vector_store_registry = VectorStoreRegistry(
+    max_size=settings.VECTORSTORE_CACHE_SIZE,
+    idle_ttl=settings.VECTORSTORE_IDLE_TTL_SECONDS,
+)
+
+
+retrieval_executor = BoundedExecutor(
+    name="retrieval",
+    max_workers=settings.RETRIEVAL_MAX_WORKERS,
+    queue_depth=settings.RETRIEVAL_QUEUE_DEPTH,
+    timeout=settings.RETRIEVAL_TIMEOUT_SECONDS,
+)
+
+
+def get_vector_store(client_id: str) -> Chroma:
+    return vector_store_registry.get(client_id)
+
+
+def invalidate_vector_store(client_id: str) -> None:
+    vector_store_registry.invalidate(client_id)
+
+
+def _search(client_id: str, query: str, k: int, embedding: list[float] | None = None):
+    vs = vector_store_registry.get(client_id)
+    if embedding is not None:
+        return vs.similarity_search_by_vector(embedding, k=k)
+    return vs.similarity_search(query, k=k)
+
+
 async def retrieve_documents(
     query: str,
     client_id: str,
     k: int = 4,
+    embedding: list[float] | None = None,
 ):
     """
     Retrieve documents ONLY from the given client's vector store.
+    Pass `embedding` when the query vector is already known to skip re-embedding.
     """
     try:
-        vs = load_vector_store(client_id)
-
-        try:
-            count = vs._collection.count()
-            logger.info(
-                f"Client '{client_id}' collection has {count} documents"
-            )
-        except Exception:
-            pass
-
-        docs = vs.similarity_search(query, k=k)
+        # Query embedding + HNSW search (and opening the handle on a miss) are
+        # blocking, so they run on the bounded retrieval pool.
+        with span("vector_search", "chroma", client_id=client_id, k=k):
+            docs = await retrieval_executor.run(_search, client_id, query, k, embedding)
 
         logger.info(
             f"Retrieved {len(docs)} docs for client={client_id}, query='{query[:50]}'"
@@ -66,9 +200,20 @@ async def retrieve_documents(
 
         return docs
 
+    except ExecutorOverloaded as e:
+        logger.warning(f"Vector retrieval rejected for client={client_id}: {e}")
+        return []
+
+    except asyncio.TimeoutError:
+        logger.warning(
+            f"Vector retrieval timed out for client={client_id} "
+            f"after {retrieval_executor.timeout}s"
+        )
+        return []
+
     except Exception as e:
         logger.error(
             f"Vector retrieval failed for client={client_id}: {e}",
             exc_info=True,
         )
-        return []
\ No newline at end of file
+        return []
@@ -1,11 +1,19 @@
 from typing import TypedDict, Literal
+from collections import Counter
 from pydantic import BaseModel
 from langgraph.graph import StateGraph, START, END
+from langchain_core.runnables import RunnableConfig
 from langchain_core.output_parsers import PydanticOutputParser
-from app.core.llm import chat_model
-from app.chatbot.rag.pipeline import rag_answer
-from app.core.checkpointer import get_checkpointer
+from app.core.llm import chat_model, get_query_embedding_model, embedding_model_name
+from app.core.config import settings
+from app.chatbot.rag.pipeline import rag_answer, ANSWER_STREAM_TAG
+from app.chatbot.rag.speculation import speculative_retrieval
+from app.core.checkpointer import get_checkpointer, close_checkpointer
+from app.core.telemetry import instrument_node
+from app.chatbot.intent_rules import classify_by_rules
+from app.chatbot.intent_centroids import CentroidIntentClassifier
 import re
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,8 +26,10 @@ class AgentState(TypedDict, total=False):
     client_id: str
     query: str
     intent: str
+    intent_tier: str
     answer: str
-    context_summary: str
+    context_summary: str | None
+    context_source: str | None  # last RAG answer, summarized on demand
     policy_days: int
     failure_count: int
     escalated: bool
@@ -45,25 +55,63 @@ class IntentOutput(BaseModel):
     ]
 
 
-async def intent_classifier(state: AgentState) -> AgentState:
+# Shares the cached query-embedding model with retrieval, so the vector
+# computed here is reused by rag_answer() for the same message. A centroid
+# match alone never escalates (that opens the ticket flow): the LLM decides.
+intent_centroids = CentroidIntentClassifier(
+    embeddings=get_query_embedding_model(),
+    model_name=embedding_model_name(),
+    margin=settings.INTENT_CENTROID_MARGIN,
+    min_score=settings.INTENT_CENTROID_MIN_SCORE,
+    cache_path=settings.INTENT_CENTROIDS_PATH or None,
+    defer=("escalation_request",),
+)
+
+
+async def intent_classifier(state: AgentState, config: RunnableConfig | None = None) -> AgentState:
     # ✅ Prevent any ticket-related logic if already escalated
     if state.get("escalated"):
         # Clear any ticket-related flags to prevent duplicate tickets
         return {
-            **state,
             "awaiting_ticket_query": False,
             "ticket_user_query": None,
+            "intent_tier": "state",
         }
     
-    # ✅ Capture final ticket message (only if not already escalated)
-    if state.get("awaiting_ticket_query") and not state.get("escalated"):
-        return {
-            **state,
-            "ticket_user_query": state["query"],
-            "intent": "escalation_request"
-        }
+    # Identity / ticket-detail turns never reach this node: see pre_router()
+
+    # Tier 1: deterministic rules (greetings, small talk, "talk to a human")
+    rule_intent = classify_by_rules(state["query"])
+    if rule_intent:
+        logger.info(f"Intent classified | tier=rules | intent={rule_intent}")
+        return {"intent": rule_intent, "intent_tier": "rules"}
 
-    # Create output parser
+    # Opted-in tenants: start retrieval now, overlapping the slower tiers
+    thread_id = (config or {}).get("configurable", {}).get("thread_id")
+    speculating = speculative_retrieval.start(thread_id, state["client_id"], state["query"])
+
+    intent, tier = await _classify_by_model(state["query"])
+    update = {"intent": intent, "intent_tier": tier}
+
+    if speculating and router({**state, **update}) != "rag_node":
+        speculative_retrieval.discard(thread_id)
+    return update
+
+
+async def _classify_by_model(query: str) -> tuple[str, str]:
+    # Tier 2: nearest intent centroid, unless the top two are too close
+    if settings.INTENT_CENTROIDS_ENABLED:
+        try:
+            centroid_intent, margin = await intent_centroids.classify(query)
+            if centroid_intent:
+                logger.info(
+                    f"Intent classified | tier=centroid | intent={centroid_intent} | margin={margin:.3f}"
+                )
+                return centroid_intent, "centroid"
+        except Exception as e:
+            logger.warning(f"Centroid intent classification failed: {e}")
+
+    # Tier 3: LLM for everything ambiguous
     parser = PydanticOutputParser(pydantic_object=IntentOutput)
     
     prompt = f"""
@@ -78,7 +126,7 @@ Classify the message into ONE intent:
 - out_of_scope (weather, celebrities, unrelated)
 
 Message:
-{state["query"]}
+{query}
 
 {parser.get_format_instructions()}
 """
@@ -86,11 +134,14 @@ Message:
         res = await chat_model.ainvoke(prompt)
         parsed_output = parser.parse(res.content)
         intent = parsed_output.intent
+        tier = "llm"
     except Exception as e:
         logger.warning(f"Intent classification failed: {e}, defaulting to 'faq'")
         intent = "faq"
+        tier = "default"
 
-    return {**state, "intent": intent}
+    logger.info(f"Intent classified | tier={tier} | intent={intent}")
+    return intent, tier
 
 
 # =========================
@@ -98,38 +149,96 @@ Message:
 # =========================
 async def small_talk_node(state: AgentState) -> AgentState:
     res = await chat_model.ainvoke(
-        f"Reply politely and briefly to: {state['query']}"
+        f"Reply politely and briefly to: {state['query']}",
+        config={"tags": [ANSWER_STREAM_TAG]},
     )
-    return {**state, "answer": res.content}
+    return {"answer": res.content}
 
 
 # =========================
 # RAG NODE
 # =========================
-async def rag_node(state: AgentState) -> AgentState:
+async def _summarize_context(answer: str) -> str:
+    try:
+        return (await chat_model.ainvoke(
+            f"Summarize this policy in one line:\n{answer}"
+        )).content
+    except Exception as e:
+        logger.warning(f"Context summary failed, using raw answer: {e}")
+        return answer
+
+
+# Keep references so pending summary tasks are not garbage collected
+_summary_tasks: set[asyncio.Task] = set()
+
+
+async def _store_summary_later(thread_id: str, answer: str) -> None:
+    """Background mode: summarize after the reply and write it to the checkpoint."""
+    try:
+        summary = await _summarize_context(answer)
+        agent = await get_support_agent()
+        config = {"configurable": {"thread_id": thread_id}}
+        snapshot = await agent.aget_state(config)
+        # Skip if a newer RAG turn (or the lazy path) already moved on, or a
+        # turn is mid-run
+        if snapshot.values.get("context_source") != answer or snapshot.values.get("context_summary") or snapshot.next:
+            return
+        # Only write while that checkpoint is still the thread's latest, and
+        # on top of it (not whatever is latest by then): a turn that started
+        # since keeps its state and summarizes lazily instead
+        checkpoint_id = snapshot.config["configurable"]["checkpoint_id"]
+        latest = await agent.checkpointer.aget_tuple(config)
+        if latest is None or latest.config["configurable"]["checkpoint_id"] != checkpoint_id:
+            return
+        # rag_node's only edge is to END, so the update schedules nothing
+        await agent.aupdate_state(snapshot.config, {"context_summary": summary}, as_node="rag_node")
+    except Exception as e:
+        logger.warning(f"Background context summary failed | thread={thread_id} | {e}")
+
+
+async def rag_node(state: AgentState, config: RunnableConfig) -> AgentState:
+    thread_id = config.get("configurable", {}).get("thread_id")
     prev_summary = state.get("context_summary", "")
     query = state["query"]
+    is_followup = state.get("intent") == "followup"
 
+    # The previous answer has not been summarized yet (lazy mode, or the
+    # background summary is still running): do it now that it is needed.
+    if is_followup and not prev_summary and state.get("context_source"):
+        prev_summary = await _summarize_context(state["context_source"])
+
+    # Only follow-ups carry the previous context into retrieval; a fresh FAQ is
+    # searched as-is (which also reuses the classifier's query embedding).
     combined_query = (
         f"Previous context:\n{prev_summary}\n\nUser follow-up:\n{query}"
-        if prev_summary else query
+        if prev_summary and is_followup else query
     )
 
-    answer = await rag_answer(query=combined_query, client_id=state["client_id"])
+    # Uses (or, on an answer-cache hit, discards) the speculative retrieval
+    answer = await rag_answer(
+        query=combined_query, client_id=state["client_id"], thread_id=thread_id
+    )
 
     match = re.search(r"(\d+)\s*(business\s*)?days", answer.lower())
     policy_days = int(match.group(1)) if match else state.get("policy_days")
 
-    summary = (await chat_model.ainvoke(
-        f"Summarize this policy in one line:\n{answer}"
-    )).content
+    # The summary only matters for a later follow-up, so by default it is not
+    # generated while the user waits (CONTEXT_SUMMARY_MODE).
+    summary = None
+    mode = settings.CONTEXT_SUMMARY_MODE
+    if mode == "inline":
+        summary = await _summarize_context(answer)
+    elif mode == "background":
+        if thread_id:
+            task = asyncio.create_task(_store_summary_later(thread_id, answer))
+            _summary_tasks.add(task)
+            task.add_done_callback(_summary_tasks.discard)
 
     return {
-        **state,
         "answer": answer,
+        "context_source": answer,
         "context_summary": summary,
         "policy_days": policy_days,
-        "failure_count": state.get("failure_count", 0),
     }
 
 
@@ -153,7 +262,6 @@ async def ask_user_identity_node(state: AgentState) -> AgentState:
     We only reach this node once escalation has been decided.
     """
     return {
-        **state,
         "answer": (
             "I understand this issue may need human support.\n\n"
             "Before I raise a support ticket, please share your full name and "
@@ -183,7 +291,6 @@ async def collect_user_identity_node(state: AgentState) -> AgentState:
     if not match:
         # Invalid or missing email – keep waiting for identity
         return {
-            **state,
             "answer": (
                 "To create a support ticket, I need a valid email address.\n\n"
                 "Please reply with your full name and email in one message, "
@@ -201,7 +308,6 @@ async def collect_user_identity_node(state: AgentState) -> AgentState:
 
     # Identity is now collected; next step is to ask for the full issue
     return {
-        **state,
         "user_name": user_name,
         "user_email": email,
         "awaiting_user_identity": False,
@@ -219,7 +325,6 @@ async def collect_user_identity_node(state: AgentState) -> AgentState:
 # =========================
 async def ask_ticket_query_node(state: AgentState) -> AgentState:
     return {
-        **state,
         "answer": (
             "I understand this needs human support.\n\n"
             "Before I raise a ticket, please describe your full issue "
@@ -233,8 +338,11 @@ async def ask_ticket_query_node(state: AgentState) -> AgentState:
 # ESCALATION NODE
 # =========================
 async def escalation_node(state: AgentState) -> AgentState:
-    # Store ticket_user_query before clearing it
-    ticket_query = state.get("ticket_user_query")
+    # When we were waiting for the issue description, this message is it
+    if state.get("awaiting_ticket_query"):
+        ticket_query = state["query"]
+    else:
+        ticket_query = state.get("ticket_user_query")
 
     # Create a short summary of the user's issue for the ticket, if possible
     ticket_summary = state.get("ticket_summary")
@@ -251,7 +359,6 @@ async def escalation_node(state: AgentState) -> AgentState:
             ticket_summary = ticket_query
 
     return {
-        **state,
         "answer": (
             "Thank you. I've raised a support ticket for you. "
             "Our human support team will contact you shortly."
@@ -270,7 +377,6 @@ async def escalation_node(state: AgentState) -> AgentState:
 # =========================
 async def out_of_scope_node(state: AgentState) -> AgentState:
     return {
-        **state,
         "answer": (
             "I can help with questions related to the company and its services."
         ),
@@ -278,6 +384,37 @@ async def out_of_scope_node(state: AgentState) -> AgentState:
     }
 
 
+# =========================
+# PRE-ROUTER
+# =========================
+# Turns whose next step is fixed by checkpointed flags skip the classifier
+# (its centroid embedding / LLM call and one checkpointed step).
+preroute_counts: Counter = Counter()
+
+
+def pre_router(state: AgentState) -> str:
+    # Escalated threads still need the classifier to clear ticket flags
+    if state.get("escalated"):
+        target = "intent_classifier"
+    elif state.get("awaiting_user_identity"):
+        target = "collect_user_identity_node"
+    elif state.get("awaiting_ticket_query"):
+        target = "escalation_node"
+    else:
+        target = "intent_classifier"
+    preroute_counts[target] += 1
+    return target
+
+
+def preroute_stats() -> dict:
+    skipped = {k: v for k, v in preroute_counts.items() if k != "intent_classifier"}
+    return {
+        "classified": preroute_counts["intent_classifier"],
+        "classifier_skipped": skipped,
+        "classifier_skipped_total": sum(skipped.values()),
+    }
+
+
 # =========================
 # ROUTER
 # =========================
@@ -328,16 +465,28 @@ def router(state: AgentState) -> str:
 # =========================
 graph = StateGraph(AgentState)
 
-graph.add_node("intent_classifier", intent_classifier)
-graph.add_node("small_talk_node", small_talk_node)
-graph.add_node("rag_node", rag_node)
-graph.add_node("out_of_scope_node", out_of_scope_node)
-graph.add_node("ask_user_identity_node", ask_user_identity_node)
-graph.add_node("collect_user_identity_node", collect_user_identity_node)
-graph.add_node("ask_ticket_query_node", ask_ticket_query_node)
-graph.add_node("escalation_node", escalation_node)
+# instrument_node() adds per-node timing when METRICS_ENABLED / TRACE_LOG_JSON
+for name, node in [
+    ("intent_classifier", intent_classifier),
+    ("small_talk_node", small_talk_node),
+    ("rag_node", rag_node),
+    ("out_of_scope_node", out_of_scope_node),
+    ("ask_user_identity_node", ask_user_identity_node),
+    ("collect_user_identity_node", collect_user_identity_node),
+    ("ask_ticket_query_node", ask_ticket_query_node),
+    ("escalation_node", escalation_node),
+]:
+    graph.add_node(name, instrument_node(name, node))
 
-graph.add_edge(START, "intent_classifier")
+graph.add_conditional_edges(
+    START,
+    pre_router,
+    {
+        "intent_classifier": "intent_classifier",
+        "collect_user_identity_node": "collect_user_identity_node",
+        "escalation_node": "escalation_node",
+    },
+)
 graph.add_conditional_edges(
     "intent_classifier",
     router,
@@ -371,4 +520,16 @@ async def get_support_agent():
     if _support_agent is None:
         cp = await get_checkpointer()
         _support_agent = graph.compile(checkpointer=cp)
-    return _support_agent
\ No newline at end of file
+    return _support_agent
+
+
+def checkpointer_stats() -> dict:
+    stats = getattr(_support_agent.checkpointer, "stats", None) if _support_agent else None
+    return stats() if callable(stats) else {}
+
+
+async def close_support_agent():
+    global _support_agent
+    if _support_agent is not None:
+        await close_checkpointer(_support_agent.checkpointer)
+        _support_agent = None
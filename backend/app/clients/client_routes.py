@@ -1,5 +1,6 @@
 from fastapi import APIRouter
 from app.db.mongodb import db
+from app.clients.client_service import tenant_registry
 
 router = APIRouter()
 
@@ -12,4 +13,5 @@ async def create_client():
         "is_active": True
     }
     await db.clients.insert_one(client)
+    tenant_registry.invalidate(client["client_id"])  # drop a cached "unknown client"
     return client
\ No newline at end of file
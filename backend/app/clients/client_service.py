@@ -1,12 +1,17 @@
 from fastapi import HTTPException, status
 from app.db.mongodb import db
+from app.core.config import settings
+from dataclasses import dataclass
+from collections import OrderedDict
+from functools import lru_cache
 from urllib.parse import urlparse
+import asyncio
+import time
 
 # Optional: allow configured frontend so chatbot works regardless of client's allowed_domains
 def _get_trusted_hosts():
     hosts = set()
     try:
-        from app.core.config import settings
         if getattr(settings, "FRONTEND_URL", None):
             u = urlparse(settings.FRONTEND_URL)
             if u.hostname:
@@ -18,41 +23,146 @@ def _get_trusted_hosts():
     return hosts
 
 
+def _normalize_host(entry: str) -> str:
+    # Stored values may be full URLs or just hostnames
+    if "://" in entry or entry.startswith("//"):
+        return (urlparse(entry).hostname or entry).strip().lower()
+    return entry.strip().lower()
+
+
+@lru_cache(maxsize=1024)
+def _origin_host(origin: str) -> str | None:
+    host = urlparse(origin).hostname
+    return host.lower() if host else None
+
+
+@dataclass(frozen=True)
+class Tenant:
+    client: dict
+    is_active: bool
+    # allowed_domains as hostnames, plus the app's frontend and localhost
+    allowed_hosts: frozenset[str]
+
+
+class TenantRegistry:
+    """
+    In-memory view of db.clients for validate_client().
+
+    - A client's record and normalized host set are kept for `ttl`
+      seconds; unknown client_ids are remembered (as None) for
+      `negative_ttl` seconds, so junk ids don't each cost a Mongo query.
+    - invalidate() drops an entry at once; call it after creating,
+      changing or deactivating a client.
+    - Concurrent misses for the same client_id share one query.
+    - At most `max_entries` ids are kept (oldest dropped first).
+    """
+
+    def __init__(self, ttl_seconds: float, negative_ttl_seconds: float, max_entries: int):
+        self.ttl = ttl_seconds
+        self.negative_ttl = negative_ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._trusted_hosts = frozenset(_get_trusted_hosts())
+        self._entries: OrderedDict[str, tuple[float, Tenant | None]] = OrderedDict()  # id -> (expires, tenant)
+        self._loading: dict[str, asyncio.Future] = {}
+        self._generation = 0  # bumped by invalidate(); loads started before it are not cached
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.invalidations = 0
+
+    def _build(self, client: dict) -> Tenant:
+        hosts = {_normalize_host(a) for a in client.get("allowed_domains") or [] if a}
+        return Tenant(
+            client=client,
+            is_active=bool(client.get("is_active", False)),
+            allowed_hosts=frozenset(hosts) | self._trusted_hosts,
+        )
+
+    async def _load(self, client_id: str) -> Tenant | None:
+        generation = self._generation
+        client = await db.clients.find_one({"client_id": client_id})
+        tenant = self._build(client) if client else None
+        ttl = self.ttl if tenant else self.negative_ttl
+        if ttl > 0 and generation == self._generation:
+            self._entries[client_id] = (time.monotonic() + ttl, tenant)
+            self._entries.move_to_end(client_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return tenant
+
+    async def get(self, client_id: str) -> Tenant | None:
+        cached = self._entries.get(client_id)
+        if cached is not None and cached[0] > time.monotonic():
+            if cached[1] is None:
+                self.negative_hits += 1
+            else:
+                self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        task = self._loading.get(client_id)
+        if task is None:
+            task = self._loading[client_id] = asyncio.ensure_future(self._load(client_id))
+            task.add_done_callback(lambda t: self._loading.pop(client_id, None) if self._loading.get(client_id) is t else None)
+        # Shielded: a cancelled request must not cancel a load others are waiting on
+        return await asyncio.shield(task)
+
+    def invalidate(self, client_id: str | None = None) -> None:
+        """Forget one client (or all); the next request reloads it."""
+        self.invalidations += 1
+        self._generation += 1
+        if client_id is None:
+            self._entries.clear()
+            self._loading.clear()
+        else:
+            self._entries.pop(client_id, None)
+            self._loading.pop(client_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
+
+
+tenant_registry = TenantRegistry(
+    ttl_seconds=settings.CLIENT_CACHE_TTL_SECONDS,
+    negative_ttl_seconds=settings.CLIENT_NEGATIVE_CACHE_SECONDS,
+    max_entries=settings.CLIENT_CACHE_MAX_ENTRIES,
+)
+
+
+async def deactivate_client(client_id: str) -> bool:
+    result = await db.clients.update_one({"client_id": client_id}, {"$set": {"is_active": False}})
+    tenant_registry.invalidate(client_id)
+    return result.matched_count > 0
+
+
 async def validate_client(client_id: str, origin: str | None = None):
-    client = await db.clients.find_one({"client_id": client_id})
+    tenant = await tenant_registry.get(client_id)
 
-    if not client:
+    if not tenant:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid client"
         )
 
-    if not client.get("is_active", False):
+    if not tenant.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Client inactive"
         )
 
     if origin:
-        parsed = urlparse(origin)
-        domain = parsed.hostname
-
-        allowed_raw = client.get("allowed_domains", [])
-        # Normalize to hostnames: stored values may be full URLs or just hostnames
-        allowed_hosts = set()
-        for a in allowed_raw:
-            if not a:
-                continue
-            if "://" in a or a.startswith("//"):
-                allowed_hosts.add((urlparse(a).hostname or a).strip().lower())
-            else:
-                allowed_hosts.add(a.strip().lower())
-        # Always allow the app's configured frontend and localhost (so chatbot works from same app)
-        allowed_hosts |= _get_trusted_hosts()
-        if domain and domain.lower() not in allowed_hosts:
+        # Always allowed: the app's configured frontend and localhost (so chatbot works from same app)
+        domain = _origin_host(origin)
+        if domain and domain not in tenant.allowed_hosts:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Domain not allowed"
             )
 
-    return client
\ No newline at end of file
+    return tenant.client
@@ -0,0 +1,299 @@
+"""
+Hot-thread cache in front of the checkpoint saver.
+
+A /chat turn loads its thread's latest checkpoint and saves new ones as
+the graph runs. CachedCheckpointer keeps the latest checkpoint (and its
+pending writes) of the CHECKPOINT_HOT_THREADS most recently active threads
+in memory:
+
+- aget_tuple for a cached thread never touches SQLite,
+- aput / aput_writes go straight to the underlying saver by default
+  (CHECKPOINT_FLUSH_SECONDS=0). With write-behind on (> 0) they update the
+  cache and return at once, and a background task writes them every
+  CHECKPOINT_FLUSH_SECONDS, or sooner once CHECKPOINT_FLUSH_MAX_DIRTY
+  threads are waiting; a crash loses what was not written yet,
+- within one flush only a thread's newest checkpoint (and writes to
+  checkpoints already on disk) is written; intermediate graph steps are
+  coalesced away, and the written checkpoint's parent is rewritten to the
+  last one actually stored, so history walks never hit a missing row,
+- aclose() flushes everything that is still buffered (app shutdown).
+
+Reads of an older checkpoint, alist() and deletes flush the thread first and
+go to the underlying saver. The cache is per process: it assumes a single
+process owns the checkpoint DB.
+"""
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    copy_checkpoint,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _key(config) -> tuple[str, str]:
+    configurable = config["configurable"]
+    return str(configurable["thread_id"]), configurable.get("checkpoint_ns", "")
+
+
+class _HotThread:
+    """Latest checkpoint of a thread plus the writes recorded against it."""
+
+    __slots__ = ("latest", "writes")
+
+    def __init__(self, latest: CheckpointTuple):
+        self.latest = latest
+        self.writes: dict[tuple[str, int], tuple] = {}  # (task_id, idx) -> (task_id, channel, value)
+        counters: dict[str, int] = {}
+        for task_id, channel, value in latest.pending_writes or []:
+            idx = counters[task_id] = counters.get(task_id, -1) + 1
+            self.writes[(task_id, WRITES_IDX_MAP.get(channel, idx))] = (task_id, channel, value)
+
+    def add_writes(self, task_id: str, writes) -> None:
+        # Same rules as the SQLite saver: special channels overwrite, others keep the first value
+        replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        for idx, (channel, value) in enumerate(writes):
+            slot = (task_id, WRITES_IDX_MAP.get(channel, idx))
+            if replace or slot not in self.writes:
+                self.writes[slot] = (task_id, channel, value)
+
+    def snapshot(self) -> CheckpointTuple:
+        # The graph loop mutates the checkpoint it resumes from; hand out a copy
+        return self.latest._replace(
+            checkpoint=copy_checkpoint(self.latest.checkpoint),
+            pending_writes=[self.writes[slot] for slot in sorted(self.writes)],
+        )
+
+
+def _coalesce(ops: list[tuple]) -> tuple[list[tuple], int]:
+    """Keep the newest put, and writes that don't belong to a dropped put."""
+    puts = [op for op in ops if op[0] == "put"]
+    if len(puts) <= 1:
+        return ops, 0
+    dropped = {op[2]["id"] for op in puts[:-1]}
+    parents = {op[2]["id"]: op[1]["configurable"].get("checkpoint_id") for op in puts}
+    _, config, checkpoint, metadata, new_versions = puts[-1]
+    # Re-parent the survivor onto the newest checkpoint that is stored (or was
+    # before this batch), and carry the channels the dropped puts changed
+    parent_id = parents[checkpoint["id"]]
+    while parent_id in dropped:
+        parent_id = parents[parent_id]
+    merged_versions = {}
+    for op in puts:
+        merged_versions.update(op[4])
+    survivor = (
+        "put",
+        {**config, "configurable": {**config["configurable"], "checkpoint_id": parent_id}},
+        checkpoint,
+        metadata,
+        merged_versions,
+    )
+    kept = [
+        survivor if op is puts[-1] else op for op in ops
+        if (op[0] == "put" and op[2]["id"] not in dropped)
+        or (op[0] == "writes" and op[1]["configurable"]["checkpoint_id"] not in dropped)
+    ]
+    return kept, len(dropped)
+
+
+class CachedCheckpointer(BaseCheckpointSaver):
+    def __init__(self, saver: BaseCheckpointSaver, max_threads: int, flush_seconds: float, max_dirty: int):
+        super().__init__(serde=saver.serde)
+        self.saver = saver
+        self.max_threads = max(1, max_threads)
+        self.flush_seconds = flush_seconds
+        self.max_dirty = max(1, max_dirty)
+        self._threads: OrderedDict[tuple[str, str], _HotThread] = OrderedDict()
+        self._dirty: dict[tuple[str, str], list[tuple]] = {}  # ops not yet written, in order
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._flusher: asyncio.Task | None = None
+        self.hits = 0
+        self.misses = 0
+        self.flushes = 0
+        self.checkpoints_written = 0
+        self.checkpoints_coalesced = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+
+    def get_next_version(self, current, channel):
+        return self.saver.get_next_version(current, channel)
+
+    # ---------------------------
+    # Cache
+    # ---------------------------
+    def _remember(self, key: tuple[str, str], entry: _HotThread) -> None:
+        self._threads[key] = entry
+        self._threads.move_to_end(key)
+        while len(self._threads) > self.max_threads:
+            # Safe to drop: buffered ops live in _dirty until written
+            self._threads.popitem(last=False)
+
+    async def aget_tuple(self, config) -> CheckpointTuple | None:
+        key = _key(config)
+        checkpoint_id = get_checkpoint_id(config)
+        entry = self._threads.get(key)
+        if entry is not None and checkpoint_id in (None, entry.latest.checkpoint["id"]):
+            self._threads.move_to_end(key)
+            self.hits += 1
+            return entry.snapshot()
+
+        self.misses += 1
+        if key in self._dirty or self._flush_lock.locked():
+            await self._flush_keys([key])  # also waits out a flush in progress
+        found = await self.saver.aget_tuple(config)
+        # Don't overwrite a newer checkpoint cached while we were reading
+        if found is not None and checkpoint_id is None and key not in self._threads:
+            self._remember(key, _HotThread(found))
+        return found
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        key = _key(config)
+        thread_id, checkpoint_ns = key
+        saved = {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+        parent_id = config["configurable"].get("checkpoint_id")
+        checkpoint = copy_checkpoint(checkpoint)
+        self._remember(key, _HotThread(CheckpointTuple(
+            config=saved,
+            checkpoint=checkpoint,
+            metadata=get_checkpoint_metadata(config, metadata),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=[],
+        )))
+        await self._buffer(key, ("put", config, checkpoint, metadata, new_versions))
+        return saved
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        key = _key(config)
+        entry = self._threads.get(key)
+        if entry is not None and entry.latest.checkpoint["id"] == config["configurable"]["checkpoint_id"]:
+            entry.add_writes(task_id, writes)
+        await self._buffer(key, ("writes", config, list(writes), task_id, task_path))
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        if config is None:
+            await self.flush()
+        else:
+            await self._flush_keys([_key(config)])
+        async for item in self.saver.alist(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        async with self._flush_lock:
+            for key in [k for k in self._threads if k[0] == thread_id]:
+                del self._threads[key]
+            for key in [k for k in self._dirty if k[0] == thread_id]:
+                del self._dirty[key]
+        await self.saver.adelete_thread(thread_id)
+
+    # ---------------------------
+    # Write-behind
+    # ---------------------------
+    async def _buffer(self, key: tuple[str, str], op: tuple) -> None:
+        if self.flush_seconds <= 0:
+            await self._apply(op)  # write-through
+            return
+        self._dirty.setdefault(key, []).append(op)
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+        if len(self._dirty) >= self.max_dirty:
+            self._wakeup.set()
+
+    async def _apply(self, op: tuple) -> None:
+        if op[0] == "put":
+            await self.saver.aput(*op[1:])
+            self.checkpoints_written += 1
+        else:
+            await self.saver.aput_writes(*op[1:])
+
+    async def _write(self, batch: dict[tuple[str, str], list[tuple]]) -> None:
+        for key, ops in batch.items():
+            ops, coalesced = _coalesce(ops)
+            self.checkpoints_coalesced += coalesced
+            if coalesced:
+                self._reparent(key, ops)
+            for position, op in enumerate(ops):
+                try:
+                    await self._apply(op)
+                except Exception as e:
+                    # Keep what's left, ahead of anything buffered since, for the next flush
+                    self.flush_errors += 1
+                    self._dirty[key] = ops[position:] + self._dirty.get(key, [])
+                    logger.warning(f"Checkpoint flush failed | thread={key[0]} | {e}")
+                    break
+
+    def _reparent(self, key: tuple[str, str], ops: list[tuple]) -> None:
+        # The cached copy of the surviving checkpoint still names a dropped parent
+        entry = self._threads.get(key)
+        put = next((op for op in reversed(ops) if op[0] == "put"), None)
+        if entry is None or put is None or entry.latest.checkpoint["id"] != put[2]["id"]:
+            return
+        parent_id = put[1]["configurable"].get("checkpoint_id")
+        entry.latest = entry.latest._replace(parent_config=(
+            {"configurable": {"thread_id": key[0], "checkpoint_ns": key[1], "checkpoint_id": parent_id}}
+            if parent_id else None
+        ))
+
+    async def _flush_keys(self, keys: list[tuple[str, str]]) -> None:
+        async with self._flush_lock:
+            batch = {key: self._dirty.pop(key) for key in keys if key in self._dirty}
+            await self._write(batch)
+
+    async def flush(self) -> None:
+        """Write every buffered checkpoint to the underlying saver."""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            started = time.perf_counter()
+            batch, self._dirty = self._dirty, {}
+            await self._write(batch)
+            self.flushes += 1
+            self.last_flush_ms = round(1000 * (time.perf_counter() - started), 1)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                # Shielded: cancelling the loop must not drop a batch mid-write
+                await asyncio.shield(self.flush())
+            except Exception as e:
+                logger.warning(f"Checkpoint flush failed: {e}")
+
+    async def aclose(self) -> None:
+        """Stop the flusher and write out everything still buffered."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
+        if self._dirty:
+            logger.error(f"Checkpoint cache closed with {len(self._dirty)} unflushed threads")
+
+    def stats(self) -> dict:
+        return {
+            "threads": len(self._threads),
+            "capacity": self.max_threads,
+            "hits": self.hits,
+            "misses": self.misses,
+            "dirty_threads": len(self._dirty),
+            "flushes": self.flushes,
+            "checkpoints_written": self.checkpoints_written,
+            "checkpoints_coalesced": self.checkpoints_coalesced,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": self.last_flush_ms,
+        }
@@ -0,0 +1,313 @@
+"""
+Retention and compaction for the conversation checkpoint DB.
+
+LangGraph writes a full state snapshot per graph step and never deletes
+any. Retention keeps the store bounded once it is turned on (both settings
+default to 0, which keeps everything):
+
+- only the latest CHECKPOINT_KEEP_LATEST checkpoints of each thread are
+  kept (the app only ever loads the latest one),
+- threads idle for more than CHECKPOINT_IDLE_TTL_DAYS are dropped. Last
+  activity comes from the newest checkpoint id, a time-ordered UUIDv6,
+- freed pages are returned to the filesystem by incremental vacuum, a few
+  pages at a time, so the writer lock is never held for long.
+
+PooledSqliteSaver runs this every CHECKPOINT_RETENTION_INTERVAL_SECONDS.
+For a one-off compaction (e.g. an existing DB that predates
+auto_vacuum=INCREMENTAL, which needs one full VACUUM to convert):
+
+    python -m app.core.checkpoint_retention --db chat-history.db --vacuum full
+"""
+
+import time
+import uuid
+import asyncio
+import logging
+from contextlib import nullcontext
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 100-ns intervals between the UUID epoch (1582-10-15) and the Unix epoch
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+_DELETE_BATCH = 500
+
+# Totals since process start, exported on /metrics
+retention_stats = {
+    "runs": 0,
+    "checkpoints_deleted": 0,
+    "writes_deleted": 0,
+    "threads_expired": 0,
+    "pages_vacuumed": 0,
+    "bytes_reclaimed": 0,
+    "last_run_ms": 0.0,
+}
+
+
+def checkpoint_time(checkpoint_id: str) -> float | None:
+    """Unix time encoded in a LangGraph (UUIDv6) checkpoint id."""
+    try:
+        value = uuid.UUID(checkpoint_id)
+    except (ValueError, TypeError):
+        return None
+    if value.version != 6:
+        return None
+    timestamp = ((value.int >> 80) << 12) | ((value.int >> 64) & 0x0FFF)
+    return (timestamp - _UUID_EPOCH_OFFSET) / 1e7
+
+
+async def _scalar(conn, sql: str) -> int:
+    async with conn.execute(sql) as cur:
+        row = await cur.fetchone()
+    return row[0] if row else 0
+
+
+async def db_bytes(conn) -> int:
+    """Allocated size of the main DB file (page_count * page_size)."""
+    return await _scalar(conn, "PRAGMA page_count") * await _scalar(conn, "PRAGMA page_size")
+
+
+# ---------------------------
+# PRUNING
+# ---------------------------
+async def _expired_threads(conn, lock, idle_ttl_seconds: float) -> list[str]:
+    if idle_ttl_seconds <= 0:
+        return []
+    cutoff = time.time() - idle_ttl_seconds
+    async with lock:
+        async with conn.execute("SELECT thread_id, MAX(checkpoint_id) FROM checkpoints GROUP BY thread_id") as cur:
+            rows = await cur.fetchall()
+    expired = []
+    for thread_id, latest_id in rows:
+        last_active = checkpoint_time(latest_id)
+        if last_active is not None and last_active < cutoff:
+            expired.append(thread_id)
+    return expired
+
+
+async def prune(conn, lock=None, keep_latest: int | None = None, idle_ttl_seconds: float | None = None) -> dict:
+    """
+    Delete expired threads and all but the latest `keep_latest` checkpoints
+    per thread, in small transactions under the writer `lock`.
+    """
+    keep_latest = settings.CHECKPOINT_KEEP_LATEST if keep_latest is None else keep_latest
+    if idle_ttl_seconds is None:
+        idle_ttl_seconds = settings.CHECKPOINT_IDLE_TTL_DAYS * 86400
+    lock = lock or nullcontext()
+    report = {"threads_expired": 0, "checkpoints_deleted": 0, "writes_deleted": 0}
+
+    expired = await _expired_threads(conn, lock, idle_ttl_seconds)
+    for start in range(0, len(expired), _DELETE_BATCH):
+        batch = expired[start:start + _DELETE_BATCH]
+        marks = ",".join("?" * len(batch))
+        async with lock:
+            cur = await conn.execute(f"DELETE FROM checkpoints WHERE thread_id IN ({marks})", batch)
+            report["checkpoints_deleted"] += cur.rowcount
+            cur = await conn.execute(f"DELETE FROM writes WHERE thread_id IN ({marks})", batch)
+            report["writes_deleted"] += cur.rowcount
+            await conn.commit()
+        report["threads_expired"] += len(batch)
+
+    if keep_latest > 0:
+        while True:
+            async with lock:
+                cur = await conn.execute(
+                    """
+                    DELETE FROM checkpoints WHERE rowid IN (
+                        SELECT rowid FROM (
+                            SELECT rowid, ROW_NUMBER() OVER (
+                                PARTITION BY thread_id, checkpoint_ns ORDER BY checkpoint_id DESC
+                            ) AS position
+                            FROM checkpoints
+                        )
+                        WHERE position > ?
+                        LIMIT ?
+                    )
+                    """,
+                    (keep_latest, _DELETE_BATCH),
+                )
+                deleted = cur.rowcount
+                await conn.commit()
+            report["checkpoints_deleted"] += deleted
+            if deleted < _DELETE_BATCH:
+                break
+            await asyncio.sleep(0)  # let queued turns take the writer
+
+        # Pending writes of checkpoints that no longer exist
+        async with lock:
+            cur = await conn.execute(
+                """
+                DELETE FROM writes WHERE NOT EXISTS (
+                    SELECT 1 FROM checkpoints c
+                    WHERE c.thread_id = writes.thread_id
+                      AND c.checkpoint_ns = writes.checkpoint_ns
+                      AND c.checkpoint_id = writes.checkpoint_id
+                )
+                """
+            )
+            report["writes_deleted"] += cur.rowcount
+            await conn.commit()
+    return report
+
+
+# ---------------------------
+# VACUUM
+# ---------------------------
+async def incremental_vacuum(conn, lock=None, batch_pages: int | None = None, pause: float = 0.05) -> int:
+    """Release free pages, `batch_pages` per transaction. Returns pages released."""
+    batch_pages = max(1, batch_pages or settings.CHECKPOINT_VACUUM_BATCH_PAGES)
+    lock = lock or nullcontext()
+    async with lock:
+        mode = await _scalar(conn, "PRAGMA auto_vacuum")
+    if mode != 2:  # 2 = INCREMENTAL; older files need one full VACUUM first
+        return 0
+    released = 0
+    while True:
+        async with lock:
+            free_before = await _scalar(conn, "PRAGMA freelist_count")
+            if not free_before:
+                break
+            # executescript steps the pragma to completion; execute() frees one page
+            await conn.executescript(f"PRAGMA incremental_vacuum({batch_pages});")
+            free_after = await _scalar(conn, "PRAGMA freelist_count")
+        released += free_before - free_after
+        if free_after == free_before:
+            break
+        await asyncio.sleep(pause)
+    return released
+
+
+async def full_vacuum(conn) -> None:
+    """Rewrite the whole file; also switches an old DB to incremental auto-vacuum."""
+    await conn.commit()
+    await conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    await conn.execute("VACUUM")
+    async with conn.execute("PRAGMA wal_checkpoint(TRUNCATE)") as cur:
+        await cur.fetchall()
+
+
+async def run_retention(conn, lock=None) -> dict:
+    """One pass: prune, then vacuum what was freed."""
+    started = time.perf_counter()
+    lock = lock or nullcontext()
+    async with lock:
+        size_before = await db_bytes(conn)
+    report = await prune(conn, lock)
+    report["pages_vacuumed"] = await incremental_vacuum(conn, lock)
+    async with lock:
+        size_after = await db_bytes(conn)
+    report["bytes_reclaimed"] = max(0, size_before - size_after)
+
+    retention_stats["runs"] += 1
+    for key in ("checkpoints_deleted", "writes_deleted", "threads_expired", "pages_vacuumed", "bytes_reclaimed"):
+        retention_stats[key] += report[key]
+    retention_stats["last_run_ms"] = round(1000 * (time.perf_counter() - started), 1)
+    if report["checkpoints_deleted"] or report["pages_vacuumed"]:
+        logger.info(
+            f"Checkpoint retention | deleted={report['checkpoints_deleted']} checkpoints, "
+            f"{report['writes_deleted']} writes, {report['threads_expired']} idle threads | "
+            f"reclaimed={report['bytes_reclaimed']} bytes"
+        )
+    return report
+
+
+# ---------------------------
+# CLI
+# ---------------------------
+async def _sample_latency(db_path: str, thread_ids: list[str]) -> dict:
+    """aget_tuple latency for the latest checkpoint of each sampled thread."""
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    from app.core.checkpointer import _connect
+    from app.core.checkpoint_serde import checkpoint_serde
+
+    saver = AsyncSqliteSaver(await _connect(db_path, read_only=True), serde=checkpoint_serde())
+    saver.is_setup = True
+    samples = []
+    try:
+        for thread_id in thread_ids:
+            started = time.perf_counter()
+            await saver.aget_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+            samples.append(time.perf_counter() - started)
+    finally:
+        await saver.conn.close()
+    if not samples:
+        return {"count": 0}
+    samples.sort()
+    return {
+        "count": len(samples),
+        "p50_ms": round(1000 * samples[len(samples) // 2], 3),
+        "p95_ms": round(1000 * samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "mean_ms": round(1000 * sum(samples) / len(samples), 3),
+    }
+
+
+async def compact(db_path: str, keep_latest: int, idle_ttl_days: float, vacuum: str, sample: int) -> dict:
+    import os
+    from app.core.checkpointer import _connect
+
+    def _files() -> int:
+        return sum(os.path.getsize(p) for p in (db_path, f"{db_path}-wal") if os.path.exists(p))
+
+    conn = await _connect(db_path)
+    try:
+        async with conn.execute(
+            "SELECT thread_id FROM checkpoints GROUP BY thread_id ORDER BY RANDOM() LIMIT ?", (sample,)
+        ) as cur:
+            thread_ids = [row[0] for row in await cur.fetchall()]
+        threads_before = await _scalar(conn, "SELECT COUNT(DISTINCT thread_id) FROM checkpoints")
+        checkpoints_before = await _scalar(conn, "SELECT COUNT(*) FROM checkpoints")
+        latency_before = await _sample_latency(db_path, thread_ids)
+        bytes_before = _files()
+
+        report = await prune(conn, keep_latest=keep_latest, idle_ttl_seconds=idle_ttl_days * 86400)
+        if vacuum == "full":
+            await full_vacuum(conn)
+        elif vacuum == "incremental":
+            report["pages_vacuumed"] = await incremental_vacuum(conn, pause=0)
+        async with conn.execute("PRAGMA wal_checkpoint(TRUNCATE)") as cur:
+            await cur.fetchall()
+
+        bytes_after = _files()
+        report.update({
+            "db": db_path,
+            "threads_before": threads_before,
+            "threads_after": await _scalar(conn, "SELECT COUNT(DISTINCT thread_id) FROM checkpoints"),
+            "checkpoints_before": checkpoints_before,
+            "checkpoints_after": await _scalar(conn, "SELECT COUNT(*) FROM checkpoints"),
+            "bytes_before": bytes_before,
+            "bytes_after": bytes_after,
+            "bytes_reclaimed": bytes_before - bytes_after,
+        })
+    finally:
+        await conn.close()
+    # Sampled threads may have expired; they then measure the miss path
+    report["aget_tuple_before"] = latency_before
+    report["aget_tuple_after"] = await _sample_latency(db_path, thread_ids)
+    return report
+
+
+def main():
+    import json
+    import argparse
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Prune and compact the checkpoint DB")
+    parser.add_argument("--db", default=settings.CHECKPOINT_DB_PATH)
+    parser.add_argument("--keep", type=int, default=settings.CHECKPOINT_KEEP_LATEST, help="checkpoints kept per thread (0 = all)")
+    parser.add_argument("--idle-days", type=float, default=settings.CHECKPOINT_IDLE_TTL_DAYS, help="drop threads idle longer (0 = never)")
+    parser.add_argument("--vacuum", default="full", choices=["full", "incremental", "none"])
+    parser.add_argument("--sample", type=int, default=200, help="threads sampled for aget_tuple latency")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(compact(args.db, args.keep, args.idle_days, args.vacuum, args.sample))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+        print(f"Report written to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
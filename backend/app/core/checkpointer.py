@@ -1,5 +1,44 @@
-from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver 
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from app.core.config import settings
+from app.core.checkpoint_retention import run_retention
+from app.core.checkpoint_cache import CachedCheckpointer
+from app.core.checkpoint_serde import checkpoint_serde
+from app.core.mongo_checkpointer import mongo_saver
+from contextlib import asynccontextmanager
 import aiosqlite
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _pragmas(read_only: bool = False) -> list[str]:
+    pragmas = [
+        "PRAGMA journal_mode=WAL",
+        # WAL + NORMAL: commits are atomic, durable once checkpointed; no fsync per turn
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA cache_size=-{settings.CHECKPOINT_CACHE_MB * 1024}",
+        f"PRAGMA mmap_size={settings.CHECKPOINT_MMAP_MB * 1024 * 1024}",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA busy_timeout=5000",
+        # Truncate the -wal file back to this size after each checkpoint
+        f"PRAGMA journal_size_limit={settings.CHECKPOINT_WAL_LIMIT_MB * 1024 * 1024}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    else:
+        # Lets retention hand freed pages back in small steps. Must precede
+        # journal_mode (which creates the file); on an existing file it only
+        # takes effect after `checkpoint_retention --vacuum full`
+        pragmas.insert(0, "PRAGMA auto_vacuum=INCREMENTAL")
+    return pragmas
+
+
+async def _connect(conn_string: str, read_only: bool = False) -> aiosqlite.Connection:
+    conn = await aiosqlite.connect(conn_string)
+    for pragma in _pragmas(read_only):
+        await conn.execute(pragma)
+    return conn
 
 
 class _LazyAioSqliteConn:
@@ -19,12 +58,12 @@ class _LazyAioSqliteConn:
         return self._conn is not None
 
     def __await__(self):
-        async def _connect():
+        async def _connect_once():
             if self._conn is None:
-                self._conn = await aiosqlite.connect(self._conn_string)
+                self._conn = await _connect(self._conn_string)
             return self._conn
 
-        return _connect().__await__()
+        return _connect_once().__await__()
 
     def __getattr__(self, attr: str):
         # Delegate attribute access to the underlying connection once it's created.
@@ -41,6 +80,148 @@ class _LazyAioSqliteConn:
             self._conn = None
 
 
+class PooledSqliteSaver(AsyncSqliteSaver):
+    """
+    AsyncSqliteSaver with one writer and a pool of reader connections.
+
+    - Writes (aput, aput_writes, deletes) keep going through the single
+      writer connection and its lock, as in AsyncSqliteSaver.
+    - aget_tuple / alist check out a reader, so loading a thread's state
+      never waits behind another thread's write. In WAL mode readers see
+      every committed write.
+    - A background task runs a PASSIVE WAL checkpoint every
+      CHECKPOINT_WAL_CHECKPOINT_SECONDS, so the -wal file stops growing.
+    - Another prunes old checkpoints and idle threads every
+      CHECKPOINT_RETENTION_INTERVAL_SECONDS (see checkpoint_retention).
+    """
+
+    def __init__(self, conn, conn_string: str, readers: int, **kwargs):
+        super().__init__(conn, **kwargs)
+        self.conn_string = conn_string
+        self.reader_count = max(0, readers)
+        self._readers: asyncio.Queue | None = None
+        self._reader_views: list[AsyncSqliteSaver] = []
+        self._checkpoint_task: asyncio.Task | None = None
+        self._retention_task: asyncio.Task | None = None
+        self.wal_checkpoints = 0
+
+    async def setup(self) -> None:
+        if self.is_setup and self._readers is not None:
+            return
+        await super().setup()
+        async with self.lock:
+            if self._readers is not None:
+                return
+            self._readers = asyncio.Queue()
+            for _ in range(self.reader_count):
+                # A read-only saver per reader connection reuses the parent's SQL
+                view = AsyncSqliteSaver(await _connect(self.conn_string, read_only=True), serde=self.serde)
+                view.is_setup = True
+                self._reader_views.append(view)
+                self._readers.put_nowait(view)
+            if settings.CHECKPOINT_WAL_CHECKPOINT_SECONDS > 0:
+                self._checkpoint_task = asyncio.create_task(self._checkpoint_loop())
+            if settings.CHECKPOINT_RETENTION_INTERVAL_SECONDS > 0:
+                self._retention_task = asyncio.create_task(self._retention_loop())
+
+    @asynccontextmanager
+    async def _reader(self):
+        await self.setup()
+        if not self.reader_count:
+            yield super()
+            return
+        view = await self._readers.get()
+        try:
+            yield view
+        finally:
+            self._readers.put_nowait(view)
+
+    async def aget_tuple(self, config):
+        async with self._reader() as reader:
+            return await reader.aget_tuple(config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        async with self._reader() as reader:
+            async for item in reader.alist(config, filter=filter, before=before, limit=limit):
+                yield item
+
+    async def wal_checkpoint(self, mode: str = "PASSIVE") -> tuple[int, int, int]:
+        """Run a WAL checkpoint; returns (busy, wal pages, pages checkpointed)."""
+        await self.setup()
+        async with self.lock:
+            async with self.conn.execute(f"PRAGMA wal_checkpoint({mode})") as cur:
+                row = await cur.fetchone()
+        self.wal_checkpoints += 1
+        return tuple(row)
+
+    async def _checkpoint_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.CHECKPOINT_WAL_CHECKPOINT_SECONDS)
+            try:
+                await self.wal_checkpoint()
+            except Exception as e:
+                logger.warning(f"WAL checkpoint failed: {e}")
+
+    async def _retention_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.CHECKPOINT_RETENTION_INTERVAL_SECONDS)
+            try:
+                await run_retention(self.conn, self.lock)
+            except Exception as e:
+                logger.warning(f"Checkpoint retention failed: {e}")
+
+    async def aclose(self) -> None:
+        for task in (self._checkpoint_task, self._retention_task):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._checkpoint_task = self._retention_task = None
+        if self.is_setup:
+            try:
+                # Fold the WAL back into the main file before exiting
+                await self.wal_checkpoint("TRUNCATE")
+            except Exception as e:
+                logger.warning(f"Final WAL checkpoint failed: {e}")
+        for view in self._reader_views:
+            await view.conn.close()
+        self._reader_views = []
+        self._readers = None
+        if isinstance(self.conn, _LazyAioSqliteConn):
+            await self.conn.aclose()
+        self.is_setup = False
+
+
 async def get_checkpointer():
-    # Return an AsyncSqliteSaver that uses a lazily-initialized connection object
-    return AsyncSqliteSaver(_LazyAioSqliteConn("chat-history.db"))
\ No newline at end of file
+    if settings.CHECKPOINT_BACKEND == "mongo":
+        # Shared by all workers, so no per-process cache in front of it
+        return mongo_saver(serde=checkpoint_serde())
+
+    # Return a pooled saver whose writer connection is lazily initialized
+    saver = PooledSqliteSaver(
+        _LazyAioSqliteConn(settings.CHECKPOINT_DB_PATH),
+        conn_string=settings.CHECKPOINT_DB_PATH,
+        readers=settings.CHECKPOINT_READERS,
+        serde=checkpoint_serde(),
+    )
+    if settings.CHECKPOINT_HOT_THREADS <= 0:
+        return saver
+    return CachedCheckpointer(
+        saver,
+        max_threads=settings.CHECKPOINT_HOT_THREADS,
+        flush_seconds=settings.CHECKPOINT_FLUSH_SECONDS,
+        max_dirty=settings.CHECKPOINT_FLUSH_MAX_DIRTY,
+    )
+
+
+async def close_checkpointer(checkpointer) -> None:
+    if isinstance(checkpointer, CachedCheckpointer):
+        # Write out buffered checkpoints before the DB goes away
+        await checkpointer.aclose()
+        checkpointer = checkpointer.saver
+    # aiosqlite runs a non-daemon worker thread per connection; close them on shutdown
+    if isinstance(checkpointer, PooledSqliteSaver):
+        await checkpointer.aclose()
+        return
+    conn = getattr(checkpointer, "conn", None)
+    if isinstance(conn, _LazyAioSqliteConn):
+        await conn.aclose()
@@ -1,15 +1,164 @@
+from typing import Literal
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
-    HF_TOKEN : str
+    HF_TOKEN : str = ""  # required unless MODEL_BACKEND="local"
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     CHAT_MODEL_REPO: str = "Qwen/Qwen2.5-7B-Instruct"
-    MONGO_URI: str
+    MONGO_URI: str = ""  # required unless MONGO_BACKEND="memory"
+    # "motor" (MongoDB) or "memory" (in-process stand-in, see app.db.memory)
+    MONGO_BACKEND: Literal["motor", "memory"] = "motor"
     FRONTEND_URL: str
     JWT_SECRET_KEY: str
     ALGORITHM: str = "HS256"
     JWT_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
-    
+
+    # "huggingface" (inference endpoints) or "local" (offline stand-ins for
+    # benchmarks and load tests; see app.core.local_models). Local vectors are
+    # not compatible with HF ones: re-ingest documents after switching.
+    MODEL_BACKEND: Literal["huggingface", "local"] = "huggingface"
+    LOCAL_CHAT_LATENCY_MS: float = 800
+    LOCAL_CHAT_LATENCY_DISTRIBUTION: Literal["fixed", "uniform", "normal", "lognormal"] = "lognormal"
+    LOCAL_CHAT_LATENCY_SPREAD: float = 0.3  # stddev / mean
+    LOCAL_EMBEDDING_LATENCY_MS: float = 40
+    LOCAL_EMBEDDING_LATENCY_DISTRIBUTION: Literal["fixed", "uniform", "normal", "lognormal"] = "lognormal"
+    LOCAL_EMBEDDING_LATENCY_SPREAD: float = 0.3
+    LOCAL_EMBEDDING_PER_TEXT_MS: float = 2
+    LOCAL_EMBEDDING_DIM: int = 384
+    LOCAL_MODEL_SEED: int | None = None
+
+    # Outbound model calls (one shared client per model, see app.core.llm)
+    CHAT_MAX_IN_FLIGHT: int = 8
+    EMBEDDING_MAX_IN_FLIGHT: int = 16
+    MODEL_MAX_RETRIES: int = 2
+    MODEL_RETRY_BACKOFF_SECONDS: float = 0.5
+    MODEL_RETRY_BACKOFF_MAX_SECONDS: float = 8.0
+
+    # Telemetry: node/span histograms on /metrics, and JSON trace logs keyed by
+    # thread_id (logger "app.trace"). Both off = no per-node overhead.
+    # /metrics only exists while METRICS_ENABLED; scrapers send
+    # "Authorization: Bearer <METRICS_TOKEN>" (empty = admin login only)
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: str = ""
+    TRACE_LOG_JSON: bool = False
+
+    # LangGraph conversation checkpoints: "sqlite" (CHECKPOINT_DB_PATH, a single
+    # process) or "mongo" (a collection in the app database, shared by every
+    # worker / pod; idle threads expire after CHECKPOINT_IDLE_TTL_DAYS)
+    CHECKPOINT_BACKEND: Literal["sqlite", "mongo"] = "sqlite"
+    CHECKPOINT_MONGO_COLLECTION: str = "checkpoints"
+    CHECKPOINT_DB_PATH: str = "chat-history.db"
+    # One writer plus this many reader connections (state loads); per-connection
+    # page cache / mmap sizes; background WAL checkpoint period (0 = off) and
+    # the size the -wal file is truncated back to afterwards
+    CHECKPOINT_READERS: int = 4
+    CHECKPOINT_CACHE_MB: int = 16
+    CHECKPOINT_MMAP_MB: int = 128
+    CHECKPOINT_WAL_CHECKPOINT_SECONDS: float = 30.0
+    CHECKPOINT_WAL_LIMIT_MB: int = 4
+    # Retention (opt-in; deleted history cannot be recovered): checkpoints kept
+    # per thread (0 = all), idle days before a thread is dropped (0 = never);
+    # both backends. SQLite only: pass period (0 = off) and pages freed per
+    # incremental-vacuum step (Mongo prunes a thread every KEEP_LATEST graph
+    # steps and expires idle threads with a TTL index)
+    CHECKPOINT_KEEP_LATEST: int = 0
+    CHECKPOINT_IDLE_TTL_DAYS: float = 0
+    CHECKPOINT_RETENTION_INTERVAL_SECONDS: float = 600
+    CHECKPOINT_VACUUM_BATCH_PAGES: int = 256
+    # Hot-thread cache (SQLite backend only): threads whose latest checkpoint
+    # stays in memory (0 = off). Saves are write-through unless
+    # CHECKPOINT_FLUSH_SECONDS > 0 (opt-in write-behind: buffered saves reach
+    # SQLite within that many seconds, or sooner once this many threads are
+    # waiting; a crash loses up to that window of acknowledged turns)
+    CHECKPOINT_HOT_THREADS: int = 2048
+    CHECKPOINT_FLUSH_SECONDS: float = 0
+    CHECKPOINT_FLUSH_MAX_DIRTY: int = 256
+    # Checkpoint blob compression: "none", "zlib" or "zstd" (needs zstandard);
+    # level None = codec default; smaller blobs are stored uncompressed
+    CHECKPOINT_COMPRESSION: Literal["none", "zlib", "zstd"] = "zlib"
+    CHECKPOINT_COMPRESSION_LEVEL: int | None = None
+    CHECKPOINT_COMPRESSION_MIN_BYTES: int = 256
+
+    # Tenant registry for validate_client(): client records / allowed hosts are
+    # cached this long (0 = always query), unknown client_ids for
+    # CLIENT_NEGATIVE_CACHE_SECONDS; at most CLIENT_CACHE_MAX_ENTRIES ids
+    CLIENT_CACHE_TTL_SECONDS: float = 60
+    CLIENT_NEGATIVE_CACHE_SECONDS: float = 30
+    CLIENT_CACHE_MAX_ENTRIES: int = 10000
+
+    # Vector store handle cache (one open Chroma store per client)
+    VECTORSTORE_CACHE_SIZE: int = 32
+    VECTORSTORE_IDLE_TTL_SECONDS: int = 15 * 60
+
+    # Retrieval thread pool (keeps Chroma queries off the event loop)
+    RETRIEVAL_MAX_WORKERS: int = 8
+    RETRIEVAL_QUEUE_DEPTH: int = 64
+    RETRIEVAL_TIMEOUT_SECONDS: float = 10.0
+
+    # Query-embedding cache (ingestion bypasses it)
+    EMBEDDING_CACHE_MAX_MB: int = 64
+    EMBEDDING_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    EMBEDDING_CACHE_PATH: str = ""  # e.g. app/storage/embedding_cache.sqlite3 to persist
+
+    # Semantic answer cache for rag_answer(); a cached answer is only reused for
+    # a question containing the same numbers ("30 days" vs "40 days")
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY: float = 0.95
+    ANSWER_CACHE_MAX_ENTRIES_PER_CLIENT: int = 512
+    ANSWER_CACHE_TTL_SECONDS: int = 60 * 60
+
+    # Embedding-centroid intent tier (between rules and the LLM)
+    INTENT_CENTROIDS_ENABLED: bool = True
+    INTENT_CENTROID_MARGIN: float = 0.05
+    INTENT_CENTROID_MIN_SCORE: float = 0.35
+    INTENT_CENTROIDS_PATH: str = "app/storage/intent_centroids.npz"
+
+    # When rag_node summarizes its answer for follow-ups:
+    # "inline" (before replying), "background" (after replying) or "lazy" (on the next follow-up)
+    CONTEXT_SUMMARY_MODE: Literal["inline", "background", "lazy"] = "lazy"
+
+    # Documents passed to the RAG prompt
+    RAG_TOP_K: int = 3
+
+    # Speculative retrieval while the intent is being classified (opt-in):
+    # comma-separated client_ids, or "*" for every tenant
+    SPECULATIVE_RETRIEVAL_CLIENTS: str = ""
+
+    # Document ingestion: PDF parsing/splitting runs in a process pool
+    # (0 workers = parse in a thread instead); running ingestions are capped
+    # globally and per tenant
+    INGEST_PROCESS_WORKERS: int = 2
+    INGEST_MAX_CONCURRENT: int = 2
+    INGEST_MAX_CONCURRENT_PER_CLIENT: int = 1
+    INGEST_CHUNK_SIZE: int = 800
+    INGEST_CHUNK_OVERLAP: int = 120
+    INGEST_PAGES_PER_TASK: int = 16
+
+    # Durable ingestion queue (SQLite, one worker per INGEST_MAX_CONCURRENT):
+    # jobs are leased while running and retried with exponential backoff
+    INGEST_QUEUE_PATH: str = "app/storage/ingest_queue.sqlite3"
+    INGEST_LEASE_SECONDS: float = 60.0
+    INGEST_MAX_ATTEMPTS: int = 3
+    INGEST_RETRY_BACKOFF_SECONDS: float = 30.0
+    INGEST_QUEUE_POLL_SECONDS: float = 2.0
+
+    # Indexing yields to chat traffic: it pauses while requests queue for the
+    # chat/embedding models or the retrieval pool is this saturated, for at
+    # most INGEST_THROTTLE_MAX_PAUSE_SECONDS at a time
+    INGEST_THROTTLE_SATURATION: float = 0.75
+    INGEST_THROTTLE_MAX_PAUSE_SECONDS: float = 30.0
+
+    # Ingestion embedding: chunks per request, concurrent requests per
+    # document, and retries of a failed batch (exponential backoff)
+    INGEST_EMBED_BATCH_SIZE: int = 32
+    INGEST_EMBED_MAX_IN_FLIGHT: int = 4
+    INGEST_EMBED_BATCH_RETRIES: int = 3
+    INGEST_EMBED_RETRY_BACKOFF_SECONDS: float = 1.0
+
+    # /admin/upload: largest accepted file, and the read/write chunk size
+    UPLOAD_MAX_BYTES: int = 25 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+
     model_config = {"env_file": ".env", "case_sensitive": False}
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
@@ -0,0 +1,256 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+import logging
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry bookkeeping cost on top of the float32 vector itself
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key normalization: collapse whitespace and casefold.
+    The default embedding model (all-MiniLM-L6-v2) is uncased, so casing
+    does not change the vector.
+    """
+    return " ".join(text.split()).casefold()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    LRU + TTL cache for query embeddings.
+
+    - Only embed_query()/aembed_query() are cached. embed_documents() always
+      goes to the wrapped model, so ingestion never reads or fills the cache.
+    - Keys are sha256(model name + normalized text).
+    - Memory is capped in bytes (vectors are stored as float32).
+    - If `db_path` is set, entries are also written to a local SQLite file
+      and looked up there on a memory miss, so the cache survives restarts.
+    """
+
+    def __init__(
+        self,
+        inner: Embeddings,
+        model_name: str,
+        max_bytes: int,
+        ttl_seconds: float,
+        db_path: str | None = None,
+    ):
+        self.inner = inner
+        self.model_name = model_name
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._entries: "OrderedDict[str, tuple[array, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.persisted_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            self._open_db(db_path)
+
+    # ---------------------------
+    # Embeddings interface
+    # ---------------------------
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.inner.embed_documents(texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.inner.aembed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._get_memory(key)
+        if vector is None and self._db is not None:
+            vector = self._get_persisted(key)
+        if vector is not None:
+            return vector
+
+        vector = self.inner.embed_query(text)
+        self._put(key, vector)
+        self._persist(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._get_memory(key)
+        if vector is None and self._db is not None:
+            vector = await asyncio.to_thread(self._get_persisted, key)
+        if vector is not None:
+            return vector
+
+        # Concurrent requests for the same text share one remote call
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            try:
+                vector = await asyncio.shield(inflight)
+                with self._lock:
+                    self.coalesced += 1
+                return list(vector)
+            except Exception:
+                pass  # the first caller failed; try ourselves
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            vector = await self.inner.aembed_query(text)
+        except BaseException as e:
+            future.set_exception(RuntimeError(f"embedding failed: {e!r}"))
+            future.exception()  # mark retrieved when nobody was waiting
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(vector)
+
+        self._put(key, vector)
+        if self._db is not None:
+            await asyncio.to_thread(self._persist, key, vector)
+        return vector
+
+    # ---------------------------
+    # Memory tier
+    # ---------------------------
+    def _key(self, text: str) -> str:
+        raw = f"{self.model_name}\x00{normalize_query(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _entry_size(vector: array) -> int:
+        return vector.itemsize * len(vector) + _ENTRY_OVERHEAD_BYTES
+
+    def _get_memory(self, key: str) -> list[float] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            vector, created_at = entry
+            if self.ttl > 0 and time.time() - created_at > self.ttl:
+                del self._entries[key]
+                self._bytes -= self._entry_size(vector)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector.tolist()
+
+    def _put(self, key: str, vector: list[float], created_at: float | None = None) -> None:
+        packed = array("f", vector)
+        size = self._entry_size(packed)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= self._entry_size(old[0])
+            self._entries[key] = (packed, created_at or time.time())
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(evicted)
+                self.evictions += 1
+
+    # ---------------------------
+    # Persistent tier (optional)
+    # ---------------------------
+    def _open_db(self, db_path: str) -> None:
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, "
+            "vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        if self.ttl > 0:
+            self._db.execute(
+                "DELETE FROM query_embeddings WHERE created_at < ?",
+                (time.time() - self.ttl,),
+            )
+        self._db.commit()
+
+    def _get_persisted(self, key: str) -> list[float] | None:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT vector, created_at FROM query_embeddings WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        blob, created_at = row
+        if self.ttl > 0 and time.time() - created_at > self.ttl:
+            return None
+        vector = array("f")
+        vector.frombytes(blob)
+        values = vector.tolist()
+        self._put(key, values, created_at=created_at)
+        with self._lock:
+            # The memory lookup already counted a miss
+            self.misses -= 1
+            self.hits += 1
+            self.persisted_hits += 1
+        return values
+
+    def _persist(self, key: str, vector: list[float]) -> None:
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, model, vector, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, self.model_name, array("f", vector).tobytes(), time.time()),
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache persist failed: {e}")
+
+    # ---------------------------
+    # Stats / maintenance
+    # ---------------------------
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "persisted_hits": self.persisted_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self.coalesced,
+                "persistent": self._db is not None,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM query_embeddings")
+                self._db.commit()
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
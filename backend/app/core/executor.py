@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import contextvars
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorOverloaded(RuntimeError):
+    """Raised when a bounded executor's queue is full."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool for blocking work called from async code.
+
+    - `max_workers` threads run jobs; at most `queue_depth` more may wait.
+      Submissions beyond that are rejected with ExecutorOverloaded instead
+      of piling up behind a slow backend.
+    - Each call is awaited with a timeout. A timed-out job keeps its thread
+      until it finishes (threads cannot be killed), so it still counts
+      towards saturation.
+    - Jobs run in a copy of the caller's context (like asyncio.to_thread),
+      so spans inside them keep the current node and thread_id.
+    """
+
+    def __init__(self, name: str, max_workers: int, queue_depth: int, timeout: float | None):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.queue_depth = max(0, queue_depth)
+        self.timeout = timeout
+        self._pool: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0  # running + queued
+        self._running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.peak_pending = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix=self.name,
+                    )
+        return self._pool
+
+    async def run(self, fn, *args, timeout: float | None = None, **kwargs):
+        with self._lock:
+            if self._pending >= self.max_workers + self.queue_depth:
+                self.rejected += 1
+                raise ExecutorOverloaded(
+                    f"{self.name} executor saturated "
+                    f"({self._pending} pending, limit {self.max_workers + self.queue_depth})"
+                )
+            self._pending += 1
+            self.submitted += 1
+            self.peak_pending = max(self.peak_pending, self._pending)
+
+        queued_at = time.perf_counter()
+
+        def _job():
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+                self.total_wait += started - queued_at
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+                    self.completed += 1
+                    self.total_run += time.perf_counter() - started
+
+        def _release_if_cancelled(f):
+            # A job cancelled before it started never runs _job's cleanup
+            if f.cancelled():
+                with self._lock:
+                    self._pending -= 1
+
+        try:
+            future = self._get_pool().submit(contextvars.copy_context().run, _job)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(_release_if_cancelled)
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            # On timeout/cancellation wrap_future cancels the job if it has not
+            # started yet; a running job finishes in the background.
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout or None)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+
+    def saturation(self) -> float:
+        """Fraction of worker threads busy (>1.0 means jobs are queueing)."""
+        with self._lock:
+            return self._pending / self.max_workers
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self.queue_depth,
+                "running": self._running,
+                "queued": max(0, self._pending - self._running),
+                "saturation": round(self._pending / self.max_workers, 4),
+                "peak_pending": self.peak_pending,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "avg_wait_ms": round(1000 * self.total_wait / self.completed, 3) if self.completed else 0.0,
+                "avg_run_ms": round(1000 * self.total_run / self.completed, 3) if self.completed else 0.0,
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
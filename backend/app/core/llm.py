@@ -1,22 +1,127 @@
 from langchain_huggingface import (ChatHuggingFace, HuggingFaceEndpoint, HuggingFaceEndpointEmbeddings)
 from app.core.config import settings
+from app.core.embedding_cache import CachedEmbeddings
+from app.core.model_clients import ModelClient, ManagedChatModel, ManagedEmbeddings
+from app.core.local_models import LatencyModel, LocalChatModel, HashingEmbeddings
+import threading
 
-# embedding model
-def get_embedding_model():
-    return HuggingFaceEndpointEmbeddings(
-        model=settings.EMBEDDING_MODEL,
-        huggingfacehub_api_token=settings.HF_TOKEN,
-    )
+# =========================
+# MODEL CLIENT REGISTRY
+# =========================
+# One shared client per model for the whole process: every call site reuses
+# the same HTTP sessions and the same in-flight cap, retries and metrics.
+class ModelRegistry:
+    def __init__(self):
+        self._models: dict[tuple[str, str], object] = {}
+        self._clients: dict[str, ModelClient] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind: str, name: str, factory):
+        with self._lock:
+            model = self._models.get((kind, name))
+            if model is None:
+                model = factory()
+                self._models[(kind, name)] = model
+                self._clients[f"{kind}:{name}"] = model.client
+            return model
+
+    def embeddings(self, name: str) -> ManagedEmbeddings:
+        def _build():
+            if settings.MODEL_BACKEND == "local":
+                inner = HashingEmbeddings(
+                    dim=settings.LOCAL_EMBEDDING_DIM,
+                    latency=LatencyModel(
+                        settings.LOCAL_EMBEDDING_LATENCY_MS,
+                        settings.LOCAL_EMBEDDING_LATENCY_DISTRIBUTION,
+                        settings.LOCAL_EMBEDDING_LATENCY_SPREAD,
+                        seed=settings.LOCAL_MODEL_SEED,
+                    ),
+                    per_text_ms=settings.LOCAL_EMBEDDING_PER_TEXT_MS,
+                )
+            else:
+                inner = HuggingFaceEndpointEmbeddings(
+                    model=name,
+                    huggingfacehub_api_token=settings.HF_TOKEN,
+                )
+            return ManagedEmbeddings(
+                inner=inner,
+                client=_new_client(f"embeddings:{name}", settings.EMBEDDING_MAX_IN_FLIGHT),
+            )
+        return self._get("embeddings", name, _build)
+
+    def chat(self, repo_id: str) -> ManagedChatModel:
+        def _build():
+            if settings.MODEL_BACKEND == "local":
+                inner = LocalChatModel(
+                    latency=LatencyModel(
+                        settings.LOCAL_CHAT_LATENCY_MS,
+                        settings.LOCAL_CHAT_LATENCY_DISTRIBUTION,
+                        settings.LOCAL_CHAT_LATENCY_SPREAD,
+                        seed=settings.LOCAL_MODEL_SEED,
+                    )
+                )
+            else:
+                llm = HuggingFaceEndpoint(
+                    repo_id=repo_id,
+                    task="text-generation",
+                    huggingfacehub_api_token=settings.HF_TOKEN,
+                )
+                inner = ChatHuggingFace(llm=llm)
+            return ManagedChatModel(
+                inner=inner,
+                client=_new_client(f"chat:{repo_id}", settings.CHAT_MAX_IN_FLIGHT),
+            )
+        return self._get("chat", repo_id, _build)
 
-# chat model
-def get_chat_model():
-    llm = HuggingFaceEndpoint(
-        repo_id=settings.CHAT_MODEL_REPO,
-        task="text-generation",
-        huggingfacehub_api_token=settings.HF_TOKEN,
+    def stats(self) -> dict:
+        with self._lock:
+            clients = dict(self._clients)
+        return {name: client.stats() for name, client in clients.items()}
+
+
+def _new_client(name: str, max_in_flight: int) -> ModelClient:
+    return ModelClient(
+        name=name,
+        max_in_flight=max_in_flight,
+        max_retries=settings.MODEL_MAX_RETRIES,
+        backoff_base=settings.MODEL_RETRY_BACKOFF_SECONDS,
+        backoff_max=settings.MODEL_RETRY_BACKOFF_MAX_SECONDS,
     )
-    return ChatHuggingFace(llm=llm)
+
+
+model_registry = ModelRegistry()
+
+
+def embedding_model_name() -> str:
+    """Identifies the vector space, for cache keys (the local backend differs)."""
+    if settings.MODEL_BACKEND == "local":
+        return f"local-hashing-{settings.LOCAL_EMBEDDING_DIM}"
+    return settings.EMBEDDING_MODEL
+
+
+# embedding model (shared; uncached, e.g. for ingestion)
+def get_embedding_model() -> ManagedEmbeddings:
+    return model_registry.embeddings(settings.EMBEDDING_MODEL)
+
+# query embedding model (cached; use get_embedding_model() to bypass, e.g. ingestion)
+_query_embedding_model = None
+
+def get_query_embedding_model() -> CachedEmbeddings:
+    global _query_embedding_model
+    if _query_embedding_model is None:
+        _query_embedding_model = CachedEmbeddings(
+            inner=get_embedding_model(),
+            model_name=embedding_model_name(),
+            max_bytes=settings.EMBEDDING_CACHE_MAX_MB * 1024 * 1024,
+            ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+            db_path=settings.EMBEDDING_CACHE_PATH or None,
+        )
+    return _query_embedding_model
+
+# chat model (shared)
+def get_chat_model() -> ManagedChatModel:
+    return model_registry.chat(settings.CHAT_MODEL_REPO)
 
 # module-level instances
 embedding_model = get_embedding_model()
-chat_model = get_chat_model()
\ No newline at end of file
+chat_model = get_chat_model()
@@ -0,0 +1,203 @@
+"""
+Local stand-ins for the HuggingFace chat and embedding models
+(MODEL_BACKEND="local"), for benchmarks, load tests and offline runs.
+
+- LocalChatModel answers deterministically from the prompt: valid intent
+  JSON for the classifier, a sentence from the CONTEXT for RAG prompts, the
+  first sentence for summaries, and a canned reply otherwise.
+- HashingEmbeddings maps word unigrams/bigrams into a fixed-size vector with
+  the hashing trick, so similar texts get similar vectors without a model.
+
+Both sleep for a latency drawn from a configurable distribution.
+"""
+
+import re
+import math
+import time
+import random
+import asyncio
+import hashlib
+import threading
+from typing import Any, AsyncIterator, Iterator, Literal
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+Distribution = Literal["fixed", "uniform", "normal", "lognormal"]
+
+
+class LatencyModel:
+    """
+    Draws simulated call latencies (seconds) with the given mean.
+    `spread` is the coefficient of variation (stddev / mean).
+    """
+
+    def __init__(self, mean_ms: float, distribution: Distribution = "fixed", spread: float = 0.0, seed: int | None = None):
+        self.mean = max(0.0, mean_ms) / 1000
+        self.distribution = distribution
+        self.spread = max(0.0, spread)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        if self.mean == 0:
+            return 0.0
+        with self._lock:
+            if self.distribution == "uniform":
+                half_width = self.mean * self.spread * math.sqrt(3)
+                value = self._rng.uniform(self.mean - half_width, self.mean + half_width)
+            elif self.distribution == "normal":
+                value = self._rng.gauss(self.mean, self.mean * self.spread)
+            elif self.distribution == "lognormal":
+                sigma = math.sqrt(math.log(1 + self.spread ** 2))
+                value = self._rng.lognormvariate(math.log(self.mean) - sigma ** 2 / 2, sigma)
+            else:
+                value = self.mean
+        return max(0.0, value)
+
+
+# ---------------------------
+# Chat
+# ---------------------------
+_CLASSIFIER_MESSAGE_RE = re.compile(r"intent classifier.*?Message:\s*(.*?)\n\s*\n", re.S)
+_RAG_CONTEXT_RE = re.compile(r"QUESTION:\s*(.*?)\n\s*\nCONTEXT:\n(.*)", re.S)
+_SUMMARY_RE = re.compile(r"^Summarize[^\n]*:\s*(.*)", re.S)
+
+_ESCALATION_WORDS = ("human", "agent", "ticket", "representative", "escalate", "complaint")
+_FOLLOWUP_WORDS = ("what about", "and if", "how about", "also", "that", "it ", "more")
+_OUT_OF_SCOPE_WORDS = ("weather", "movie", "celebrity", "football", "cricket", "recipe", "joke", "song")
+_GREETING_WORDS = ("hi", "hello", "hey", "thanks", "thank you", "bye")
+_SMALL_TALK_WORDS = ("ok", "okay", "hmm", "got it", "cool", "great")
+
+LOCAL_SMALL_TALK_ANSWER = "Thanks for reaching out! How can I help you today?"
+
+
+def _first_sentences(text: str, count: int) -> str:
+    sentences = re.split(r"(?<=[.!?])\s+", " ".join(text.split()))
+    return " ".join(sentences[:count]).strip()
+
+
+def _local_intent(message: str) -> str:
+    text = " ".join(message.casefold().split())
+    words = text.strip("?!. ")
+    if any(w in text for w in _ESCALATION_WORDS):
+        return "escalation_request"
+    if any(w in text for w in _OUT_OF_SCOPE_WORDS):
+        return "out_of_scope"
+    if words in _GREETING_WORDS:
+        return "greeting"
+    if words in _SMALL_TALK_WORDS:
+        return "small_talk"
+    if any(text.startswith(w) or f" {w}" in text for w in _FOLLOWUP_WORDS):
+        return "followup"
+    return "faq"
+
+
+def local_reply(prompt: str) -> str:
+    """Deterministic reply for the prompts this app sends."""
+    match = _CLASSIFIER_MESSAGE_RE.search(prompt)
+    if match:
+        return f'{{"intent": "{_local_intent(match.group(1))}"}}'
+
+    match = _RAG_CONTEXT_RE.search(prompt)
+    if match:
+        return _first_sentences(match.group(2), 2) or "I don't have that information."
+
+    match = _SUMMARY_RE.search(prompt.strip())
+    if match:
+        return _first_sentences(match.group(1), 1)
+
+    return LOCAL_SMALL_TALK_ANSWER
+
+
+class LocalChatModel(BaseChatModel):
+    latency: Any  # LatencyModel for the whole reply
+    first_token_share: float = 0.3  # part of the latency before the first streamed token
+
+    @property
+    def _llm_type(self) -> str:
+        return "local-chat"
+
+    @staticmethod
+    def _prompt(messages: list[BaseMessage]) -> str:
+        return "\n".join(str(m.content) for m in messages)
+
+    def _result(self, messages: list[BaseMessage]) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=local_reply(self._prompt(messages))))])
+
+    def _chunks(self, messages: list[BaseMessage]) -> tuple[list[str], float, float]:
+        words = re.findall(r"\S+\s*", local_reply(self._prompt(messages))) or [""]
+        total = self.latency.sample()
+        first = total * self.first_token_share
+        return words, first, (total - first) / len(words)
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency.sample())
+        return self._result(messages)
+
+    async def _agenerate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency.sample())
+        return self._result(messages)
+
+    def _stream(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        words, first, per_word = self._chunks(messages)
+        time.sleep(first)
+        for word in words:
+            time.sleep(per_word)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+    async def _astream(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        words, first, per_word = self._chunks(messages)
+        await asyncio.sleep(first)
+        for word in words:
+            await asyncio.sleep(per_word)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+
+# ---------------------------
+# Embeddings
+# ---------------------------
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Feature-hashed bag of words + bigrams, L2-normalized.
+    Each call sleeps `latency` plus `per_text_ms` for every text in the batch.
+    """
+
+    def __init__(self, dim: int, latency: LatencyModel, per_text_ms: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+        self.per_text = per_text_ms / 1000
+
+    def _embed(self, text: str) -> list[float]:
+        tokens = _TOKEN_RE.findall(text.casefold())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        vector = [0.0] * self.dim
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def _delay(self, count: int) -> float:
+        return self.latency.sample() + self.per_text * count
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self._delay(len(texts)))
+        return [self._embed(t) for t in texts]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(self._delay(len(texts)))
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        time.sleep(self._delay(1))
+        return self._embed(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        await asyncio.sleep(self._delay(1))
+        return self._embed(text)
@@ -0,0 +1,336 @@
+"""
+Managed wrappers for outbound model calls (see app.core.llm.ModelRegistry).
+
+Every call to the wrapped chat / embedding model goes through a ModelClient:
+- at most `max_in_flight` concurrent calls per model, shared by async
+  callers and worker threads (e.g. Chroma embedding queries in the
+  retrieval pool),
+- retries of transient failures (timeouts, 429, 5xx) with full-jitter
+  exponential backoff; the slot is released while backing off,
+- latency / error counters exposed via stats(), and a telemetry span
+  per attempt.
+"""
+
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, AsyncIterator, Iterator
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult, ChatGenerationChunk
+from app.core.telemetry import span
+
+logger = logging.getLogger(__name__)
+
+_RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+_LATENCY_SAMPLES = 1024
+
+
+def is_retryable(exc: BaseException) -> bool:
+    response = getattr(exc, "response", None)
+    status = (
+        getattr(response, "status_code", None)
+        or getattr(response, "status", None)
+        or getattr(exc, "status", None)
+    )
+    if isinstance(status, int):
+        return status in _RETRYABLE_STATUS
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    name = type(exc).__name__
+    return "Timeout" in name or "Connect" in name
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyLimiter:
+    """
+    Counting semaphore usable from both threads and coroutines, FIFO.
+    A released slot is handed straight to the oldest waiter.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _try_acquire(self) -> bool:
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            return True
+        return False
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._try_acquire():
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_acquire():
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                    handed_over = False
+                except ValueError:
+                    handed_over = True
+            if handed_over:
+                self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self.in_flight -= 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+            return
+        loop, future = waiter
+        try:
+            loop.call_soon_threadsafe(_wake, future)
+        except RuntimeError:
+            # The waiter's loop is gone; pass the slot on
+            self.release()
+
+
+class ModelClient:
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+    ):
+        self.name = name
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = ConcurrencyLimiter(max_in_flight)
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_seconds = 0.0
+        self.last_error: str | None = None
+        self._latencies: deque = deque(maxlen=_LATENCY_SAMPLES)
+
+    # ---------------------------
+    # Bookkeeping
+    # ---------------------------
+    def _record(self, started: float, error: BaseException | None = None) -> None:
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self.calls += 1
+            self.total_seconds += elapsed
+            self._latencies.append(elapsed)
+            if error is not None:
+                self.errors += 1
+                self.last_error = f"{type(error).__name__}: {error}"
+
+    def _retry_delay(self, exc: Exception, attempt: int) -> float | None:
+        """Backoff before the next attempt, or None to give up."""
+        if attempt >= self.max_retries or not is_retryable(exc):
+            return None
+        with self._stats_lock:
+            self.retries += 1
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        logger.warning(
+            f"Model call failed, retrying | model={self.name} | attempt={attempt + 1} | "
+            f"delay={delay:.2f}s | error={exc!r}"
+        )
+        return delay
+
+    # ---------------------------
+    # Calls
+    # ---------------------------
+    def call(self, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                with span("model", self.name, attempt=attempt):
+                    result = fn(*args, **kwargs)
+            except Exception as e:
+                self._record(started, e)
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                self._record(started)
+                return result
+            finally:
+                self.limiter.release()
+            attempt += 1
+            time.sleep(delay)
+
+    async def acall(self, fn, *args, **kwargs):
+        attempt = 0
+        while True:
+            await self.limiter.aacquire()
+            started = time.perf_counter()
+            try:
+                with span("model", self.name, attempt=attempt):
+                    result = await fn(*args, **kwargs)
+            except Exception as e:
+                self._record(started, e)
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                self._record(started)
+                return result
+            finally:
+                self.limiter.release()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def astream(self, make_stream) -> AsyncIterator:
+        """Stream from `make_stream()`; only retried if nothing was yielded yet."""
+        attempt = 0
+        while True:
+            await self.limiter.aacquire()
+            started = time.perf_counter()
+            yielded = False
+            try:
+                with span("model", self.name, attempt=attempt, stream=True):
+                    async for item in make_stream():
+                        yielded = True
+                        yield item
+            except Exception as e:
+                self._record(started, e)
+                delay = None if yielded else self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                self._record(started)
+                return
+            finally:
+                self.limiter.release()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def stream(self, make_stream) -> Iterator:
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            started = time.perf_counter()
+            yielded = False
+            try:
+                with span("model", self.name, attempt=attempt, stream=True):
+                    for item in make_stream():
+                        yielded = True
+                        yield item
+            except Exception as e:
+                self._record(started, e)
+                delay = None if yielded else self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                self._record(started)
+                return
+            finally:
+                self.limiter.release()
+            attempt += 1
+            time.sleep(delay)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            samples = sorted(self._latencies)
+            calls, errors = self.calls, self.errors
+
+            def _pct(p: float) -> float | None:
+                if not samples:
+                    return None
+                return round(1000 * samples[min(len(samples) - 1, int(p * len(samples)))], 1)
+
+            return {
+                "max_in_flight": self.limiter.limit,
+                "in_flight": self.limiter.in_flight,
+                "peak_in_flight": self.limiter.peak_in_flight,
+                "waiting": self.limiter.waiting,
+                "calls": calls,
+                "errors": errors,
+                "error_rate": round(errors / calls, 4) if calls else 0.0,
+                "retries": self.retries,
+                "avg_ms": round(1000 * self.total_seconds / calls, 1) if calls else None,
+                "p50_ms": _pct(0.50),
+                "p95_ms": _pct(0.95),
+                "last_error": self.last_error,
+            }
+
+
+class ManagedChatModel(BaseChatModel):
+    """Chat model that routes every generation through a shared ModelClient."""
+
+    inner: Any
+    client: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return f"managed-{self.inner._llm_type}"
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return self.client.call(
+            self.inner._generate, messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+
+    async def _agenerate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return await self.client.acall(
+            self.inner._agenerate, messages, stop=stop, run_manager=run_manager, **kwargs
+        )
+
+    # Token callbacks are emitted by BaseChatModel for the chunks we yield
+    def _stream(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        yield from self.client.stream(lambda: self.inner._stream(messages, stop=stop, **kwargs))
+
+    async def _astream(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in self.client.astream(lambda: self.inner._astream(messages, stop=stop, **kwargs)):
+            yield chunk
+
+
+class ManagedEmbeddings(Embeddings):
+    """Embeddings that route every call through a shared ModelClient."""
+
+    def __init__(self, inner: Embeddings, client: ModelClient):
+        self.inner = inner
+        self.client = client
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.client.call(self.inner.embed_documents, texts)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.client.acall(self.inner.aembed_documents, texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.client.call(self.inner.embed_query, text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.client.acall(self.inner.aembed_query, text)
@@ -0,0 +1,257 @@
+"""
+LangGraph checkpointer on MongoDB (CHECKPOINT_BACKEND="mongo").
+
+Conversation state lives in the app's Mongo database instead of a local
+SQLite file, so any uvicorn worker or pod can serve any thread:
+
+- `<CHECKPOINT_MONGO_COLLECTION>` holds one document per checkpoint,
+  unique on (thread_id, checkpoint_ns, checkpoint_id); the latest one is
+  an index-backed find_one sorted by checkpoint_id (UUIDv6, time ordered),
+- `<CHECKPOINT_MONGO_COLLECTION>_writes` holds pending writes, unique on
+  (thread_id, checkpoint_ns, checkpoint_id, task_id, idx),
+- every write is an idempotent upsert, so concurrent workers and retried
+  requests never conflict,
+- every CHECKPOINT_KEEP_LATEST graph steps of a thread (0 = keep all),
+  checkpoints and their writes older than its CHECKPOINT_KEEP_LATEST
+  newest are deleted, so a thread holds at most twice that many and most
+  puts pay nothing for retention,
+- a TTL index on `created_at` removes checkpoints and writes after
+  CHECKPOINT_IDLE_TTL_DAYS (0 = keep forever, and an existing TTL index is
+  dropped). An active thread keeps writing fresh checkpoints, so only idle
+  threads disappear.
+
+Blobs go through the same serializer as the SQLite saver (checkpoint_serde).
+With MONGO_BACKEND="memory" it runs on the in-process stand-in
+(app.db.memory), which keeps data per process and ignores indexes.
+"""
+
+import json
+import random
+import asyncio
+import logging
+from datetime import datetime, timezone
+from pymongo.errors import OperationFailure
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from app.core.config import settings
+from app.core.checkpoint_retention import retention_stats
+
+logger = logging.getLogger(__name__)
+
+_TTL_INDEX = "created_at_ttl"
+_INDEX_NOT_FOUND = 27
+
+
+class MongoSaver(BaseCheckpointSaver):
+    def __init__(self, db, collection: str, ttl_seconds: float = 0, keep_latest: int = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.checkpoints = db[collection]
+        self.writes = db[f"{collection}_writes"]
+        self.ttl_seconds = ttl_seconds
+        self.keep_latest = keep_latest
+        self._db = db
+        self._setup_lock = asyncio.Lock()
+        self.is_setup = False
+
+    async def setup(self) -> None:
+        """Create the indexes once per process (create_index is idempotent)."""
+        if self.is_setup:
+            return
+        async with self._setup_lock:
+            if self.is_setup:
+                return
+            await self.checkpoints.create_index(
+                [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", -1)], unique=True
+            )
+            await self.writes.create_index(
+                [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", 1), ("task_id", 1), ("idx", 1)],
+                unique=True,
+            )
+            for collection in (self.checkpoints, self.writes):
+                await self._ttl_index(collection)
+            self.is_setup = True
+
+    async def _ttl_index(self, collection) -> None:
+        """Create, update or (TTL 0) drop the created_at TTL index."""
+        ttl = int(self.ttl_seconds)
+        current = (await collection.index_information()).get(_TTL_INDEX)
+        if ttl <= 0:
+            if current is None:
+                return
+            logger.info(f"Dropping checkpoint TTL index on {collection.name}")
+            try:
+                await collection.drop_index(_TTL_INDEX)
+            except OperationFailure as e:
+                # Another worker dropped it first
+                if e.code != _INDEX_NOT_FOUND:
+                    raise
+        elif current is None:
+            await collection.create_index("created_at", name=_TTL_INDEX, expireAfterSeconds=ttl)
+        elif current.get("expireAfterSeconds") != ttl:
+            # The TTL changed since the index was built: update it in place
+            logger.info(f"Updating checkpoint TTL index on {collection.name} | {current.get('expireAfterSeconds')}s -> {ttl}s")
+            await self._db.command({"collMod": collection.name, "index": {"name": _TTL_INDEX, "expireAfterSeconds": ttl}})
+
+    def get_next_version(self, current, channel):
+        # Same format as the SQLite savers, so threads can move between backends
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # ---------------------------
+    # Reads
+    # ---------------------------
+    async def _pending_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list:
+        cursor = self.writes.find(
+            {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id},
+            {"_id": 0, "task_id": 1, "channel": 1, "type": 1, "value": 1},
+        ).sort([("task_id", 1), ("idx", 1)])
+        return [
+            (w["task_id"], w["channel"], self.serde.loads_typed((w["type"], w["value"])))
+            async for w in cursor
+        ]
+
+    async def _to_tuple(self, doc: dict) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id = doc["thread_id"], doc["checkpoint_ns"], doc["checkpoint_id"]
+        parent_id = doc.get("parent_checkpoint_id")
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=self.serde.loads_typed((doc["type"], doc["checkpoint"])),
+            metadata=json.loads(doc["metadata"]),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=await self._pending_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    async def aget_tuple(self, config) -> CheckpointTuple | None:
+        await self.setup()
+        query = {
+            "thread_id": str(config["configurable"]["thread_id"]),
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+        }
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            doc = await self.checkpoints.find_one({**query, "checkpoint_id": checkpoint_id}, {"_id": 0})
+        else:
+            doc = await self.checkpoints.find_one(query, {"_id": 0}, sort=[("checkpoint_id", -1)])
+        return await self._to_tuple(doc) if doc else None
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        await self.setup()
+        query = {}
+        if config is not None:
+            query["thread_id"] = str(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                query["checkpoint_ns"] = config["configurable"]["checkpoint_ns"]
+            if checkpoint_id := get_checkpoint_id(config):
+                query["checkpoint_id"] = checkpoint_id
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            query["checkpoint_id"] = {"$lt": before_id}
+
+        cursor = self.checkpoints.find(query, {"_id": 0}).sort([("checkpoint_id", -1)])
+        if limit and not filter:
+            cursor = cursor.limit(limit)
+        returned = 0
+        async for doc in cursor:
+            # Metadata is stored as JSON bytes (as in SQLite), so filter here
+            if filter:
+                metadata = json.loads(doc["metadata"])
+                if any(metadata.get(k) != v for k, v in filter.items()):
+                    continue
+            yield await self._to_tuple(doc)
+            returned += 1
+            if limit and returned >= limit:
+                break
+
+    # ---------------------------
+    # Writes
+    # ---------------------------
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        await self.setup()
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, data = self.serde.dumps_typed(checkpoint)
+        metadata = get_checkpoint_metadata(config, metadata)
+        key = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}
+        await self.checkpoints.update_one(
+            key,
+            {"$set": {
+                "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+                "type": type_,
+                "checkpoint": data,
+                "metadata": json.dumps(metadata, ensure_ascii=False).encode("utf-8", "ignore"),
+                "created_at": datetime.now(timezone.utc),
+            }},
+            upsert=True,
+        )
+        if self.keep_latest > 0 and self._prune_due(metadata.get("step")):
+            await self._prune(thread_id, checkpoint_ns)
+        return {"configurable": key}
+
+    def _prune_due(self, step) -> bool:
+        # The graph step grows by one per checkpoint of a thread and is the
+        # same on every worker; without one, prune every time
+        return not isinstance(step, int) or step % self.keep_latest == 0
+
+    async def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Delete everything older than the keep_latest newest checkpoints of one thread."""
+        query = {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns}
+        # The newest checkpoint past the limit (index-only); none = nothing to prune
+        cursor = self.checkpoints.find(query, {"_id": 0, "checkpoint_id": 1}).sort([("checkpoint_id", -1)])
+        newest_pruned = await cursor.skip(self.keep_latest).limit(1).to_list(1)
+        if not newest_pruned:
+            return
+        older = {**query, "checkpoint_id": {"$lte": newest_pruned[0]["checkpoint_id"]}}
+        checkpoints = await self.checkpoints.delete_many(older)
+        writes = await self.writes.delete_many(older)
+        retention_stats["checkpoints_deleted"] += checkpoints.deleted_count
+        retention_stats["writes_deleted"] += writes.deleted_count
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        await self.setup()
+        key = {
+            "thread_id": str(config["configurable"]["thread_id"]),
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+            "checkpoint_id": config["configurable"]["checkpoint_id"],
+            "task_id": task_id,
+        }
+        # Special channels overwrite; regular writes keep the first value (as in SQLite)
+        op = "$set" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "$setOnInsert"
+        now = datetime.now(timezone.utc)
+        updates = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, data = self.serde.dumps_typed(value)
+            updates.append(self.writes.update_one(
+                {**key, "idx": WRITES_IDX_MAP.get(channel, idx)},
+                {op: {"task_path": task_path, "channel": channel, "type": type_, "value": data, "created_at": now}},
+                upsert=True,
+            ))
+        await asyncio.gather(*updates)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.setup()
+        await self.checkpoints.delete_many({"thread_id": str(thread_id)})
+        await self.writes.delete_many({"thread_id": str(thread_id)})
+
+
+def mongo_saver(serde=None) -> MongoSaver:
+    from app.db.mongodb import db
+
+    return MongoSaver(
+        db,
+        collection=settings.CHECKPOINT_MONGO_COLLECTION,
+        ttl_seconds=settings.CHECKPOINT_IDLE_TTL_DAYS * 86400,
+        keep_latest=settings.CHECKPOINT_KEEP_LATEST,
+        serde=serde,
+    )
@@ -0,0 +1,280 @@
+"""
+Per-node / per-call timing for the support agent.
+
+- instrument_node() wraps a graph node: its duration goes to the
+  `support_node_duration_seconds` histogram (labels: node, intent, client_id).
+- span() times work done inside a node (model calls, vector search, ticket
+  creation) into `support_span_duration_seconds` (labels: kind, name, node,
+  client_id), tagged with the enclosing node via a context variable.
+- With TRACE_LOG_JSON, every node and span is also logged as one JSON line
+  keyed by thread_id (logger "app.trace").
+- render_prometheus() produces the text exposition format for /metrics;
+  per-model stats are labelled (model="...") rather than named per model.
+
+When both METRICS_ENABLED and TRACE_LOG_JSON are off, nodes are registered
+unwrapped and span() returns a shared no-op context manager.
+"""
+
+import json
+import time
+import logging
+import threading
+from contextlib import nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from inspect import signature
+from app.core.config import settings
+
+trace_logger = logging.getLogger("app.trace")
+
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def enabled() -> bool:
+    return settings.METRICS_ENABLED or settings.TRACE_LOG_JSON
+
+
+# =========================
+# METRIC TYPES
+# =========================
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple, buckets: tuple = _BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        for key, series in sorted(items):
+            for bound, count in zip(self.buckets, series):
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {series[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {value}")
+        return lines
+
+
+node_seconds = Histogram(
+    "support_node_duration_seconds", "Support agent graph node duration.", ("node", "intent", "client_id")
+)
+node_errors = Counter(
+    "support_node_errors_total", "Support agent graph nodes that raised.", ("node", "client_id")
+)
+span_seconds = Histogram(
+    "support_span_duration_seconds",
+    "Model calls, vector searches and ticket writes inside a turn.",
+    ("kind", "name", "node", "client_id"),
+)
+span_errors = Counter(
+    "support_span_errors_total", "Spans that raised.", ("kind", "name", "node", "client_id")
+)
+
+
+# =========================
+# TRACE CONTEXT
+# =========================
+@dataclass
+class _NodeContext:
+    node: str
+    thread_id: str | None
+    client_id: str | None
+
+
+_current: ContextVar[_NodeContext | None] = ContextVar("support_node_context", default=None)
+
+
+def _log(event: str, **fields) -> None:
+    if settings.TRACE_LOG_JSON:
+        trace_logger.info(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, default=str))
+
+
+class _Span:
+    __slots__ = ("kind", "name", "attrs", "started")
+
+    def __init__(self, kind: str, name: str, attrs: dict):
+        self.kind = kind
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        ctx = _current.get()
+        labels = {
+            "kind": self.kind,
+            "name": self.name,
+            "node": ctx.node if ctx else "",
+            "client_id": (ctx.client_id if ctx else None) or self.attrs.get("client_id", ""),
+        }
+        if settings.METRICS_ENABLED:
+            span_seconds.observe(elapsed, **labels)
+            if exc_type is not None:
+                span_errors.inc(**labels)
+        _log(
+            "span",
+            thread_id=(ctx.thread_id if ctx else None) or self.attrs.get("thread_id"),
+            duration_ms=round(1000 * elapsed, 2),
+            status="error" if exc_type else "ok",
+            **labels,
+            **{k: v for k, v in self.attrs.items() if k not in ("client_id", "thread_id")},
+        )
+        return False
+
+
+_NOOP_SPAN = nullcontext()
+
+
+def span(kind: str, name: str = "", **attrs):
+    """Time a unit of work inside the current node (usable with `with`)."""
+    if not (settings.METRICS_ENABLED or settings.TRACE_LOG_JSON):
+        return _NOOP_SPAN
+    return _Span(kind, name, attrs)
+
+
+# =========================
+# NODE WRAPPER
+# =========================
+def instrument_node(name: str, fn):
+    """Wrap an async graph node with timing; returns `fn` itself when disabled."""
+    if not enabled():
+        return fn
+
+    takes_config = "config" in signature(fn).parameters
+
+    @wraps(fn)
+    async def wrapper(state, config):
+        thread_id = (config or {}).get("configurable", {}).get("thread_id")
+        client_id = state.get("client_id")
+        token = _current.set(_NodeContext(node=name, thread_id=thread_id, client_id=client_id))
+        started = time.perf_counter()
+        result = None
+        try:
+            result = await (fn(state, config) if takes_config else fn(state))
+            return result
+        except Exception:
+            if settings.METRICS_ENABLED:
+                node_errors.inc(node=name, client_id=client_id)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            intent = (result or {}).get("intent") or state.get("intent") or "none"
+            if settings.METRICS_ENABLED:
+                node_seconds.observe(elapsed, node=name, intent=intent, client_id=client_id)
+            _log(
+                "node",
+                thread_id=thread_id,
+                client_id=client_id,
+                node=name,
+                intent=intent,
+                duration_ms=round(1000 * elapsed, 2),
+                status="ok" if result is not None else "error",
+            )
+            _current.reset(token)
+
+    # LangGraph passes `config` based on the signature; expose ours, not fn's
+    del wrapper.__wrapped__
+    return wrapper
+
+
+# =========================
+# EXPOSITION
+# =========================
+def _flatten(prefix: str, value, out: list[str]) -> None:
+    if isinstance(value, bool):
+        out.append(f"{prefix} {int(value)}")
+    elif isinstance(value, (int, float)):
+        out.append(f"{prefix} {value}")
+    elif isinstance(value, dict):
+        for key, inner in value.items():
+            safe = "".join(c if c.isalnum() else "_" for c in str(key)).strip("_").lower()
+            _flatten(f"{prefix}_{safe}", inner, out)
+
+
+def render_prometheus(
+    gauges: dict[str, dict] | None = None,
+    labelled: dict[str, tuple[str, dict[str, dict]]] | None = None,
+) -> str:
+    """
+    Histograms/counters plus numeric fields of existing stats() dicts,
+    exported as untyped gauges named support_<source>_<field>. `labelled`
+    maps a source to (label, {value: stats}) for stats kept per item (e.g.
+    per model), exported as support_<source>_<field>{<label>="<value>"}.
+    """
+    lines: list[str] = []
+    for metric in (node_seconds, node_errors, span_seconds, span_errors):
+        lines.extend(metric.render())
+    for source, stats in (gauges or {}).items():
+        flat: list[str] = []
+        _flatten(f"support_{source}", stats, flat)
+        for line in flat:
+            name = line.split(" ", 1)[0]
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(line)
+    for source, (label, items) in (labelled or {}).items():
+        series: dict[str, list[str]] = {}  # metric name -> samples, one per item
+        for value, stats in items.items():
+            flat = []
+            _flatten(f"support_{source}", stats, flat)
+            for line in flat:
+                name, sample = line.split(" ", 1)
+                series.setdefault(name, []).append(f"{name}{_labels((label,), (value,))} {sample}")
+        for name, samples in series.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.extend(samples)
+    return "\n".join(lines) + "\n"
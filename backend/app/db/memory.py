@@ -0,0 +1,297 @@
+"""
+In-process stand-in for the Motor database (MONGO_BACKEND="memory").
+
+Implements the subset of the collection API this app uses: find_one (with
+sort), find().sort().skip().limit(), insert_one, update_one/update_many
+(with upsert), delete_one/delete_many, find_one_and_delete,
+count_documents, and create_index / drop_index / index_information
+(no-ops: indexes are not kept). Filters support equality,
+$eq/$ne/$gt/$gte/$lt/$lte/$in/$nin/$exists and $and/$or/$nor. Data lives
+only as long as the process; meant for benchmarks, load tests and offline runs.
+"""
+
+import copy
+from dataclasses import dataclass
+from typing import Any
+from bson import ObjectId
+
+_MISSING = object()
+
+
+def _get(doc: dict, path: str):
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _compare(value, op: str, arg) -> bool:
+    if op == "$exists":
+        return (value is not _MISSING) == bool(arg)
+    if op == "$eq":
+        return _equals(value, arg)
+    if op == "$ne":
+        return not _equals(value, arg)
+    if op == "$in":
+        return any(_equals(value, a) for a in arg)
+    if op == "$nin":
+        return not any(_equals(value, a) for a in arg)
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$gt":
+            return value > arg
+        if op == "$gte":
+            return value >= arg
+        if op == "$lt":
+            return value < arg
+        if op == "$lte":
+            return value <= arg
+    except TypeError:
+        return False
+    raise NotImplementedError(f"Unsupported query operator: {op}")
+
+
+def _equals(value, arg) -> bool:
+    # Like MongoDB, {"field": None} also matches documents without the field
+    if arg is None:
+        return value is _MISSING or value is None
+    if isinstance(value, list) and not isinstance(arg, list):
+        return arg in value
+    return value is not _MISSING and value == arg
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, cond in query.items():
+        if key == "$and":
+            if not all(matches(doc, q) for q in cond):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, q) for q in cond):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, q) for q in cond):
+                return False
+        else:
+            value = _get(doc, key)
+            if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+                if not all(_compare(value, op, arg) for op, arg in cond.items()):
+                    return False
+            elif not _equals(value, cond):
+                return False
+    return True
+
+
+def _set_path(doc: dict, path: str, value) -> None:
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[last] = value
+
+
+def _unset_path(doc: dict, path: str) -> None:
+    *parents, last = path.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(last, None)
+
+
+def _apply_update(doc: dict, update: dict, inserting: bool = False) -> None:
+    for op, fields in update.items():
+        for path, value in fields.items():
+            if op == "$set" or (op == "$setOnInsert" and inserting):
+                _set_path(doc, path, copy.deepcopy(value))
+            elif op == "$setOnInsert":
+                continue
+            elif op == "$unset":
+                _unset_path(doc, path)
+            elif op == "$inc":
+                current = _get(doc, path)
+                _set_path(doc, path, (0 if current is _MISSING else current) + value)
+            elif op == "$push":
+                current = _get(doc, path)
+                _set_path(doc, path, ([] if current is _MISSING else current) + [copy.deepcopy(value)])
+            else:
+                raise NotImplementedError(f"Unsupported update operator: {op}")
+
+
+def _sort_key(value):
+    # Missing / None sort first, like MongoDB
+    if value is _MISSING or value is None:
+        return (0, 0)
+    return (1, value)
+
+
+def _sorted(docs: list[dict], sort) -> list[dict]:
+    for field, direction in reversed(sort or []):
+        docs = sorted(docs, key=lambda d: _sort_key(_get(d, field)), reverse=direction < 0)
+    return docs
+
+
+@dataclass
+class InsertOneResult:
+    inserted_id: Any
+
+
+@dataclass
+class UpdateResult:
+    matched_count: int
+    modified_count: int
+    upserted_id: Any = None
+
+
+@dataclass
+class DeleteResult:
+    deleted_count: int
+
+
+class InMemoryCursor:
+    def __init__(self, collection: "InMemoryCollection", query: dict, projection: dict | None):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort: list[tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+        self._results: list[dict] | None = None
+
+    def sort(self, key, direction: int = 1) -> "InMemoryCursor":
+        self._sort = list(key) if isinstance(key, list) else [(key, direction)]
+        return self
+
+    def skip(self, count: int) -> "InMemoryCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "InMemoryCursor":
+        self._limit = count
+        return self
+
+    def _evaluate(self) -> list[dict]:
+        docs = _sorted(self._collection._matching(self._query), self._sort)[self._skip:]
+        if self._limit:
+            docs = docs[: self._limit]
+        return [self._collection._project(d, self._projection) for d in docs]
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        if self._results is None:
+            self._results = self._evaluate()
+        if not self._results:
+            raise StopAsyncIteration
+        return self._results.pop(0)
+
+    async def to_list(self, length: int | None = None) -> list[dict]:
+        docs = self._evaluate()
+        return docs[:length] if length else docs
+
+
+class InMemoryCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self._docs: list[dict] = []
+
+    def _matching(self, query: dict | None) -> list[dict]:
+        return [d for d in self._docs if matches(d, query or {})]
+
+    @staticmethod
+    def _project(doc: dict, projection: dict | None) -> dict:
+        doc = copy.deepcopy(doc)
+        if not projection:
+            return doc
+        included = {k for k, v in projection.items() if v and k != "_id"}
+        if included:
+            keep = included | ({"_id"} if projection.get("_id", 1) else set())
+            return {k: v for k, v in doc.items() if k in keep}
+        return {k: v for k, v in doc.items() if k not in projection}
+
+    def find(self, query: dict | None = None, projection: dict | None = None, **kwargs) -> InMemoryCursor:
+        cursor = InMemoryCursor(self, query or {}, projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        return cursor
+
+    async def find_one(self, query: dict | None = None, projection: dict | None = None, sort=None, **kwargs) -> dict | None:
+        docs = _sorted(self._matching(query), sort)
+        return self._project(docs[0], projection) if docs else None
+
+    async def insert_one(self, document: dict, **kwargs) -> InsertOneResult:
+        # Motor adds _id to the caller's dict as well
+        document.setdefault("_id", ObjectId())
+        self._docs.append(copy.deepcopy(document))
+        return InsertOneResult(inserted_id=document["_id"])
+
+    async def _update(self, query: dict, update: dict, upsert: bool, many: bool) -> UpdateResult:
+        targets = self._matching(query)
+        if not many:
+            targets = targets[:1]
+        for doc in targets:
+            _apply_update(doc, update)
+        if targets or not upsert:
+            return UpdateResult(matched_count=len(targets), modified_count=len(targets))
+        new_doc = {k: copy.deepcopy(v) for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+        _apply_update(new_doc, update, inserting=True)
+        new_doc.setdefault("_id", ObjectId())
+        self._docs.append(new_doc)
+        return UpdateResult(matched_count=0, modified_count=0, upserted_id=new_doc["_id"])
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        return await self._update(query, update, upsert, many=False)
+
+    async def update_many(self, query: dict, update: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        return await self._update(query, update, upsert, many=True)
+
+    async def _delete(self, query: dict, many: bool) -> list[dict]:
+        targets = self._matching(query)
+        if not many:
+            targets = targets[:1]
+        ids = {id(d) for d in targets}
+        self._docs = [d for d in self._docs if id(d) not in ids]
+        return targets
+
+    async def delete_one(self, query: dict, **kwargs) -> DeleteResult:
+        return DeleteResult(deleted_count=len(await self._delete(query, many=False)))
+
+    async def delete_many(self, query: dict, **kwargs) -> DeleteResult:
+        return DeleteResult(deleted_count=len(await self._delete(query, many=True)))
+
+    async def find_one_and_delete(self, query: dict, **kwargs) -> dict | None:
+        deleted = await self._delete(query, many=False)
+        return deleted[0] if deleted else None
+
+    async def count_documents(self, query: dict, **kwargs) -> int:
+        return len(self._matching(query))
+
+    async def create_index(self, keys, **kwargs) -> str:
+        return "_".join(f"{k}_{v}" for k, v in keys) if isinstance(keys, list) else str(keys)
+
+    async def drop_index(self, index, **kwargs) -> None:
+        return None
+
+    async def index_information(self, **kwargs) -> dict:
+        return {"_id_": {"key": [("_id", 1)]}}
+
+
+class InMemoryDatabase:
+    def __init__(self, name: str = "support_db"):
+        self.name = name
+        self._collections: dict[str, InMemoryCollection] = {}
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> InMemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(name)
+        return self._collections[name]
+
+    def get_collection(self, name: str) -> InMemoryCollection:
+        return self[name]
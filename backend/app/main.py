@@ -1,15 +1,21 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from dotenv import load_dotenv
 from app.chatbot.chat_route import router as chat_router
 from app.tickets.ticket_routes import router as ticket_router
 from app.auth.user_routes import router as admin_router
 from app.clients.client_routes import router as client_router
 from app.core.config import settings
+from app.core.telemetry import render_prometheus
+from app.clients.client_service import tenant_registry
+from app.auth.security import get_current_user, require_admin
 load_dotenv()
 from contextlib import asynccontextmanager
 from app.db.mongodb import db
 from datetime import datetime, timezone
+import asyncio
+import hmac
 
 DEFAULT_CLIENT_ID = "abc1234"
 
@@ -40,6 +46,7 @@ async def lifespan(app: FastAPI):
                             "is_active": True,
                             "created_at": datetime.now(timezone.utc),
                         })
+                        tenant_registry.invalidate(DEFAULT_CLIENT_ID)
                     await db.users.update_one(
                         {"_id": first_user["_id"]},
                         {"$set": {"is_admin": True, "client_id": DEFAULT_CLIENT_ID}},
@@ -50,23 +57,50 @@ async def lifespan(app: FastAPI):
 
     # 1️⃣ Warm up support agent
     try:
-        from app.chatbot.support_agent import get_support_agent
+        from app.chatbot.support_agent import get_support_agent, intent_centroids
         await get_support_agent()
+        if settings.INTENT_CENTROIDS_ENABLED:
+            await intent_centroids.ensure_ready()
         print("✅ Support agent warmed up")
     except Exception as e:
         print("⚠️ Agent warm-up failed:", e)
 
-    # 2️⃣ Check vector store
+    # 2️⃣ Check vector store (and keep the handle open for the first chat)
     try:
-        from app.chatbot.rag.vectorstore import load_vector_store
-        load_vector_store(DEFAULT_CLIENT_ID)
+        from app.chatbot.rag.vectorstore import get_vector_store
+        await asyncio.to_thread(get_vector_store, DEFAULT_CLIENT_ID)
         print("✅ RAG vector store loaded")
     except Exception as e:
         print("⚠️ RAG vector store not available:", e)
         print("➡️ Run ingestion before using RAG answers")
 
+    # 3️⃣ Document indexes (unique active upload per client + content hash)
+    try:
+        from app.auth.user_routes import ensure_document_indexes
+        await ensure_document_indexes()
+    except Exception as e:
+        print("⚠️ Document index creation failed:", e)
+
+    # 4️⃣ Start ingestion workers (resumes jobs left by a previous run)
+    from app.admin.ingest_queue import ingest_queue
+    await ingest_queue.start()
+
     yield
 
+    # Shutdown: stop background pools, flush cached checkpoints, close the checkpoint DB
+    from app.chatbot.rag.vectorstore import retrieval_executor
+    from app.chatbot.support_agent import close_support_agent
+    from app.core.llm import get_query_embedding_model
+    from app.admin.ingest import shutdown_ingest_pool
+    try:
+        await ingest_queue.stop()
+        retrieval_executor.shutdown()
+        shutdown_ingest_pool()
+        get_query_embedding_model().close()
+    finally:
+        # Always runs: conversation state buffered by the hot-thread cache is written here
+        await close_support_agent()
+
 app = FastAPI(title="Customer Support Agent", lifespan=lifespan)
 
 # -------------------- CORS --------------------
@@ -102,4 +136,54 @@ app.include_router(client_router, prefix="/client", tags=["Client"])
 # -------------------- HEALTH --------------------
 @app.get("/health", tags=["Health"])
 def health():
-    return {"status": "OK"}
\ No newline at end of file
+    return {"status": "OK"}
+
+# -------------------- METRICS --------------------
+async def metrics_auth(request: Request):
+    """A scraper's METRICS_TOKEN, or else a logged-in admin."""
+    auth = request.headers.get("Authorization", "")
+    if settings.METRICS_TOKEN and auth.startswith("Bearer ") and hmac.compare_digest(
+        auth[7:].strip().encode(), settings.METRICS_TOKEN.encode()
+    ):
+        return
+    await require_admin(await get_current_user(request))
+
+
+def metrics():
+    """Prometheus text format: node/span histograms plus component stats."""
+    from app.chatbot.rag.vectorstore import retrieval_executor, vector_store_registry
+    from app.chatbot.rag.answer_cache import answer_cache
+    from app.chatbot.rag.speculation import speculative_retrieval
+    from app.chatbot.support_agent import preroute_stats, checkpointer_stats
+    from app.core.llm import get_query_embedding_model, model_registry
+    from app.admin.ingest import ingest_stats
+    from app.admin.ingest_queue import ingest_queue
+    from app.core.checkpoint_retention import retention_stats
+
+    speculation = speculative_retrieval.stats()
+    speculation.pop("clients", None)  # per-tenant breakdown would explode metric names
+    body = render_prometheus({
+        "retrieval_pool": retrieval_executor.stats(),
+        "vectorstore_handles": vector_store_registry.stats(),
+        "query_embedding_cache": get_query_embedding_model().stats(),
+        "answer_cache": answer_cache.stats(),
+        "speculative_retrieval": speculation,
+        "preroute": preroute_stats(),
+        "ingest": ingest_stats(),
+        "ingest_queue": ingest_queue.stats(),
+        "checkpoint_retention": retention_stats,
+        "checkpoint_cache": checkpointer_stats(),
+        "tenant_registry": tenant_registry.stats(),
+    }, labelled={
+        # Model names are label values, not part of the metric name
+        "model": ("model", model_registry.stats()),
+    })
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+# Not mounted at all (404) unless METRICS_ENABLED
+if settings.METRICS_ENABLED:
+    app.add_api_route(
+        "/metrics", metrics, methods=["GET"], tags=["Health"],
+        include_in_schema=False, dependencies=[Depends(metrics_auth)],
+    )
\ No newline at end of file
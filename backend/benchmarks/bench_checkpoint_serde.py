@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Checkpoint bytes and serialization CPU per chat turn.
+Run this from the backend directory:
+
+    python3 benchmarks/bench_checkpoint_serde.py --threads 20 --turns 10 --output serde.json
+
+Runs a graph shaped like the support agent (intent_classifier -> rag_node,
+carrying AgentState with long `answer` / `context_source` strings) on a
+PooledSqliteSaver, once per combination of:
+
+- nodes: "full" returns `{**state, ...}` from every node (the old style),
+  "delta" returns only the keys a node changes,
+- compression: the CompressedSerializer codec ("none", "zlib", "zstd").
+
+Reports bytes stored per turn (checkpoint blobs + channel writes +
+metadata) and the CPU time spent in dumps_typed / loads_typed per turn.
+"""
+
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from typing import TypedDict
+
+# Add the backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_WORDS = (
+    "order refund shipping delivery account password invoice payment card days business policy "
+    "return exchange warranty support ticket customer product service update plan subscription "
+    "cancel upgrade billing address email please contact within our team will the a to of and "
+    "for your is in on be can you we if this that with are have it from not as by at or"
+).split()
+
+
+class BenchState(TypedDict, total=False):
+    thread_id: str
+    client_id: str
+    query: str
+    intent: str
+    intent_tier: str
+    answer: str
+    context_summary: str | None
+    context_source: str | None
+    policy_days: int
+    failure_count: int
+    escalated: bool
+    awaiting_ticket_query: bool
+    ticket_user_query: str
+    awaiting_user_identity: bool
+    user_name: str | None
+    user_email: str | None
+    ticket_summary: str | None
+
+
+def _text(rng: random.Random, size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def _graph(nodes: str, answer_bytes: int):
+    from langgraph.graph import StateGraph, END
+
+    rng = random.Random(7)
+    full = nodes == "full"
+
+    def _out(state, update):
+        return {**state, **update} if full else update
+
+    async def intent_classifier(state):
+        return _out(state, {"intent": "faq", "intent_tier": "centroid"})
+
+    async def rag_node(state):
+        answer = _text(rng, answer_bytes)
+        return _out(state, {
+            "answer": answer,
+            "context_source": answer,
+            "context_summary": None,
+            "policy_days": 7,
+            **({"failure_count": state.get("failure_count", 0)} if full else {}),
+        })
+
+    graph = StateGraph(BenchState)
+    graph.add_node("intent_classifier", intent_classifier)
+    graph.add_node("rag_node", rag_node)
+    graph.set_entry_point("intent_classifier")
+    graph.add_edge("intent_classifier", "rag_node")
+    graph.add_edge("rag_node", END)
+    return graph
+
+
+class _TimedSerde:
+    """Counts CPU time (this thread) spent serializing and deserializing."""
+
+    def __init__(self, serde):
+        self.serde = serde
+        self.dumps_ns = 0
+        self.loads_ns = 0
+        self.dumps_calls = 0
+
+    def dumps_typed(self, obj):
+        started = time.thread_time_ns()
+        try:
+            return self.serde.dumps_typed(obj)
+        finally:
+            self.dumps_ns += time.thread_time_ns() - started
+            self.dumps_calls += 1
+
+    def loads_typed(self, data):
+        started = time.thread_time_ns()
+        try:
+            return self.serde.loads_typed(data)
+        finally:
+            self.loads_ns += time.thread_time_ns() - started
+
+
+async def _stored_bytes(conn) -> dict:
+    async with conn.execute(
+        "SELECT COALESCE(SUM(LENGTH(checkpoint)), 0), COALESCE(SUM(LENGTH(metadata)), 0), COUNT(*) FROM checkpoints"
+    ) as cur:
+        checkpoint_bytes, metadata_bytes, checkpoints = await cur.fetchone()
+    async with conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0), COUNT(*) FROM writes") as cur:
+        write_bytes, writes = await cur.fetchone()
+    return {
+        "checkpoints": checkpoints,
+        "checkpoint_bytes": checkpoint_bytes,
+        "metadata_bytes": metadata_bytes,
+        "writes": writes,
+        "write_bytes": write_bytes,
+    }
+
+
+async def run_case(nodes: str, codec: str, args: argparse.Namespace, workdir: Path) -> dict:
+    from app.core.checkpointer import PooledSqliteSaver, _LazyAioSqliteConn, close_checkpointer
+    from app.core.checkpoint_serde import checkpoint_serde
+
+    db_path = str(workdir / f"{nodes}-{codec}.db")
+    serde = _TimedSerde(checkpoint_serde(codec))
+    saver = PooledSqliteSaver(_LazyAioSqliteConn(db_path), conn_string=db_path, readers=2, serde=serde)
+    agent = _graph(nodes, args.answer_bytes).compile(checkpointer=saver)
+
+    async def conversation(thread_id: str):
+        config = {"configurable": {"thread_id": thread_id}}
+        for turn in range(args.turns):
+            await agent.ainvoke({"query": f"question {turn} about my order", "client_id": "bench"}, config)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(conversation(f"{nodes}-{codec}-{i}") for i in range(args.threads)))
+    duration = time.perf_counter() - started
+
+    stored = await _stored_bytes(saver.conn)
+    await close_checkpointer(saver)
+
+    turns = args.threads * args.turns
+    total = stored["checkpoint_bytes"] + stored["metadata_bytes"] + stored["write_bytes"]
+    return {
+        **stored,
+        "bytes_per_turn": round(total / turns),
+        "checkpoint_bytes_per_turn": round(stored["checkpoint_bytes"] / turns),
+        "write_bytes_per_turn": round(stored["write_bytes"] / turns),
+        "serialize_calls_per_turn": round(serde.dumps_calls / turns, 1),
+        "serialize_cpu_us_per_turn": round(serde.dumps_ns / turns / 1000, 1),
+        "deserialize_cpu_us_per_turn": round(serde.loads_ns / turns / 1000, 1),
+        "turns_per_s": round(turns / duration, 1) if duration else None,
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    node_modes = ["full", "delta"] if args.nodes == "both" else [args.nodes]
+    codecs = [c.strip() for c in args.compression.split(",") if c.strip()]
+    results: dict = {}
+    with tempfile.TemporaryDirectory(prefix="bench-serde-") as tmp:
+        for nodes in node_modes:
+            for codec in codecs:
+                results[f"{nodes}/{codec}"] = await run_case(nodes, codec, args, Path(tmp))
+    return {
+        "config": {
+            "threads": args.threads,
+            "turns": args.turns,
+            "answer_bytes": args.answer_bytes,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpoint serialization size / CPU benchmark")
+    parser.add_argument("--threads", type=int, default=20, help="concurrent conversation threads")
+    parser.add_argument("--turns", type=int, default=10, help="turns per conversation")
+    parser.add_argument("--answer-bytes", type=int, default=1500, help="size of each simulated RAG answer")
+    parser.add_argument("--nodes", default="both", choices=["full", "delta", "both"])
+    parser.add_argument("--compression", default="none,zlib,zstd", help="comma-separated codecs to compare")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+        print(f"Report written to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Checkpoint put/get latency under concurrent conversation threads.
+Run this from the backend directory:
+
+    python3 benchmarks/bench_checkpointer.py --threads 50 --turns 20 --output cp.json
+
+Each simulated conversation does what a /chat turn does to the
+checkpointer: load its latest checkpoint (aget_tuple), then save a new one
+(aput) whose message history has grown by one exchange. Compares the stock
+AsyncSqliteSaver on one default connection ("baseline"), PooledSqliteSaver
+("tuned": WAL pragmas, reader pool, background WAL checkpoints) and the
+hot-thread cache in front of it ("cached": reads from memory; writes go
+through, or are flushed every CHECKPOINT_FLUSH_SECONDS when that is set
+above 0). Each mode gets a fresh SQLite file
+in a temporary directory.
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add the backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def _p(p: float) -> float:
+        return round(1000 * ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(1000 * sum(ordered) / len(ordered), 3),
+        "p50_ms": _p(0.50),
+        "p95_ms": _p(0.95),
+        "p99_ms": _p(0.99),
+        "max_ms": round(1000 * ordered[-1], 3),
+    }
+
+
+def _file_size(path: Path) -> int:
+    return path.stat().st_size if path.exists() else 0
+
+
+async def _make_saver(mode: str, db_path: Path):
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    from app.core.checkpointer import PooledSqliteSaver, _LazyAioSqliteConn
+    from app.core.checkpoint_cache import CachedCheckpointer
+    from app.core.config import settings
+
+    if mode == "baseline":
+        class _DefaultConn(_LazyAioSqliteConn):
+            """The previous behaviour: one connection, default pragmas."""
+
+            def __await__(self):
+                async def _connect():
+                    if self._conn is None:
+                        self._conn = await aiosqlite.connect(self._conn_string)
+                    return self._conn
+                return _connect().__await__()
+
+        return AsyncSqliteSaver(_DefaultConn(str(db_path)))
+    saver = PooledSqliteSaver(
+        _LazyAioSqliteConn(str(db_path)),
+        conn_string=str(db_path),
+        readers=settings.CHECKPOINT_READERS,
+    )
+    if mode == "tuned":
+        return saver
+    return CachedCheckpointer(
+        saver,
+        max_threads=settings.CHECKPOINT_HOT_THREADS,
+        flush_seconds=settings.CHECKPOINT_FLUSH_SECONDS,
+        max_dirty=settings.CHECKPOINT_FLUSH_MAX_DIRTY,
+    )
+
+
+async def _conversation(saver, thread_id: str, turns: int, message_bytes: int, gets: list, puts: list) -> None:
+    from langgraph.checkpoint.base import empty_checkpoint
+    from langgraph.checkpoint.base.id import uuid6
+
+    parent_id = None
+    for turn in range(turns):
+        config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+        started = time.perf_counter()
+        current = await saver.aget_tuple(config)
+        gets.append(time.perf_counter() - started)
+
+        messages = list(current.checkpoint["channel_values"].get("messages", [])) if current else []
+        messages += [
+            {"role": "user", "content": f"question {turn} " + "x" * message_bytes},
+            {"role": "assistant", "content": f"answer {turn} " + "y" * message_bytes},
+        ]
+        checkpoint = empty_checkpoint()
+        checkpoint["id"] = str(uuid6(clock_seq=turn))
+        checkpoint["channel_values"] = {"messages": messages, "intent": "faq", "client_id": "bench"}
+        if parent_id:
+            config["configurable"]["checkpoint_id"] = parent_id
+
+        started = time.perf_counter()
+        saved = await saver.aput(config, checkpoint, {"source": "loop", "step": turn}, {})
+        puts.append(time.perf_counter() - started)
+        parent_id = saved["configurable"]["checkpoint_id"]
+
+
+async def run_mode(mode: str, args: argparse.Namespace, workdir: Path) -> dict:
+    from app.core.checkpointer import close_checkpointer
+
+    db_path = workdir / f"{mode}.db"
+    saver = await _make_saver(mode, db_path)
+    gets: list[float] = []
+    puts: list[float] = []
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _conversation(saver, f"{mode}-{i}", args.turns, args.message_bytes, gets, puts)
+        for i in range(args.threads)
+    ))
+    duration = time.perf_counter() - started
+    wal_before_close = _file_size(Path(f"{db_path}-wal"))
+
+    cache = saver.stats() if hasattr(saver, "stats") else None
+    close_started = time.perf_counter()
+    await close_checkpointer(saver)
+    close_seconds = time.perf_counter() - close_started
+
+    turns = args.threads * args.turns
+    return {
+        "duration_s": round(duration, 3),
+        "turns_per_s": round(turns / duration, 1) if duration else None,
+        "aget_tuple": _percentiles(gets),
+        "aput": _percentiles(puts),
+        "db_bytes": _file_size(db_path),
+        "wal_bytes_before_close": wal_before_close,
+        "wal_bytes_after_close": _file_size(Path(f"{db_path}-wal")),
+        "close_ms": round(1000 * close_seconds, 1),
+        **({"cache": cache} if cache else {}),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    from app.core.config import settings
+
+    modes = ["baseline", "tuned", "cached"] if args.mode == "all" else [args.mode]
+    with tempfile.TemporaryDirectory(prefix="bench-checkpointer-") as tmp:
+        results = {mode: await run_mode(mode, args, Path(tmp)) for mode in modes}
+    return {
+        "config": {
+            "threads": args.threads,
+            "turns": args.turns,
+            "message_bytes": args.message_bytes,
+            "readers": settings.CHECKPOINT_READERS,
+            "hot_threads": settings.CHECKPOINT_HOT_THREADS,
+            "flush_seconds": settings.CHECKPOINT_FLUSH_SECONDS,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkpointer put/get latency benchmark")
+    parser.add_argument("--threads", type=int, default=50, help="concurrent conversation threads")
+    parser.add_argument("--turns", type=int, default=20, help="turns per conversation")
+    parser.add_argument("--message-bytes", type=int, default=400, help="size of each simulated message")
+    parser.add_argument("--mode", default="all", choices=["baseline", "tuned", "cached", "all"])
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+        print(f"Report written to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
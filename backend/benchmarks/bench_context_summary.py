@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Compare RAG-turn latency for the CONTEXT_SUMMARY_MODE settings.
+Run this from the backend directory:
+
+    python3 benchmarks/bench_context_summary.py --conversations 20 --llm-ms 800
+
+The chat model and rag_answer() are replaced by stand-ins that sleep for the
+given latency, so only rag_node's own call pattern is measured. Each
+conversation is an FAQ turn followed by a follow-up turn.
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+# Add the backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langchain_core.messages import AIMessage
+import app.chatbot.support_agent as support_agent
+from app.core.config import settings
+
+
+class _SleepyChatModel:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        await asyncio.sleep(self.latency)
+        return AIMessage(content="Refunds are accepted within 30 days.")
+
+
+async def run_conversation(agent, mode: str, i: int, think_time: float) -> tuple[float, float]:
+    config = {"configurable": {"thread_id": f"{mode}-{i}"}}
+    timings = []
+    for intent in ("faq", "followup"):
+        values = (await agent.aget_state(config)).values
+        state = {**values, "query": "what is the refund policy?", "client_id": "bench", "intent": intent}
+        started = time.perf_counter()
+        result = await support_agent.rag_node(state, config)
+        timings.append(time.perf_counter() - started)
+        # Persist like the graph would, so background summaries can land
+        await agent.aupdate_state(config, result, as_node="rag_node")
+        await asyncio.sleep(think_time)
+    return timings[0], timings[1]
+
+
+async def run_mode(mode: str, conversations: int, llm_latency: float, rag_latency: float, think_time: float) -> dict:
+    settings.CONTEXT_SUMMARY_MODE = mode
+    support_agent.chat_model = _SleepyChatModel(llm_latency)
+
+    async def _rag_answer(query: str, client_id: str, **kwargs):
+        await asyncio.sleep(rag_latency)
+        return "Refunds are accepted within 30 days of delivery."
+
+    support_agent.rag_answer = _rag_answer
+    agent = support_agent.graph.compile(checkpointer=InMemorySaver())
+    support_agent._support_agent = agent
+
+    timings = await asyncio.gather(
+        *(run_conversation(agent, mode, i, think_time) for i in range(conversations))
+    )
+    await asyncio.gather(*support_agent._summary_tasks, return_exceptions=True)
+
+    def _summary(samples):
+        return {
+            "mean_ms": round(1000 * statistics.mean(samples), 1),
+            "p50_ms": round(1000 * statistics.median(samples), 1),
+            "max_ms": round(1000 * max(samples), 1),
+        }
+
+    return {
+        "mode": mode,
+        "faq_turn": _summary([t[0] for t in timings]),
+        "followup_turn": _summary([t[1] for t in timings]),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Context summary mode benchmark")
+    parser.add_argument("--conversations", type=int, default=10)
+    parser.add_argument("--llm-ms", type=float, default=800, help="simulated LLM call latency")
+    parser.add_argument("--rag-ms", type=float, default=1000, help="simulated retrieval + answer latency")
+    parser.add_argument("--think-ms", type=float, default=2000, help="pause between the user's messages")
+    args = parser.parse_args()
+
+    results = []
+    for mode in ("inline", "background", "lazy"):
+        results.append(
+            await run_mode(
+                mode, args.conversations, args.llm_ms / 1000, args.rag_ms / 1000, args.think_ms / 1000
+            )
+        )
+    print(json.dumps(
+        {"llm_ms": args.llm_ms, "rag_ms": args.rag_ms, "think_ms": args.think_ms, "results": results},
+        indent=2,
+    ))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
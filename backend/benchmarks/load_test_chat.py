@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test for POST /chat/.
+Run this from the backend directory:
+
+    python3 benchmarks/load_test_chat.py --conversations 200 --concurrency 50 --output load.json
+
+Drives the FastAPI app in-process (httpx ASGI transport) with scripted
+conversations: greeting -> FAQ -> follow-up -> escalation -> name/email ->
+issue. MongoDB, the chat model and the embedding model are replaced by the
+local stand-ins (MONGO_BACKEND=memory, MODEL_BACKEND=local); checkpoints go
+to a temporary SQLite file and the knowledge base to a temporary Chroma
+store. Reports throughput and p50/p95/p99 latency per turn type and per
+graph node as JSON.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+from contextvars import ContextVar
+from collections import defaultdict
+
+# Add the backend directory to path
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+CLIENT_ID = "loadtest"
+
+SCRIPT = [
+    ("greeting", "Hi there"),
+    ("faq", None),  # picked from FAQ_QUESTIONS
+    ("followup", "What about items bought on sale?"),
+    ("escalation", "I want to talk to a human agent"),
+    ("identity", "Load Tester {n}, tester{n}@example.com"),
+    ("issue", "My order {n} arrived damaged and I need a replacement or a refund."),
+]
+
+FAQ_QUESTIONS = [
+    "What is your refund policy?",
+    "How long does shipping take?",
+    "Can I change my delivery address after ordering?",
+    "Do you ship internationally?",
+    "How do I cancel my subscription?",
+    "What payment methods do you accept?",
+]
+
+KNOWLEDGE_BASE = [
+    "Refunds are accepted within 30 days of delivery. Items must be unused and in their original packaging.",
+    "Sale items can be returned for store credit only. Refunds are not issued for clearance products.",
+    "Standard shipping takes 5 business days. Express shipping delivers within 2 business days.",
+    "The delivery address can be changed until the order has been dispatched, from the Orders page.",
+    "We ship to over 40 countries. International orders may be subject to customs duties.",
+    "Subscriptions can be cancelled at any time from Account settings. Access continues until the end of the billing period.",
+    "We accept credit cards, debit cards, PayPal and bank transfers.",
+]
+
+
+def _configure_environment(args: argparse.Namespace, workdir: Path) -> None:
+    """Must run before anything under app/ is imported (settings are read once)."""
+    os.environ.update({
+        "MODEL_BACKEND": "local",
+        "MONGO_BACKEND": "memory",
+        "LOCAL_CHAT_LATENCY_MS": str(args.llm_ms),
+        "LOCAL_CHAT_LATENCY_DISTRIBUTION": args.distribution,
+        "LOCAL_EMBEDDING_LATENCY_MS": str(args.embedding_ms),
+        "LOCAL_EMBEDDING_LATENCY_DISTRIBUTION": args.distribution,
+        "LOCAL_MODEL_SEED": str(args.seed),
+        "CHECKPOINT_DB_PATH": str(workdir / "checkpoints.db"),
+        "INGEST_QUEUE_PATH": str(workdir / "ingest_queue.sqlite3"),
+        "INTENT_CENTROIDS_PATH": "",
+        "EMBEDDING_CACHE_PATH": "",
+    })
+    os.environ.setdefault("FRONTEND_URL", "http://localhost:5173")
+    os.environ.setdefault("JWT_SECRET_KEY", "load-test")
+
+
+# ---------------------------
+# Per-node timing
+# ---------------------------
+_node_timer: ContextVar = ContextVar("load_test_node_timer", default=None)
+
+
+def _make_node_timer():
+    from langchain_core.callbacks import AsyncCallbackHandler
+
+    class NodeTimer(AsyncCallbackHandler):
+        """Times graph node runs (chain runs whose name is their langgraph_node)."""
+
+        def __init__(self):
+            self.started: dict = {}
+            self.samples: dict[str, list[float]] = defaultdict(list)
+
+        async def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+            node = (metadata or {}).get("langgraph_node")
+            if node and kwargs.get("name") == node:
+                self.started[run_id] = (node, time.perf_counter())
+
+        async def on_chain_end(self, outputs, *, run_id, **kwargs):
+            entry = self.started.pop(run_id, None)
+            if entry:
+                self.samples[entry[0]].append(time.perf_counter() - entry[1])
+
+        async def on_chain_error(self, error, *, run_id, **kwargs):
+            self.started.pop(run_id, None)
+
+    return NodeTimer()
+
+
+# ---------------------------
+# Stats
+# ---------------------------
+def _percentile(samples: list[float], p: float) -> float:
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def _summary(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "mean_ms": round(1000 * sum(samples) / len(samples), 1),
+        "p50_ms": round(1000 * _percentile(samples, 50), 1),
+        "p95_ms": round(1000 * _percentile(samples, 95), 1),
+        "p99_ms": round(1000 * _percentile(samples, 99), 1),
+        "max_ms": round(1000 * max(samples), 1),
+    }
+
+
+# ---------------------------
+# Load
+# ---------------------------
+async def _seed(workdir: Path) -> None:
+    import app.chatbot.rag.vectorstore as vectorstore
+    from langchain_chroma import Chroma
+    from app.core.llm import get_embedding_model
+    from app.db.mongodb import db
+
+    await db.clients.insert_one({"client_id": CLIENT_ID, "name": "Load Test", "allowed_domains": [], "is_active": True})
+
+    # Keep the benchmark's knowledge base out of app/storage
+    vectorstore._get_client_chroma_path = lambda client_id: (workdir / "chroma" / f"client_{client_id}")
+    store = Chroma(
+        persist_directory=str(vectorstore._get_client_chroma_path(CLIENT_ID)),
+        embedding_function=get_embedding_model(),
+        collection_name=vectorstore.COLLECTION_NAME,
+    )
+    await asyncio.to_thread(
+        store.add_texts,
+        KNOWLEDGE_BASE,
+        metadatas=[{"client_id": CLIENT_ID, "doc_id": f"kb-{i}"} for i in range(len(KNOWLEDGE_BASE))],
+    )
+
+
+async def _run_conversation(http, n: int, rng: random.Random, think_time: float, turns: dict, errors: list) -> None:
+    thread_id = None
+    for turn_type, text in SCRIPT:
+        query = (text or rng.choice(FAQ_QUESTIONS)).format(n=n)
+        started = time.perf_counter()
+        try:
+            response = await http.post(
+                "/chat/",
+                json={"query": query, "client_id": CLIENT_ID, "thread_id": thread_id},
+            )
+            elapsed = time.perf_counter() - started
+            if response.status_code != 200:
+                errors.append({"conversation": n, "turn": turn_type, "status": response.status_code})
+                return
+            thread_id = response.json()["thread_id"]
+            turns[turn_type].append(elapsed)
+        except Exception as e:
+            errors.append({"conversation": n, "turn": turn_type, "error": repr(e)})
+            return
+        if think_time:
+            await asyncio.sleep(rng.uniform(0, 2 * think_time))
+
+
+async def run(args: argparse.Namespace, workdir: Path) -> dict:
+    import httpx
+    from langchain_core.tracers.context import register_configure_hook
+    from app.main import app, lifespan
+    from app.core.llm import model_registry
+    from app.db.mongodb import db
+
+    await _seed(workdir)
+
+    timer = _make_node_timer()
+    register_configure_hook(_node_timer, inheritable=True)
+    _node_timer.set(timer)
+
+    turns: dict[str, list[float]] = defaultdict(list)
+    errors: list[dict] = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def _bounded(http, n):
+        async with semaphore:
+            await _run_conversation(http, n, random.Random(args.seed + n), args.think_ms / 1000, turns, errors)
+
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as http:
+            # One warm-up conversation (model clients, Chroma handle, checkpointer)
+            await _run_conversation(http, -1, random.Random(args.seed), 0, defaultdict(list), [])
+            timer.samples.clear()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(_bounded(http, n) for n in range(args.conversations)))
+            duration = time.perf_counter() - started
+
+    completed_turns = sum(len(v) for v in turns.values())
+    return {
+        "config": {
+            "conversations": args.conversations,
+            "concurrency": args.concurrency,
+            "llm_ms": args.llm_ms,
+            "embedding_ms": args.embedding_ms,
+            "distribution": args.distribution,
+            "think_ms": args.think_ms,
+            "seed": args.seed,
+        },
+        "totals": {
+            "duration_s": round(duration, 3),
+            "turns": completed_turns,
+            "turns_per_s": round(completed_turns / duration, 2) if duration else None,
+            "conversations_per_s": round(args.conversations / duration, 2) if duration else None,
+            "errors": len(errors),
+            # Every completed script should raise exactly one ticket (warm-up included)
+            "tickets": await db.tickets.count_documents({}),
+        },
+        "turns": {turn_type: _summary(turns[turn_type]) for turn_type, _ in SCRIPT},
+        "nodes": {node: _summary(samples) for node, samples in sorted(timer.samples.items())},
+        "models": model_registry.stats(),
+        "error_samples": errors[:10],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/chat/ load test with local stand-ins")
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20, help="conversations in flight")
+    parser.add_argument("--llm-ms", type=float, default=800, help="mean simulated chat model latency")
+    parser.add_argument("--embedding-ms", type=float, default=40, help="mean simulated embedding latency")
+    parser.add_argument("--distribution", default="lognormal", choices=["fixed", "uniform", "normal", "lognormal"])
+    parser.add_argument("--think-ms", type=float, default=0, help="mean pause between a conversation's turns")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="chat-loadtest-") as tmp:
+        workdir = Path(tmp)
+        _configure_environment(args, workdir)
+        report = asyncio.run(run(args, workdir))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+        print(f"Report written to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Evaluate intent classification tiers on the labelled example sets.
+Run this from the backend directory:
+
+    python3 eval_intent.py              # rule tier only (offline)
+    python3 eval_intent.py --centroids  # also the centroid tier (embedding calls)
+    python3 eval_intent.py --full       # also the full tiered classifier (calls the LLM)
+
+Each set is reported on its own: "reference" (INTENT_EXAMPLES, which the
+rules were written against) and "held-out" (HELD_OUT_EXAMPLES, which they
+were not). The rule tier must never disagree with a label it resolves: any
+mismatch is printed, and one in the reference set makes the script exit
+non-zero. Held-out mismatches are reported only; fix them with new
+reference examples, not by writing rules against the held-out messages.
+
+The centroid tier is scored on its own (every message, whatever the rules
+would do) with the configured INTENT_CENTROID_MIN_SCORE / MARGIN. Its
+centroids are built from the reference set, so only the held-out numbers
+say anything about new messages.
+"""
+
+import sys
+import asyncio
+import argparse
+from collections import Counter
+from pathlib import Path
+
+# Add the backend directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.chatbot.intent_examples import HELD_OUT_EXAMPLES, INTENT_EXAMPLES
+from app.chatbot.intent_rules import classify_by_rules
+
+
+SPLITS = {"reference": INTENT_EXAMPLES, "held-out": HELD_OUT_EXAMPLES}
+
+
+def eval_rules(name: str, examples: list[tuple[str, str]]) -> bool:
+    resolved = 0
+    correct = 0
+    per_intent = Counter()
+    mistakes = []
+
+    for text, label in examples:
+        predicted = classify_by_rules(text)
+        if predicted is None:
+            continue
+        resolved += 1
+        per_intent[label] += 1
+        if predicted == label:
+            correct += 1
+        else:
+            mistakes.append((text, label, predicted))
+
+    total = len(examples)
+    print("=" * 60)
+    print(f"Rule tier ({name})")
+    print("=" * 60)
+    print(f"Examples:  {total}")
+    print(f"Resolved:  {resolved} ({resolved / total:.0%} skip the LLM)")
+    print(f"Accuracy:  {correct}/{resolved}" + (f" ({correct / resolved:.1%})" if resolved else ""))
+    for intent, count in sorted(per_intent.items()):
+        print(f"   {intent:<20} {count}")
+    for text, label, predicted in mistakes:
+        print(f"   ❌ {text!r}: expected {label}, got {predicted}")
+    return not mistakes
+
+
+async def eval_centroids(name: str, examples: list[tuple[str, str]]) -> bool:
+    from app.core.config import settings
+    from app.chatbot.support_agent import intent_centroids
+
+    resolved = 0
+    correct = 0
+    per_intent = Counter()
+    mistakes = []
+    for text, label in examples:
+        predicted, margin = await intent_centroids.classify(text)
+        if predicted is None:
+            continue
+        resolved += 1
+        per_intent[predicted] += 1
+        if predicted == label:
+            correct += 1
+        else:
+            mistakes.append((text, label, predicted, margin))
+
+    total = len(examples)
+    print("\n" + "=" * 60)
+    print(f"Centroid tier ({name})")
+    print("=" * 60)
+    print(f"Thresholds: min_score={settings.INTENT_CENTROID_MIN_SCORE} margin={settings.INTENT_CENTROID_MARGIN}")
+    print(f"Examples:  {total}")
+    print(f"Resolved:  {resolved} ({resolved / total:.0%} skip the LLM)")
+    print(f"Accuracy:  {correct}/{resolved}" + (f" ({correct / resolved:.1%})" if resolved else ""))
+    for intent, count in sorted(per_intent.items()):
+        print(f"   {intent:<20} {count}")
+    for text, label, predicted, margin in mistakes:
+        print(f"   ❌ {text!r}: expected {label}, got {predicted} (margin={margin:.3f})")
+    return not mistakes
+
+
+async def eval_full(name: str, examples: list[tuple[str, str]]) -> None:
+    from app.chatbot.support_agent import intent_classifier
+
+    correct = 0
+    tiers = Counter()
+    confusion = []
+    for text, label in examples:
+        result = await intent_classifier({"query": text, "client_id": "eval"})
+        tiers[result.get("intent_tier")] += 1
+        if result["intent"] == label:
+            correct += 1
+        else:
+            confusion.append((text, label, result["intent"], result.get("intent_tier")))
+
+    total = len(examples)
+    print("\n" + "=" * 60)
+    print(f"Full tiered classifier ({name})")
+    print("=" * 60)
+    print(f"Accuracy:  {correct}/{total} ({correct / total:.1%})")
+    for tier, count in tiers.most_common():
+        print(f"   tier={tier:<10} {count}")
+    for text, label, predicted, tier in confusion:
+        print(f"   ❌ {text!r}: expected {label}, got {predicted} (tier={tier})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--centroids", action="store_true", help="also score the centroid tier")
+    parser.add_argument("--full", action="store_true", help="also run the full classifier")
+    args = parser.parse_args()
+
+    ok = eval_rules("reference", INTENT_EXAMPLES)
+    eval_rules("held-out", HELD_OUT_EXAMPLES)
+    if args.centroids:
+
+        async def _centroids() -> list[bool]:
+            return [await eval_centroids(name, examples) for name, examples in SPLITS.items()]
+
+        # A tier that gets held-out messages wrong is not ready to skip the LLM
+        ok = all(asyncio.run(_centroids())) and ok
+    if args.full:
+        for name, examples in SPLITS.items():
+            asyncio.run(eval_full(name, examples))
+    sys.exit(0 if ok else 1)